@@ -0,0 +1,271 @@
+"""
+Размер блока захвата и порции распознавателя
+
+Блок захвата (blocksize потока) определяет, как скоро звук попадает в
+программу: при 500 мс распознаватель видит речь с опозданием до
+полусекунды, и конец команды замечается с той же дискретностью. Порция
+распознавателя — сколько звука отдаётся в AcceptWaveform за вызов:
+слишком мелкие порции тратят процессор на накладные расходы вызова.
+
+Rechunker развязывает эти размеры: блоки любого размера (в том числе
+неровные после ресемплера) складываются в буфер и выдаются порциями
+фиксированной длины.
+
+Подбор размеров на записанном звуке:
+    python -m audio.chunking --wav temp.wav --model models/stt/vosk-model-small-ru-0.22
+    python -m audio.chunking --fake
+"""
+import argparse
+import json
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def block_samples(sample_rate: int, block_ms: float) -> int:
+    """Число отсчётов в блоке длительностью block_ms"""
+    return max(1, int(sample_rate * block_ms / 1000))
+
+
+class Rechunker:
+    """Перенарезка PCM16 в порции фиксированной длины"""
+
+    def __init__(self, feed_samples: int):
+        """
+        Args:
+            feed_samples: Длина порции на выходе (отсчёты)
+        """
+        self.feed_samples = feed_samples
+        self._buf = np.empty(feed_samples, dtype=np.int16)
+        self._fill = 0
+        # clear() из другого потока только ставит флаг, сбрасывает буфер push()
+        self._clear_requested = False
+
+    @property
+    def pending(self) -> int:
+        """Сколько отсчётов ждут до полной порции"""
+        return self._fill
+
+    def push(self, samples: np.ndarray) -> List[bytes]:
+        """
+        Добавить блок захвата
+
+        Returns:
+            Готовые порции (возможно, ни одной)
+        """
+        if self._clear_requested:
+            self._clear_requested = False
+            self._fill = 0
+        out = []
+        pos, n = 0, len(samples)
+        feed = self.feed_samples
+        # Если буфер пуст, целые порции берутся прямо из блока без копирования в буфер
+        while self._fill == 0 and n - pos >= feed:
+            out.append(samples[pos:pos + feed].tobytes())
+            pos += feed
+        while pos < n:
+            take = min(feed - self._fill, n - pos)
+            self._buf[self._fill:self._fill + take] = samples[pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == feed:
+                out.append(self._buf.tobytes())
+                self._fill = 0
+        return out
+
+    def flush(self) -> bytes:
+        """Отдать неполную порцию и очистить буфер"""
+        data = self._buf[:self._fill].tobytes()
+        self._fill = 0
+        return data
+
+    def clear(self):
+        """
+        Отбросить неполную порцию
+
+        Можно вызывать из любого потока: буфер сбросит следующий push()
+        в потоке захвата, поэтому его копирование не прервётся посередине.
+        """
+        self._clear_requested = True
+
+
+class EnergyRecognizer:
+    """
+    Имитация распознавателя для прогона без модели
+
+    Каждый отрезок речи (по энергии) — одно «слово», конец фразы — после
+    endpoint_ms тишины. На каждый вызов тратится фиксированная работа,
+    как на подготовку признаков в Kaldi.
+    """
+
+    def __init__(self, sample_rate: int = 16000, threshold: float = 500.0,
+                 endpoint_ms: int = 500, call_overhead: int = 40):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.endpoint = block_samples(sample_rate, endpoint_ms)
+        self.call_overhead = call_overhead
+        self._work = np.random.default_rng(0).normal(size=(64, 64)).astype(np.float32)
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._last_voice = 0
+        self._words: List[Dict] = []
+
+    def AcceptWaveform(self, data: bytes) -> bool:
+        x = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        for _ in range(self.call_overhead):
+            self._work @ self._work
+        frame = block_samples(self.sample_rate, 10)
+        done = False
+        for i in range(0, len(x), frame):
+            voiced = np.sqrt(np.mean(x[i:i + frame] ** 2)) > self.threshold
+            now = self._pos + i
+            if voiced:
+                if self._start is None:
+                    self._start = now
+                self._last_voice = now + frame
+            elif self._start is not None and now - self._last_voice >= self.endpoint:
+                self._words.append({"word": f"слово{len(self._words)}", "conf": 1.0,
+                                    "start": self._start / self.sample_rate,
+                                    "end": self._last_voice / self.sample_rate})
+                self._start = None
+                done = True
+        self._pos += len(x)
+        return done
+
+    def Result(self) -> str:
+        words, self._words = self._words, []
+        return json.dumps({"text": " ".join(w["word"] for w in words), "result": words},
+                          ensure_ascii=False)
+
+    def FinalResult(self) -> str:
+        return self.Result()
+
+    def SetWords(self, enable: bool):
+        pass
+
+
+def simulate(audio: np.ndarray, recognizer, sample_rate: int, block_ms: float,
+             feed_ms: float, wake_word: Optional[str] = None) -> Dict:
+    """
+    Прогнать запись так, как её отдавал бы поток с блоком block_ms
+
+    Блок «приходит» в момент своего конца на шкале записи; распознаватель
+    обрабатывает его, как только освободится. Задержки считаются от конца
+    последнего слова фразы (по меткам слов распознавателя) до момента,
+    когда фраза вернулась из Result().
+
+    Returns:
+        Задержка ключевого слова, медиана/максимум задержки конца команды,
+        процессорное время на секунду звука
+    """
+    block = block_samples(sample_rate, block_ms)
+    rechunker = Rechunker(block_samples(sample_rate, feed_ms))
+    clock = 0.0
+    wake_latency = None
+    command_latencies = []
+    cpu_start = time.process_time()
+    for i in range(0, len(audio), block):
+        arrive = min(i + block, len(audio)) / sample_rate
+        for chunk in rechunker.push(audio[i:i + block]):
+            start = time.perf_counter()
+            done = recognizer.AcceptWaveform(chunk)
+            clock = max(clock, arrive) + (time.perf_counter() - start)
+            if not done:
+                continue
+            words = json.loads(recognizer.Result()).get("result", [])
+            if not words:
+                continue
+            latency = clock - words[-1]["end"]
+            is_wake = wake_latency is None and (
+                wake_word is None or any(wake_word in w["word"] for w in words))
+            if is_wake:
+                wake_latency = latency
+            else:
+                command_latencies.append(latency)
+    cpu = time.process_time() - cpu_start
+    ms = np.array(command_latencies) * 1000 if command_latencies else np.zeros(1)
+    return {
+        "block_ms": block_ms,
+        "feed_ms": feed_ms,
+        "wake_ms": round(wake_latency * 1000, 1) if wake_latency is not None else None,
+        "end_p50_ms": round(float(np.median(ms)), 1),
+        "end_max_ms": round(float(ms.max()), 1),
+        "utterances": len(command_latencies) + (wake_latency is not None),
+        "cpu_per_s": round(cpu / (len(audio) / sample_rate), 4),
+    }
+
+
+def sweep(audio: np.ndarray, factory, sample_rate: int = 16000,
+          blocks_ms: Sequence[float] = (20, 50, 100, 200, 500),
+          feed_ms: Optional[float] = None, wake_word: Optional[str] = None) -> List[Dict]:
+    """
+    Сравнить размеры блока захвата на одной записи
+
+    Args:
+        factory: Создаёт свежий распознаватель на каждый прогон
+        blocks_ms: Размеры блока захвата
+        feed_ms: Порция распознавателя (None — равна блоку захвата)
+    """
+    return [simulate(audio, factory(), sample_rate, b, feed_ms or b, wake_word) for b in blocks_ms]
+
+
+def _synthetic_audio(sample_rate: int) -> np.ndarray:
+    """Ключевое слово и три команды с паузами (шум + «речь» повышенной энергии)"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for speech_s in (0.7, 1.2, 1.5, 0.9):
+        parts.append(rng.normal(0, 30, int(sample_rate * 0.8)))
+        parts.append(rng.normal(0, 3000, int(sample_rate * speech_s)))
+    parts.append(rng.normal(0, 30, int(sample_rate * 1.5)))
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Подбор размера блока захвата")
+    parser.add_argument("--wav", help="WAV PCM16 mono (частота — как у модели)")
+    parser.add_argument("--model", help="Модель Vosk")
+    parser.add_argument("--fake", action="store_true", help="Имитация распознавателя без модели")
+    parser.add_argument("--wake", default="ассистент", help="Ключевое слово в записи")
+    parser.add_argument("--blocks", default="20,50,100,200,500", help="Размеры блока, мс")
+    parser.add_argument("--feed-ms", type=float, help="Порция распознавателя, мс (по умолчанию = блок)")
+    args = parser.parse_args(argv)
+
+    sample_rate = 16000
+    if args.wav:
+        with wave.open(args.wav, "rb") as wf:
+            sample_rate = wf.getframerate()
+            audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    else:
+        audio = _synthetic_audio(sample_rate)
+
+    wake = args.wake
+    if args.fake or not args.model:
+        factory = lambda: EnergyRecognizer(sample_rate)
+        wake = None
+    else:
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+
+        SetLogLevel(-1)
+        model = Model(args.model)
+
+        def factory():
+            rec = KaldiRecognizer(model, sample_rate)
+            rec.SetWords(True)
+            return rec
+
+    blocks = [float(b) for b in args.blocks.split(",")]
+    print(f"{'блок мс':>8}{'порция мс':>10}{'wake мс':>9}{'конец p50':>10}"
+          f"{'конец max':>10}{'фраз':>6}{'CPU с/с':>9}")
+    for r in sweep(audio, factory, sample_rate, blocks, args.feed_ms, wake):
+        wake_ms = "-" if r["wake_ms"] is None else r["wake_ms"]
+        print(f"{r['block_ms']:>8g}{r['feed_ms']:>10g}{wake_ms:>9}{r['end_p50_ms']:>10}"
+              f"{r['end_max_ms']:>10}{r['utterances']:>6}{r['cpu_per_s']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
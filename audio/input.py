@@ -1,21 +1,144 @@
-import sounddevice as sd
-import numpy as np
 import wave
 from audio.base import AudioInput
 import queue
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from core.logger import log
+
+
+class CaptureBlocks:
+    """
+    Разбор блоков RawInputStream в аудио-callback
+
+    Вынесен из main: модуль захвата импортируется после старта и держит
+    NumPy на уровне модуля, а callback не импортирует ничего на каждом блоке.
+    """
+
+    def __init__(self, speech_rms: float = 500.0):
+        """
+        Args:
+            speech_rms: Уровень (RMS), с которого блок считается речью
+        """
+        self._threshold = speech_rms * speech_rms
+
+    @staticmethod
+    def decode(data) -> np.ndarray:
+        """Буфер потока как int16 (без копирования)"""
+        return np.frombuffer(data, dtype=np.int16)
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        """Блок громче порога речи"""
+        if not len(samples):
+            return False
+        x = samples.astype(np.float32)
+        return float(np.dot(x, x)) / len(x) > self._threshold
+
+
+class ChannelSelector:
+    """
+    Сведение многоканального захвата в один моно-поток
+
+    На каждом блоке выбирается канал с лучшим отношением сигнал/шум
+    (mode="best") либо каналы выравниваются по задержке и суммируются
+    (mode="beam", delay-and-sum). Распознаватель всегда получает один
+    поток, так что стоимость STT не растёт с числом микрофонов.
+    """
+
+    def __init__(self, channels: int, mode: str = "best", max_lag: int = 16,
+                 switch_ratio: float = 1.5):
+        """
+        Args:
+            channels: Количество входных каналов
+            mode: "best" — лучший канал, "beam" — delay-and-sum
+            max_lag: Максимальная задержка между микрофонами (отсчёты)
+            switch_ratio: Во сколько раз SNR нового канала должен превосходить
+                текущий для переключения (гистерезис против щелчков)
+        """
+        if mode not in ("best", "beam"):
+            raise ValueError(f"Неизвестный режим сведения: {mode}")
+        self.channels = channels
+        self.mode = mode
+        self.max_lag = max_lag
+        self.switch_ratio = switch_ratio
+        self.current = 0
+        self.noise_floor = np.full(channels, np.inf)
+        self._tail = np.zeros((2 * max_lag, channels), dtype=np.float32)
+
+    def snr(self, block: np.ndarray) -> np.ndarray:
+        """Оценка SNR по каналам для блока (frames, channels)"""
+        x = block.astype(np.float32)
+        energy = np.einsum('ij,ij->j', x, x) / max(len(x), 1) + 1.0
+        # Минимум-трекинг уровня шума: быстро вниз, медленно вверх
+        self.noise_floor = np.where(energy < self.noise_floor, energy, self.noise_floor * 1.05)
+        return energy / self.noise_floor
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            block: int16 (frames, channels)
+
+        Returns:
+            int16 (frames,)
+        """
+        if self.channels == 1:
+            return block[:, 0].copy()
+
+        snr = self.snr(block)
+        best = int(np.argmax(snr))
+        if best != self.current and snr[best] > snr[self.current] * self.switch_ratio:
+            self.current = best
+
+        if self.mode == "best":
+            return block[:, self.current].copy()
+        return self._delay_and_sum(block)
+
+    def _delay_and_sum(self, block: np.ndarray) -> np.ndarray:
+        frames = len(block)
+        x = np.concatenate((self._tail, block.astype(np.float32)))
+        self._tail = x[-2 * self.max_lag:]
+
+        # Задержки относительно опорного канала по взаимной корреляции (через FFT)
+        ref = self.current
+        n = 1 << int(np.ceil(np.log2(2 * frames)))
+        spec = np.fft.rfft(block.astype(np.float32), n=n, axis=0)
+        xcorr = np.fft.irfft(spec * np.conj(spec[:, ref:ref + 1]), n=n, axis=0)
+        lags = np.concatenate((xcorr[:self.max_lag + 1], xcorr[-self.max_lag:]))
+        delay = np.argmax(lags, axis=0)
+        delay = np.where(delay > self.max_lag, delay - len(lags), delay)
+
+        # Канал, запаздывающий на d, берём на d отсчётов позже
+        start = 2 * self.max_lag - self.max_lag + delay
+        out = np.zeros(frames, dtype=np.float32)
+        for ch in range(self.channels):
+            out += x[start[ch]:start[ch] + frames, ch]
+        out /= self.channels
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
 
 class WindowsAudioInput(AudioInput):
     def list_devices(self):
+        import sounddevice as sd
+
         devices = sd.query_devices()
         for i, dev in enumerate(devices):
             print(f"{i}: {dev['name']} ({'input' if dev['max_input_channels']>0 else 'output'})")
         return devices
 
-    def record(self, duration: float, device=None, filename="output.wav"):
-        fs = 16000
+    def record(self, duration: float, device=None, filename="output.wav", samplerate: int = 16000):
+        import sounddevice as sd
+        from audio.devices import PolyphaseResampler, negotiate_input_rate
+
+        fs = samplerate
+        native = negotiate_input_rate(device, target=fs)
         print(f"Recording {duration} seconds...")
-        recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16', device=device)
+        recording = sd.rec(int(duration * native), samplerate=native, channels=1, dtype='int16', device=device)
         sd.wait()
+        if native != fs:
+            recording = PolyphaseResampler(native, fs).process(recording)
         print("Recording finished, saving...")
         with wave.open(filename, 'wb') as wf:
             wf.setnchannels(1)
@@ -25,22 +148,220 @@ class WindowsAudioInput(AudioInput):
         print(f"Saved to {filename}")
         return filename
 
-    def record_async(self, device=None, callback=None):
+    def record_async(self, device=None, callback=None, samplerate: int = 16000,
+                     channels: int = 1, mix: str = "best", gate=None, block_ms: float = 100):
         """
         Асинхронная запись в поток. 
         callback(data: np.ndarray) вызывается на каждом блоке.
+        
+        Поток открывается на родной частоте устройства, блоки приводятся
+        к samplerate полифазным ресемплером. При channels > 1 каналы
+        сводятся в моно ChannelSelector'ом (mix: "best" или "beam") до
+        ресемплинга, так что дальше идёт один поток. gate (EchoGate)
+        отбрасывает блоки, пока ассистент говорит. block_ms — размер блока
+        потока: от него зависит, как скоро звук попадает в callback.
         """
-        fs = 16000
+        import sounddevice as sd
+        from audio.chunking import block_samples
+        from audio.devices import PolyphaseResampler, negotiate_input_rate
+
+        fs = samplerate
+        native = negotiate_input_rate(device, target=fs, channels=channels)
+        resampler = PolyphaseResampler(native, fs) if native != fs else None
+        selector = ChannelSelector(channels, mode=mix) if channels > 1 else None
         q = queue.Queue()
 
         def audio_callback(indata, frames, time, status):
             if status:
-                print(status)
-            q.put(indata.copy())
+                log.warning("audio", "stream status", status=str(status))
+            mono = selector.process(indata) if selector is not None else indata[:, 0]
+            if resampler is not None:
+                data = resampler.process(mono).reshape(-1, 1)
+            else:
+                data = mono.reshape(-1, 1).copy()
+            if gate is not None and gate.should_drop(data):
+                return
+            q.put(data)
+            if callback:
+                callback(data)
+
+        stream = sd.InputStream(samplerate=native, channels=channels, dtype='int16',
+                                callback=audio_callback, device=device,
+                                blocksize=block_samples(native, block_ms))
+        stream.start()
+        return stream, q
+
+
+class ReplayStream:
+    """
+    Воспроизведение сессии в фоновом потоке с интерфейсом потока sounddevice
+
+    Блоки отдаются в callback в моменты, рассчитанные по индексу сессии
+    (время блока / speed от старта), поэтому их границы и темп совпадают
+    с записью. Опоздания относительно расписания копятся в stats().
+    """
+
+    def __init__(self, source: "ReplayAudioInput", callback, samplerate: Optional[int] = None,
+                 raw: bool = False):
+        """
+        Args:
+            source: Источник записи
+            callback: callback(data) или, при raw=True, callback(indata, frames,
+                time_info, status) как у sd.RawInputStream
+            samplerate: Частота для callback (None — частота записи)
+        """
+        self.source = source
+        self.callback = callback
+        self.samplerate = samplerate
+        self.raw = raw
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and not self.finished.is_set()
+
+    def _run(self):
+        try:
+            for _, data in self.source.timed_blocks(self.samplerate, self._stop):
+                if self.raw:
+                    self.callback(data.tobytes(), len(data), None, None)
+                else:
+                    self.callback(data)
+        except Exception as e:
+            log.error("audio", "replay failed", error=str(e))
+        finally:
+            self.finished.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="replay")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class ReplayAudioInput(AudioInput):
+    """
+    Источник звука из записанной сессии (audio.session) вместо микрофона
+
+    Те же блоки, что были захвачены, в реальном темпе (speed=1), ускоренно
+    (speed=4) или без пауз (speed=0). Прогон детерминирован: одинаковые
+    блоки в одинаковом порядке при каждом запуске.
+    """
+
+    def __init__(self, session, speed: float = 1.0):
+        """
+        Args:
+            session: Каталог сессии или открытая audio.session.Session
+            speed: Множитель темпа (0 — без пауз)
+        """
+        from audio.session import Session
+
+        self.session = Session.open(session) if isinstance(session, str) else session
+        self.speed = speed
+        self._late_max = 0.0
+        self._late_sum = 0.0
+        self._blocks_played = 0
+
+    def list_devices(self):
+        device = {"name": f"replay:{self.session.path}", "max_input_channels": 1,
+                  "default_samplerate": self.session.sample_rate}
+        print(f"0: {device['name']} (input)")
+        return [device]
+
+    def record(self, duration: float, device=None, filename="output.wav", samplerate: int = 16000):
+        """Сохранить первые duration секунд записи в WAV (без ожидания)"""
+        from audio.devices import PolyphaseResampler
+
+        rate = self.session.sample_rate
+        audio = np.asarray(self.session.audio[:int(duration * rate)])
+        if rate != samplerate:
+            audio = PolyphaseResampler(rate, samplerate).process(audio)
+        with wave.open(filename, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(samplerate)
+            wf.writeframes(audio.astype("<i2").tobytes())
+        return filename
+
+    def timed_blocks(self, samplerate: Optional[int] = None, stop: Optional[threading.Event] = None):
+        """
+        Блоки записи по расписанию
+
+        Yields:
+            (момент по расписанию в шкале time.perf_counter, блок int16 (frames, 1))
+        """
+        from audio.devices import PolyphaseResampler
+
+        rate = self.session.sample_rate
+        resampler = PolyphaseResampler(rate, samplerate) if samplerate and samplerate != rate else None
+        times = self.session.blocks["time"]
+        start = time.perf_counter()
+        origin = float(times[0]) if len(times) else 0.0
+        for i in range(len(times)):
+            if stop is not None and stop.is_set():
+                return
+            now = time.perf_counter()
+            due = start + (float(times[i]) - origin) / self.speed if self.speed else now
+            if due > now:
+                time.sleep(due - now)
+            late = max(0.0, time.perf_counter() - due)
+            self._late_max = max(self._late_max, late)
+            self._late_sum += late
+            self._blocks_played += 1
+            block = np.asarray(self.session.block(i))
+            if resampler is not None:
+                block = resampler.process(block)
+            yield due, block.reshape(-1, 1)
+
+    def blocks(self, samplerate: Optional[int] = None):
+        """Блоки записи по расписанию (без моментов)"""
+        for _, block in self.timed_blocks(samplerate):
+            yield block
+
+    def open_raw_stream(self, callback, samplerate: Optional[int] = None) -> ReplayStream:
+        """Поток для callback в формате sd.RawInputStream (не запущен)"""
+        return ReplayStream(self, callback, samplerate, raw=True)
+
+    def record_async(self, device=None, callback=None, samplerate: int = 16000,
+                     channels: int = 1, mix: str = "best", gate=None, block_ms: float = 100):
+        """
+        Воспроизведение записи как асинхронный захват WindowsAudioInput
+
+        Блоки идут с границами записи, block_ms, channels и mix не влияют.
+        """
+        q = queue.Queue()
+
+        def replay_callback(data):
+            if gate is not None and gate.should_drop(data):
+                return
+            q.put(data)
             if callback:
-                callback(indata.copy())
+                callback(data)
 
-        stream = sd.InputStream(samplerate=fs, channels=1, dtype='int16',
-                                callback=audio_callback, device=device, blocksize=8000)
+        stream = ReplayStream(self, replay_callback, samplerate)
         stream.start()
         return stream, q
+
+    def stats(self) -> Dict:
+        played = self._blocks_played
+        return {"blocks": played, "late_ms_max": self._late_max * 1000,
+                "late_ms_mean": self._late_sum / played * 1000 if played else 0.0}
@@ -0,0 +1,168 @@
+"""
+Воспроизведение и подавление собственной речи ассистента
+
+Пока ассистент говорит, микрофон слышит его голос. PlaybackMonitor
+публикует, что сейчас играет (флаг и, если известно, сами отсчёты), а
+EchoGate в пути захвата отбрасывает такие блоки до распознавателя —
+это экономит декодирование и не даёт ответам будить wake word.
+
+Перебить ассистента можно, только если известен эталон — отсчёты, которые
+играют (tts.base.play_audio). pyttsx3 (CommandHandler.speak) говорит сам
+через движок ОС, отсчётов не отдаёт, и на это время захват просто
+глушится.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+
+class PlaybackMonitor:
+    """Состояние воспроизведения, общее для вывода и захвата"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self.started_at = 0.0
+        self.ended_at = 0.0
+        self.reference: Optional[np.ndarray] = None
+        self.reference_rate = 0
+
+    def begin(self, reference: Optional[np.ndarray] = None, sample_rate: int = 0):
+        """
+        Отметить начало воспроизведения
+
+        Args:
+            reference: Воспроизводимые отсчёты mono (если известны)
+            sample_rate: Их частота
+        """
+        with self._lock:
+            self._active += 1
+            if reference is not None:
+                ref = np.asarray(reference, dtype=np.float32)
+                self.reference = ref.mean(axis=1) if ref.ndim > 1 else ref
+                self.reference_rate = sample_rate
+                self.started_at = time.monotonic()
+            elif self._active == 1:
+                self.started_at = time.monotonic()
+            # Вложенное воспроизведение без эталона не сбрасывает эталон
+            # внешнего: иначе перебивание пропало бы до его конца
+
+    def end(self):
+        with self._lock:
+            self._active = max(0, self._active - 1)
+            self.ended_at = time.monotonic()
+            if not self._active:
+                self.reference = None
+
+    @contextmanager
+    def playing(self, reference: Optional[np.ndarray] = None, sample_rate: int = 0):
+        self.begin(reference, sample_rate)
+        try:
+            yield
+        finally:
+            self.end()
+
+    @property
+    def active(self) -> bool:
+        return self._active > 0
+
+    def reference_window(self, seconds: float) -> Optional[np.ndarray]:
+        """Отсчёты эталона, которые играют последние seconds секунд"""
+        with self._lock:
+            ref, rate = self.reference, self.reference_rate
+            started = self.started_at
+        if ref is None or not rate:
+            return None
+        end = int((time.monotonic() - started) * rate)
+        start = max(0, end - int(seconds * rate))
+        end = min(end, len(ref))
+        if end - start < rate // 20:
+            return None
+        return ref[start:end]
+
+
+# Общий монитор процесса: его используют TTS и пути захвата
+playback = PlaybackMonitor()
+
+
+class EchoGate:
+    """
+    Гейт захвата на время воспроизведения
+
+    Блок отбрасывается, пока идёт воспроизведение и ещё tail секунд после
+    (хвост реверберации и буферов). Если известен эталон, громкий блок,
+    огибающая которого не похожа на воспроизводимую, пропускается —
+    пользователь может перебить ассистента. Без эталона (pyttsx3) блоки
+    гасятся все.
+    """
+
+    def __init__(self, monitor: PlaybackMonitor = playback, sample_rate: int = 16000,
+                 tail: float = 0.3, correlation: float = 0.5, envelope_ms: int = 20,
+                 barge_in_rms: float = 1000.0):
+        """
+        Args:
+            monitor: Источник состояния воспроизведения
+            sample_rate: Частота блоков захвата
+            tail: Сколько секунд гасить после окончания воспроизведения
+            correlation: Порог корреляции огибающих, выше — это эхо
+            envelope_ms: Шаг огибающей
+            barge_in_rms: Минимальный уровень блока для перебивания
+        """
+        self.monitor = monitor
+        self.sample_rate = sample_rate
+        self.tail = tail
+        self.correlation = correlation
+        self.envelope_ms = envelope_ms
+        self.barge_in_rms = barge_in_rms
+        self.gated_blocks = 0
+        self.gated_seconds = 0.0
+        self.passed_during_playback = 0
+
+    def should_drop(self, block: np.ndarray) -> bool:
+        """Решить судьбу блока захвата (int16 mono). Вызывается в аудио-callback."""
+        monitor = self.monitor
+        if not monitor.active and time.monotonic() - monitor.ended_at > self.tail:
+            return False
+
+        samples = np.asarray(block).reshape(-1)
+        if monitor.active and self._looks_like_barge_in(samples):
+            self.passed_during_playback += 1
+            return False
+
+        self.gated_blocks += 1
+        self.gated_seconds += len(samples) / self.sample_rate
+        return True
+
+    def _looks_like_barge_in(self, samples: np.ndarray) -> bool:
+        x = samples.astype(np.float32)
+        if np.sqrt(np.dot(x, x) / max(len(x), 1)) < self.barge_in_rms:
+            return False
+        ref = self.monitor.reference_window(len(samples) / self.sample_rate)
+        if ref is None:
+            return False
+        mic_env = self._envelope(x, self.sample_rate)
+        ref_env = self._envelope(ref, self.monitor.reference_rate)
+        n = min(len(mic_env), len(ref_env))
+        if n < 4:
+            return False
+        mic_env, ref_env = mic_env[-n:], ref_env[-n:]
+        if mic_env.std() == 0 or ref_env.std() == 0:
+            return False
+        return float(np.corrcoef(mic_env, ref_env)[0, 1]) < self.correlation
+
+    def _envelope(self, x: np.ndarray, rate: int) -> np.ndarray:
+        step = max(1, rate * self.envelope_ms // 1000)
+        n = len(x) // step
+        frames = x[:n * step].reshape(n, step)
+        return np.log(np.einsum('ij,ij->i', frames, frames) / step + 1e-6)
+
+    def stats(self) -> dict:
+        """Сэкономленная работа декодера"""
+        return {
+            "gated_blocks": self.gated_blocks,
+            "gated_seconds": round(self.gated_seconds, 2),
+            "passed_during_playback": self.passed_during_playback,
+        }
@@ -0,0 +1,135 @@
+"""
+Кольцевой буфер PCM в разделяемой памяти
+
+Один писатель (захват) и один читатель (процесс распознавания). Заголовок
+из счётчиков int64 и данные int16 лежат в одном сегменте
+multiprocessing.shared_memory. Позиции — монотонные счётчики отсчётов,
+индекс в кольце — позиция по модулю ёмкости.
+
+Писатель никогда не ждёт: если читатель отстал больше чем на ёмкость,
+старые отсчёты перезаписываются, а читатель, заметив это, перескакивает
+вперёд и учитывает потерю в lost_samples. Читатель получает срезы прямо
+из разделяемой памяти, без копирования.
+"""
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+# Слоты заголовка
+_WRITE_POS = 0
+_READ_POS = 1
+_LOST = 2
+_WRITES = 3
+_HEADER_SLOTS = 8
+_HEADER_BYTES = _HEADER_SLOTS * 8
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Подключиться к сегменту, которым владеет другой процесс"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Раньше 3.13 подключение регистрирует сегмент в resource_tracker; дочерний
+        # процесс (spawn) делит трекер с родителем, и повторная регистрация безвредна
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedAudioRing:
+    """PCM16 mono кольцо в разделяемой памяти"""
+
+    def __init__(self, capacity: int = 16000 * 30, name: Optional[str] = None):
+        """
+        Args:
+            capacity: Ёмкость в отсчётах
+            name: Имя существующего сегмента (подключиться) или None (создать)
+        """
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + capacity * 2)
+        else:
+            self.shm = _attach(name)
+            capacity = (self.shm.size - _HEADER_BYTES) // 2
+        self.capacity = capacity
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self._data = np.ndarray((capacity,), dtype=np.int16, buffer=self.shm.buf,
+                                offset=_HEADER_BYTES)
+        if self.owner:
+            self._header[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_pos(self) -> int:
+        return int(self._header[_WRITE_POS])
+
+    @property
+    def read_pos(self) -> int:
+        return int(self._header[_READ_POS])
+
+    @property
+    def lost_samples(self) -> int:
+        return int(self._header[_LOST])
+
+    def available(self) -> int:
+        """Непрочитанных отсчётов (может превышать ёмкость — тогда часть потеряна)"""
+        return self.write_pos - self.read_pos
+
+    def write(self, samples: np.ndarray):
+        """Записать блок (вызывается из аудио-callback, не блокируется)"""
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self._header[_LOST] += n - self.capacity
+            n = self.capacity
+        pos = self.write_pos
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+        # Позиция публикуется после данных: читатель не увидит недописанный блок
+        self._header[_WRITE_POS] = pos + n
+        self._header[_WRITES] += 1
+
+    def read(self, max_samples: int) -> np.ndarray:
+        """
+        Получить до max_samples непрочитанных отсчётов
+
+        Returns:
+            Срез разделяемой памяти (без копии; не дальше конца кольца).
+            Действителен до следующей записи поверх него — обработайте
+            или скопируйте до того, как писатель обойдёт кольцо.
+        """
+        write_pos = self.write_pos
+        read_pos = self.read_pos
+        if write_pos - read_pos > self.capacity:
+            # Писатель обогнал читателя на круг — догоняем
+            skipped = write_pos - read_pos - self.capacity
+            self._header[_LOST] += skipped
+            read_pos += skipped
+        n = min(max_samples, write_pos - read_pos)
+        if n <= 0:
+            return self._data[:0]
+        start = read_pos % self.capacity
+        n = min(n, self.capacity - start)
+        self._header[_READ_POS] = read_pos + n
+        return self._data[start:start + n]
+
+    def skip_to_end(self):
+        """Отбросить всё непрочитанное"""
+        self._header[_READ_POS] = self.write_pos
+
+    def close(self):
+        # Представления numpy держат буфер — их нужно отпустить до закрытия
+        self._header = None
+        self._data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,340 @@
+"""
+Запись сессий захвата для воспроизводимых прогонов без микрофона
+
+Сессия — каталог из четырёх файлов:
+    audio.pcm     — PCM16 mono подряд; пишется через np.memmap, файл
+                    растёт шагами по grow_seconds и обрезается при закрытии
+    blocks.bin    — индекс блоков захвата: на каждый блок запись
+                    BLOCK_DTYPE (время от начала, первый отсчёт, длина) — 20 байт
+    events.jsonl  — события конвейера с временем и позицией в звуке
+    meta.json     — частота, длительность, число блоков (пишется при закрытии)
+
+Запись на диск (рост memmap, индекс блоков) идёт в отдельном потоке:
+аудио-callback только копирует блок в очередь.
+
+Границы и моменты прихода блоков сохраняются точно, поэтому
+ReplayAudioInput (audio.input) отдаёт звук теми же блоками и с тем же
+темпом, что и микрофон, — или быстрее с заданным множителем.
+
+Пример:
+    python -m audio.session record recordings/sessions/kitchen --seconds 60
+    python -m audio.session info recordings/sessions/kitchen
+    python -m audio.session bench recordings/sessions/kitchen --speed 0 --model models/stt/vosk-model-small-ru-0.22
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.flight import event_fields, subscribe_pipeline_events
+from core.logger import log
+
+AUDIO_FILE = "audio.pcm"
+BLOCKS_FILE = "blocks.bin"
+EVENTS_FILE = "events.jsonl"
+META_FILE = "meta.json"
+
+BLOCK_DTYPE = np.dtype([("time", "<f8"), ("start", "<i8"), ("samples", "<i4")])
+
+
+class SessionRecorder:
+    """
+    Дозапись захваченного звука, индекса блоков и событий в каталог сессии
+
+    write() вызывается из аудио-callback и не трогает файлы: блок
+    копируется в очередь, которую разбирает поток session-writer.
+    """
+
+    def __init__(self, path: str, sample_rate: int = 16000, grow_seconds: float = 300.0):
+        """
+        Args:
+            path: Каталог сессии (создаётся; существующая сессия перезаписывается)
+            sample_rate: Частота записываемых блоков
+            grow_seconds: На сколько секунд звука расширять файл за раз
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self._grow = max(1, int(sample_rate * grow_seconds))
+        os.makedirs(path, exist_ok=True)
+        self._audio_path = os.path.join(path, AUDIO_FILE)
+        with open(self._audio_path, "wb") as f:
+            f.truncate(self._grow * 2)
+        self._pcm = np.memmap(self._audio_path, dtype="<i2", mode="r+", shape=(self._grow,))
+        self._blocks = open(os.path.join(path, BLOCKS_FILE), "wb")
+        self._events = open(os.path.join(path, EVENTS_FILE), "w", encoding="utf-8")
+        self._record = np.zeros(1, dtype=BLOCK_DTYPE)
+        self._events_lock = threading.Lock()
+        self._start = time.monotonic()
+        self.samples = 0  # Принято отсчётов (позиция для событий)
+        self.blocks = 0
+        self.closed = False
+        # Частота известна и у оборванной записи; длина — по индексу блоков
+        self._write_meta({"sample_rate": sample_rate})
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True, name="session-writer")
+        self._writer.start()
+
+    def _write_meta(self, meta: Dict):
+        with open(os.path.join(self.path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    def _extend(self, needed: int):
+        capacity = len(self._pcm) + max(self._grow, needed - len(self._pcm))
+        self._pcm.flush()
+        del self._pcm
+        with open(self._audio_path, "r+b") as f:
+            f.truncate(capacity * 2)
+        self._pcm = np.memmap(self._audio_path, dtype="<i2", mode="r+", shape=(capacity,))
+
+    def write(self, samples: np.ndarray, timestamp: Optional[float] = None):
+        """
+        Принять блок захвата (из аудио-callback; один писатель)
+
+        Args:
+            samples: PCM16 mono
+            timestamp: Момент прихода блока по time.monotonic() (None — сейчас)
+        """
+        if self.closed:
+            return
+        moment = (time.monotonic() if timestamp is None else timestamp) - self._start
+        # Копия: буфер callback переиспользуется после возврата
+        block = np.array(samples, dtype="<i2").reshape(-1)
+        self._queue.put((moment, self.samples, block))
+        self.samples += len(block)
+        self.blocks += 1
+
+    def _write_loop(self):
+        record = self._record[0]
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            moment, start, block = item
+            end = start + len(block)
+            try:
+                if end > len(self._pcm):
+                    self._extend(end)
+                self._pcm[start:end] = block
+                record["time"] = moment
+                record["start"] = start
+                record["samples"] = len(block)
+                self._blocks.write(self._record.tobytes())
+            except OSError as e:
+                log.error("session", "write failed", path=self.path, error=str(e))
+
+    def note(self, kind: str, **fields):
+        """Записать событие конвейера"""
+        if self.closed:
+            return
+        entry = {"type": kind, "time": round(time.monotonic() - self._start, 4),
+                 "position": self.samples, **fields}
+        with self._events_lock:
+            self._events.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def _on_event(self, event):
+        self.note(type(event).__name__, **event_fields(event))
+
+    def attach(self, bus) -> List:
+        """Записывать события шины (возвращает подписки)"""
+        return subscribe_pipeline_events(bus, self._on_event)
+
+    def close(self):
+        """Дождаться записи очереди, обрезать звук и сохранить meta.json (после остановки захвата)"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._pcm.flush()
+        del self._pcm
+        with open(self._audio_path, "r+b") as f:
+            f.truncate(self.samples * 2)
+        self._blocks.close()
+        with self._events_lock:
+            self._events.close()
+        meta = {"sample_rate": self.sample_rate, "samples": self.samples, "blocks": self.blocks,
+                "duration": round(self.samples / self.sample_rate, 3),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self._write_meta(meta)
+        log.info("session", "recording closed", path=self.path, seconds=meta["duration"],
+                 blocks=self.blocks)
+
+
+@dataclass
+class Session:
+    """Записанная сессия (звук отображён в память, не читается целиком)"""
+    path: str
+    sample_rate: int
+    audio: np.ndarray
+    blocks: np.ndarray
+    events: List[Dict] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sample_rate
+
+    @classmethod
+    def open(cls, path: str) -> "Session":
+        """
+        Открыть каталог сессии
+
+        Если запись оборвалась (в meta.json нет samples), длина звука берётся
+        по индексу блоков.
+
+        Raises:
+            FileNotFoundError: нет audio.pcm или blocks.bin
+        """
+        meta_path = os.path.join(path, META_FILE)
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        blocks = np.fromfile(os.path.join(path, BLOCKS_FILE), dtype=BLOCK_DTYPE)
+        samples = meta.get("samples")
+        if samples is None:
+            samples = int(blocks["start"][-1] + blocks["samples"][-1]) if len(blocks) else 0
+        audio_path = os.path.join(path, AUDIO_FILE)
+        samples = min(samples, os.path.getsize(audio_path) // 2)
+        blocks = blocks[blocks["start"] + blocks["samples"] <= samples]
+        audio = (np.memmap(audio_path, dtype="<i2", mode="r", shape=(samples,))
+                 if samples else np.zeros(0, dtype=np.int16))
+        events = []
+        events_path = os.path.join(path, EVENTS_FILE)
+        if os.path.exists(events_path):
+            with open(events_path, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        return cls(path, meta.get("sample_rate", 16000), audio, blocks, events)
+
+    def block(self, i: int) -> np.ndarray:
+        record = self.blocks[i]
+        return self.audio[record["start"]:record["start"] + record["samples"]]
+
+    def info(self) -> Dict:
+        sizes = self.blocks["samples"]
+        gaps = np.diff(self.blocks["time"]) if len(self.blocks) > 1 else np.zeros(1)
+        return {"path": self.path, "sample_rate": self.sample_rate,
+                "duration": round(self.duration, 3), "blocks": len(self.blocks),
+                "block_ms": round(float(np.median(sizes)) * 1000 / self.sample_rate, 1) if len(sizes) else 0,
+                "max_gap_ms": round(float(gaps.max()) * 1000, 1), "events": len(self.events)}
+
+
+def bench(session: Session, recognizer, speed: float = 1.0, feed_ms: float = 100) -> Dict:
+    """
+    Прогнать сессию через распознаватель в темпе записи
+
+    Задержка фразы — от момента, когда по расписанию воспроизведения
+    должен был прийти блок с концом последнего слова, до возврата Result()
+    (если распознаватель не успевает за темпом, отставание входит в задержку).
+
+    Args:
+        speed: Множитель темпа (0 — без пауз, только пропускная способность)
+        feed_ms: Порция распознавателя
+
+    Returns:
+        Пропускная способность (секунд звука в секунду), задержки фраз
+    """
+    from audio.chunking import Rechunker, block_samples
+    from audio.input import ReplayAudioInput
+
+    rate = session.sample_rate
+    rechunker = Rechunker(block_samples(rate, feed_ms))
+    arrivals: List[float] = []  # Момент прихода каждого блока (perf_counter)
+    ends = np.cumsum(session.blocks["samples"]) / rate if len(session.blocks) else np.zeros(0)
+    latencies = []
+    utterances = []
+    source = ReplayAudioInput(session, speed=speed)
+    start = time.perf_counter()
+    for due, data in source.timed_blocks():
+        arrivals.append(due)
+        for chunk in rechunker.push(data.reshape(-1)):
+            if not recognizer.AcceptWaveform(chunk):
+                continue
+            result = json.loads(recognizer.Result())
+            if not result.get("text"):
+                continue
+            utterances.append(result["text"])
+            words = result.get("result")
+            if words and speed:
+                i = min(int(np.searchsorted(ends, words[-1]["end"])), len(arrivals) - 1)
+                latencies.append(time.perf_counter() - arrivals[i])
+    text = json.loads(recognizer.FinalResult()).get("text", "")
+    if text:
+        utterances.append(text)
+    wall = time.perf_counter() - start
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {"speed": speed, "audio_s": round(session.duration, 2), "wall_s": round(wall, 3),
+            "throughput": round(session.duration / wall, 2) if wall else 0.0,
+            "utterances": len(utterances),
+            "latency_p50_ms": round(float(np.percentile(ms, 50)), 1) if latencies else None,
+            "latency_p95_ms": round(float(np.percentile(ms, 95)), 1) if latencies else None,
+            "late_ms_max": round(source.stats()["late_ms_max"], 2), "texts": utterances}
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Запись и прогон сессий захвата")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Записать сессию с микрофона")
+    rec.add_argument("path")
+    rec.add_argument("--seconds", type=float, default=30.0)
+    rec.add_argument("--device", default=None)
+    rec.add_argument("--block-ms", type=float, default=100)
+    info = sub.add_parser("info", help="Сведения о сессии")
+    info.add_argument("path")
+    run = sub.add_parser("bench", help="Прогнать сессию через распознаватель")
+    run.add_argument("path")
+    run.add_argument("--speed", type=float, default=1.0, help="Множитель темпа (0 — без пауз)")
+    run.add_argument("--feed-ms", type=float, default=100)
+    run.add_argument("--model", help="Модель Vosk")
+    run.add_argument("--fake", action="store_true", help="Имитация распознавателя без модели")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        from audio.input import WindowsAudioInput
+
+        recorder = SessionRecorder(args.path)
+        stream, _ = WindowsAudioInput().record_async(
+            device=args.device, callback=recorder.write, block_ms=args.block_ms)
+        print(f"[Сессия] Запись {args.seconds} с в {args.path}...")
+        try:
+            time.sleep(args.seconds)
+        except KeyboardInterrupt:
+            pass
+        stream.stop()
+        stream.close()
+        recorder.close()
+        print(json.dumps(Session.open(args.path).info(), ensure_ascii=False))
+        return 0
+
+    session = Session.open(args.path)
+    if args.command == "info":
+        print(json.dumps(session.info(), ensure_ascii=False, indent=2))
+        return 0
+
+    if args.fake or not args.model:
+        from audio.chunking import EnergyRecognizer
+
+        recognizer = EnergyRecognizer(session.sample_rate)
+    else:
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+
+        SetLogLevel(-1)
+        recognizer = KaldiRecognizer(Model(args.model), session.sample_rate)
+        recognizer.SetWords(True)
+    result = bench(session, recognizer, speed=args.speed, feed_ms=args.feed_ms)
+    texts = result.pop("texts")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    for text in texts:
+        print(f"  {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,63 +1,157 @@
 import re
 import json
-import pyttsx3
-from typing import Callable, Dict
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from core.executor import executor
+from core.flight import flight
+from core.logger import log
+from core.normalize import normalizer
+from media.base import MediaBackend, create_backend
+from stt.grammar import parse_number
+from transport.events import ErrorEvent, IntentMatched, TTSFinished, TTSStarted, bus
+
+if TYPE_CHECKING:
+    from core.router import IntentRouter
 
 class CommandHandler:
-    def __init__(self, config_path: str = "commands.json"):
-        self.engine = pyttsx3.init()
+    def __init__(self, config_path: str = "commands.json", tts_options: Optional[Dict] = None):
+        # Движок TTS создаётся при первом обращении (или заранее через warmup)
+        # в потоке, который будет говорить
+        self._engine = None
+        self.tts_options = tts_options or {}
+        self._engine_lock = threading.Lock()
+        # Плеер подключается при первой музыкальной команде
+        self._media: Optional[MediaBackend] = None
+        self.config_path = config_path
         self.commands: Dict = {}
+        # Нечёткий поиск, если ни одно регулярное выражение не сработало
+        self.router: Optional["IntentRouter"] = None
         # Маппинг ключей из JSON к методам класса
         self.action_map: Dict[str, Callable] = {
             "greeting": lambda text: self.speak("Привет! Чем могу помочь?"),
-            "farewell": lambda text: (self.speak("До свидания!"), exit()),
+            "farewell": self._farewell,
             "get_time": self._get_time,
             "get_date": self._get_date,
-            "music_play": lambda text: self.speak("Включаю музыку"),
-            "music_pause": lambda text: self.speak("Музыка на паузе"),
-            "music_next": lambda text: self.speak("Переключаю вперед"),
-            "music_prev": lambda text: self.speak("Возвращаю назад"),
+            "music_play": self._music_play,
+            "music_pause": self._music_pause,
+            "music_next": self._music_next,
+            "music_prev": self._music_prev,
             "music_volume": self._control_volume,
-            "help": self._show_help
+            "now_playing": self._now_playing,
+            "help": self._show_help,
+            "report_problem": self._report_problem
         }
         self._load_commands(config_path)
 
     def _load_commands(self, path: str):
-        """Загрузка фраз из JSON и компиляция в регулярные выражения"""
+        """Загрузка фраз из JSON, нормализация и компиляция в регулярные выражения"""
+        # Роутер держит NumPy на уровне модуля: импорт при загрузке каталога, не при старте
+        from core.router import IntentRouter
+
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
+                phrases = {}
+                standalone = set()
                 for action_key, info in data.items():
                     if action_key in self.action_map:
-                        # Объединяем синонимы через ИЛИ
-                        pattern = "|".join(info['patterns'])
+                        # Фразы приводятся к нормальной форме один раз; синонимы объединяем через ИЛИ
+                        normalized = normalizer.phrases(info['patterns'])
+                        alternatives = "(?:" + "|".join(map(re.escape, normalized)) + ")"
+                        if info.get('standalone'):
+                            # Фраза — всё высказывание: «пока», «пока пока», но не «пока не надо»
+                            pattern = rf"^{alternatives}(?: {alternatives})*$"
+                            standalone.add(action_key)
+                        else:
+                            pattern = rf"(?<!\w){alternatives}(?!\w)"
                         self.commands[pattern] = {
+                            'action': action_key,
                             'handler': self.action_map[action_key],
                             'description': info.get('description', '')
                         }
+                        phrases[action_key] = normalized
+                self.router = IntentRouter(phrases, standalone=standalone)
         except Exception as e:
             print(f"[Ошибка загрузки JSON]: {e}")
 
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    import pyttsx3
+                    engine = pyttsx3.init()
+                    if self.tts_options.get("rate"):
+                        engine.setProperty('rate', self.tts_options["rate"])
+                    if self.tts_options.get("volume") is not None:
+                        engine.setProperty('volume', self.tts_options["volume"])
+                    if self.tts_options.get("voice"):
+                        engine.setProperty('voice', self.tts_options["voice"])
+                    self._engine = engine
+        return self._engine
+
+    @property
+    def media(self) -> MediaBackend:
+        if self._media is None:
+            with self._engine_lock:
+                if self._media is None:
+                    self._media = create_backend()
+        return self._media
+
+    def preload(self):
+        """
+        Импортировать pyttsx3 заранее (можно в фоновом потоке)
+
+        Сам движок так создавать нельзя: SAPI (COM) и NSSpeechSynthesizer
+        привязаны к потоку, в котором созданы.
+        """
+        import pyttsx3
+
+        return pyttsx3
+
+    def warmup(self):
+        """Создать движок TTS заранее — в том же потоке, из которого будет вызываться speak()"""
+        return self.engine
+
     def speak(self, text: str):
+        from audio.output import playback
+
         print(f"[Ассистент]: {text}")
-        self.engine.say(text)
-        self.engine.runAndWait()
+        bus.publish(TTSStarted(source="commands", text=text))
+        start = time.monotonic()
+        # Захват гасит микрофон, пока ассистент говорит. Эталона у pyttsx3 нет
+        # (звук выводит движок ОС), поэтому перебить его голосом нельзя
+        with playback.playing():
+            self.engine.say(text)
+            self.engine.runAndWait()
+        bus.publish(TTSFinished(source="commands", text=text, duration=time.monotonic() - start))
     
+    def _farewell(self, text: str):
+        # Завершение решает вызывающий по результату dispatch() == "farewell":
+        # обработчик выполняется и в демоне, где выход из процесса недопустим
+        self.speak("До свидания!")
+
     def _music_play(self, text: str):
-        self.speak("Запускаю")
-        os.system("playerctl play") # Или ваша команда, например: mocp -p
+        self.media.play()
+        self.speak("Включаю музыку")
 
     def _music_pause(self, text: str):
-        self.speak("Ставлю на паузу")
-        os.system("playerctl pause") # Или ваша command, например: mocp -s
+        self.media.pause()
+        self.speak("Музыка на паузе")
 
     def _music_next(self, text: str):
-        self.speak("Следующий трек")
-        os.system("playerctl next") # Или: mocp -f
+        self.media.next()
+        self.speak("Переключаю вперед")
 
     def _music_prev(self, text: str):
-        self.speak("Предыдущий трек")
-        os.system("playerctl previous") # Или: mocp -r
+        self.media.previous()
+        self.speak("Возвращаю назад")
+
+    def _now_playing(self, text: str):
+        # Ответ из кэша бэкенда, без запроса к плееру
+        self.speak(self.media.now_playing())
 
     def _get_time(self, text: str):
         from datetime import datetime
@@ -75,20 +169,20 @@ class CommandHandler:
             self.speak("Выключаю свет")
             
     def _control_volume(self, text: str):
-        """Управление громкостью через amixer (Unix)"""
+        """Управление громкостью через медиа-бэкенд"""
         numbers = re.findall(r'\d+', text)
-        if numbers:
-            level = int(numbers[0])
-            if 0 <= level <= 100:
-                os.system(f"amixer set Master {level}%")
-                self.speak(f"Громкость {level} процентов")
-                return
+        # Грамматика команд выдаёт числа словами: «громкость пятьдесят»
+        level = int(numbers[0]) if numbers else parse_number(text)
+        if level is not None and 0 <= level <= 100:
+            self.media.set_volume(level)
+            self.speak(f"Громкость {level} процентов")
+            return
 
         if "громче" in text or "больше" in text:
-            os.system("amixer set Master 10%+")
+            self.media.change_volume(10)
             self.speak("Прибавила громкость")
         elif "тише" in text or "меньше" in text:
-            os.system("amixer set Master 10%-")
+            self.media.change_volume(-10)
             self.speak("Убавила громкость")
         else:
             self.speak("Не поняла уровень громкости")
@@ -97,23 +191,82 @@ class CommandHandler:
         descriptions = [cmd['description'] for cmd in self.commands.values() if cmd['description']]
         self.speak("Я умею: " + ", ".join(descriptions))
 
-    def execute(self, text: str) -> bool:
-        text_lower = text.lower()
+    def _report_problem(self, text: str):
+        # Запись последних секунд с событиями — для разбора ошибки распознавания
+        if flight.dump("manual", force=True, text=text):
+            self.speak("Сохранила запись, разберёмся")
+        else:
+            self.speak("Записывать пока нечего")
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        Интент для текста без выполнения обработчика
+
+        Returns:
+            Ключ действия или None
+        """
+        normalized = normalizer.text(text)
+        # Побеждает самая длинная фраза: «что сейчас играет», а не «играй»
+        best, best_len = None, 0
         for pattern, cmd_info in self.commands.items():
-            if re.search(pattern, text_lower):
-                try:
-                    cmd_info['handler'](text)
-                    return True
-                except Exception as e:
-                    print(f"[Ошибка]: {e}")
-                    return False
-        return False
-
-# Инициализация
-_handler = CommandHandler()
+            found = re.search(pattern, normalized)
+            if found and len(found.group()) > best_len:
+                best, best_len = cmd_info['action'], len(found.group())
+        if best is not None:
+            return best
+        if self.router is not None:
+            match = self.router.match(normalized)
+            if match is not None:
+                log.info("commands", "fuzzy match", text=text, phrase=match.phrase,
+                         intent=match.intent, distance=match.distance)
+                return match.intent
+        return None
+
+    def dispatch(self, text: str) -> Optional[str]:
+        """
+        Найти интент и выполнить его обработчик
+
+        Returns:
+            Ключ выполненного действия или None (интент не найден или
+            обработчик завершился ошибкой)
+        """
+        action = self.match(text)
+        if action is None or not self._run(action, self.action_map[action], text):
+            return None
+        return action
+
+    def execute(self, text: str) -> bool:
+        return self.dispatch(text) is not None
+
+    def _run(self, action: str, handler: Callable, text: str) -> bool:
+        # Интент публикуется до обработчика: его речь (TTSStarted/TTSFinished)
+        # и ошибки идут на шине после него
+        bus.publish(IntentMatched(source="commands", intent=action, text=text))
+        # Сам обработчик выполняется в потоке диалога: речь pyttsx3 и
+        # команды MPD синхронны и должны закончиться до следующего
+        # прослушивания; в executor уходят только внешние программы
+        start = time.perf_counter()
+        try:
+            handler(text)
+            executor.record(f"handler:{action}", time.perf_counter() - start)
+            return True
+        except Exception as e:
+            print(f"[Ошибка]: {e}")
+            executor.record(f"handler:{action}", time.perf_counter() - start, ok=False)
+            bus.publish(ErrorEvent(source="commands", component=f"handler:{action}", message=str(e)))
+            return False
+
+# Обработчик создаётся при первом использовании, а не при импорте
+_handler = None
+
+def _get_handler() -> CommandHandler:
+    global _handler
+    if _handler is None:
+        _handler = CommandHandler()
+    return _handler
 
 def execute_command(text: str) -> bool:
-    return _handler.execute(text)
+    return _get_handler().execute(text)
 
 def speak(text: str):
-    _handler.speak(text)
\ No newline at end of file
+    _get_handler().speak(text)
\ No newline at end of file
@@ -3,19 +3,30 @@
 """
 import re
 from typing import Optional, Callable
-import pyttsx3
+
 
 class CommandHandler:
     def __init__(self):
-        self.engine = pyttsx3.init()
+        self._engine = None
         self.commands = {}
         self._register_default_commands()
+
+    @property
+    def engine(self):
+        """Движок pyttsx3 инициализируется при первом озвучивании"""
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+        return self._engine
     
     def speak(self, text: str):
         """Озвучивание текста"""
         print(f"[Ассистент]: {text}")
-        self.engine.say(text)
-        self.engine.runAndWait()
+        from audio.output import playback
+
+        with playback.playing():
+            self.engine.say(text)
+            self.engine.runAndWait()
     
     def register_command(self, pattern: str, handler: Callable, description: str = ""):
         """Регистрация новой команды"""
@@ -208,14 +219,22 @@ class CommandHandler:
         return False
 
 
-# Для обратной совместимости с main.py
-_handler = CommandHandler()
+# Для обратной совместимости с main.py (создаётся при первом вызове)
+_handler = None
+
+
+def _get_handler() -> CommandHandler:
+    global _handler
+    if _handler is None:
+        _handler = CommandHandler()
+    return _handler
+
 
 def execute_command(text: str) -> bool:
     """Функция-обертка для старого кода"""
-    return _handler.execute(text)
+    return _get_handler().execute(text)
 
 
 def speak(text: str):
     """Функция-обертка для озвучивания"""
-    _handler.speak(text)
\ No newline at end of file
+    _get_handler().speak(text)
\ No newline at end of file
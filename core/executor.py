@@ -0,0 +1,195 @@
+"""
+Исполнитель действий команд
+
+Внешние программы (amixer, playerctl, ...) запускаются как асинхронные
+подпроцессы в отдельном потоке с event loop: вызов run() сразу
+возвращает Future, а цикл диалога продолжает слушать. У каждого запуска
+есть таймаут (зависший процесс убивается), общее число одновременных
+процессов ограничено. Время выполнения собирается по именам действий —
+таблица задержек доступна через latency_table().
+
+Обработчики команд (в том числе речь pyttsx3 и команды MPD) сюда не
+уходят — они выполняются в потоке диалога, исполнитель только учитывает
+их время через record().
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+from core.logger import log
+
+
+@dataclass
+class ActionResult:
+    """Итог запуска внешней программы"""
+    name: str
+    argv: List[str]
+    returncode: Optional[int] = None
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0
+    timed_out: bool = False
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.error
+
+
+class CommandExecutor:
+    """Запуск действий вне цикла распознавания"""
+
+    def __init__(self, max_concurrency: int = 4, default_timeout: float = 5.0,
+                 history: int = 256):
+        """
+        Args:
+            max_concurrency: Сколько подпроцессов может работать одновременно
+            default_timeout: Таймаут действия по умолчанию (с)
+            history: Сколько последних замеров хранить на действие
+        """
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self._history = history
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._started = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self._history))
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"runs": 0, "failures": 0, "timeouts": 0})
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            self._thread = threading.Thread(target=self._run_loop, daemon=True, name="executor")
+            self._thread.start()
+            self._started.wait()
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop = loop
+        self._started.set()
+        loop.run_forever()
+        loop.close()
+
+    def run(self, argv: Sequence[str], name: Optional[str] = None,
+            timeout: Optional[float] = None,
+            on_done: Optional[Callable[[ActionResult], None]] = None) -> "Future[ActionResult]":
+        """
+        Запустить программу, не дожидаясь её завершения
+
+        Args:
+            argv: Программа и аргументы (без shell)
+            name: Имя действия для таблицы задержек (по умолчанию argv[0])
+            timeout: Таймаут (с); по истечении процесс убивается
+            on_done: Вызывается с результатом в потоке исполнителя
+
+        Returns:
+            Future с ActionResult
+        """
+        self._ensure_started()
+        argv = [str(a) for a in argv]
+        coro = self._run_process(name or argv[0], argv, timeout or self.default_timeout)
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        if on_done is not None:
+            future.add_done_callback(lambda f: on_done(f.result()))
+        return future
+
+    async def _run_process(self, name: str, argv: List[str], timeout: float) -> ActionResult:
+        result = ActionResult(name=name, argv=argv)
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                    stdin=asyncio.subprocess.DEVNULL)
+                try:
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+                    result.returncode = proc.returncode
+                    result.stdout = stdout.decode("utf-8", "replace").strip()
+                    result.stderr = stderr.decode("utf-8", "replace").strip()
+                except asyncio.TimeoutError:
+                    result.timed_out = True
+                    proc.kill()
+                    await proc.wait()
+                    result.returncode = proc.returncode
+            except (OSError, ValueError) as e:
+                result.error = str(e)
+            result.duration = time.perf_counter() - start
+
+        self.record(name, result.duration, result.ok, result.timed_out)
+        if not result.ok:
+            log.warning("executor", "action failed", action=name, argv=" ".join(argv),
+                        returncode=result.returncode, timed_out=result.timed_out,
+                        error=result.error or result.stderr[:200])
+        return result
+
+    def record(self, name: str, seconds: float, ok: bool = True, timed_out: bool = False):
+        """Учесть замер (в том числе для обработчиков, выполняемых в Python)"""
+        with self._stats_lock:
+            self._durations[name].append(seconds)
+            counts = self._counts[name]
+            counts["runs"] += 1
+            counts["failures"] += 0 if ok else 1
+            counts["timeouts"] += 1 if timed_out else 0
+
+    def stats(self) -> List[Dict]:
+        """Задержки по действиям"""
+        import numpy as np
+
+        with self._stats_lock:
+            items = [(name, list(d), dict(self._counts[name])) for name, d in self._durations.items()]
+        rows = []
+        for name, durations, counts in sorted(items):
+            ms = np.array(durations) * 1000
+            rows.append(dict(counts, action=name,
+                             p50_ms=round(float(np.percentile(ms, 50)), 1),
+                             p95_ms=round(float(np.percentile(ms, 95)), 1),
+                             max_ms=round(float(ms.max()), 1)))
+        return rows
+
+    def latency_table(self) -> str:
+        """Таблица задержек для вывода в консоль"""
+        rows = self.stats()
+        if not rows:
+            return "[Действия] Замеров пока нет"
+        width = max(len(r["action"]) for r in rows) + 2
+        lines = [f"{'действие':<{width}}{'запусков':>9}{'ошибок':>8}{'таймаутов':>10}"
+                 f"{'p50 мс':>9}{'p95 мс':>9}{'max мс':>9}"]
+        for r in rows:
+            lines.append(f"{r['action']:<{width}}{r['runs']:>9}{r['failures']:>8}{r['timeouts']:>10}"
+                         f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['max_ms']:>9}")
+        return "\n".join(lines)
+
+    def shutdown(self, wait: float = 2.0):
+        """Остановить цикл (незавершённые процессы дожидаются до wait секунд)"""
+        loop = self._loop
+        if loop is None:
+            return
+
+        async def drain():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if tasks:
+                await asyncio.wait(tasks, timeout=wait)
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), loop).result(wait + 1)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=1)
+        self._loop = None
+
+
+# Общий исполнитель процесса
+executor = CommandExecutor()
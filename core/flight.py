@@ -0,0 +1,326 @@
+"""
+Бортовой самописец: последние секунды звука и событий конвейера
+
+Всегда включён и занимает постоянную память: кольцо PCM16 на seconds
+секунд и кольцо последних событий (шина событий + заметки note()).
+Запись блока — одно копирование в заранее выделенный массив (он
+выделяется при первой записи: импорт модуля не тянет NumPy).
+
+По триггеру (команда не распознана, таймаут, ручная команда) dump()
+снимает копию кольца и в фоне пишет на диск пару файлов:
+    <время>_<причина>.wav    — звук (PCM16 mono)
+    <время>_<причина>.jsonl  — заголовок и события со смещением в секундах
+                               от начала звука (у событий старше звука
+                               смещение отрицательное)
+
+Повтор через распознаватель и сопоставление с командами:
+    python -m core.flight recordings/flight/20240101-120000.000_no-intent.wav \\
+        --model models/stt/vosk-model-small-ru-0.22
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from collections import deque
+from dataclasses import asdict, is_dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from core.logger import log
+
+if TYPE_CHECKING:
+    # Самописец импортируется при старте; NumPy — при первой записи и выгрузке
+    import numpy as np
+
+
+def event_fields(event) -> Dict:
+    """Поля события для записи (без метки времени — её ставит записывающий)"""
+    fields = asdict(event) if is_dataclass(event) else {}
+    fields.pop("timestamp", None)
+    return fields
+
+
+def subscribe_pipeline_events(bus, handler):
+    """
+    Подписать handler (inline) на события конвейера, которые стоит записывать
+
+    PartialTranscript не записывается: подписка на него заставила бы
+    распознаватель разбирать частичный результат на каждом блоке.
+
+    Returns:
+        Подписки (для bus.unsubscribe)
+    """
+    from transport.events import (ErrorEvent, FinalTranscript, IntentMatched,
+                                  TTSFinished, TTSStarted, WakeDetected)
+
+    return [bus.subscribe(event_type, handler, inline=True)
+            for event_type in (WakeDetected, FinalTranscript, IntentMatched, TTSStarted,
+                               TTSFinished, ErrorEvent)]
+
+
+class FlightRecorder:
+    """Кольцо звука и событий с выгрузкой по триггеру"""
+
+    def __init__(self, sample_rate: int = 16000, seconds: float = 30.0, events: int = 512,
+                 directory: str = os.path.join("recordings", "flight"),
+                 min_interval: float = 10.0, keep: int = 50):
+        """
+        Args:
+            sample_rate: Частота записываемых блоков
+            seconds: Сколько последних секунд звука хранить
+            events: Сколько последних событий хранить
+            directory: Куда писать выгрузки
+            min_interval: Не чаще одной выгрузки с той же причиной за столько секунд
+            keep: Сколько последних выгрузок оставлять на диске
+        """
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.min_interval = min_interval
+        self.keep = keep
+        self._capacity = int(sample_rate * seconds)
+        self._pcm = None  # Выделяется при первой записи
+        self._written = 0  # Всего отсчётов с начала работы
+        self._events: deque = deque(maxlen=events)
+        self._last_dump: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Кольцо звука: запись из callback и копирование в snapshot() не должны
+        # пересекаться (держится на время одного копирования)
+        self._pcm_lock = threading.Lock()
+        self.dumps = 0
+
+    def configure(self, sample_rate: Optional[int] = None, seconds: Optional[float] = None,
+                  directory: Optional[str] = None, min_interval: Optional[float] = None):
+        """Изменить параметры до начала записи (кольцо выделяется заново)"""
+        seconds = seconds or self.seconds
+        self.sample_rate = sample_rate or self.sample_rate
+        self.directory = directory or self.directory
+        if min_interval is not None:
+            self.min_interval = min_interval
+        size = int(self.sample_rate * seconds)
+        if size != self._capacity:
+            with self._pcm_lock:
+                self._capacity = size
+                self._pcm = None
+                self._written = 0
+
+    @property
+    def seconds(self) -> float:
+        return self._capacity / self.sample_rate
+
+    def _allocate(self) -> "np.ndarray":
+        import numpy as np
+
+        self._pcm = np.zeros(self._capacity, dtype=np.int16)
+        return self._pcm
+
+    def write(self, samples: "np.ndarray"):
+        """Добавить блок (из аудио-callback; один писатель)"""
+        n = len(samples)
+        with self._pcm_lock:
+            pcm = self._pcm if self._pcm is not None else self._allocate()
+            size = len(pcm)
+            if n >= size:
+                # Последние size отсчётов кладём так, чтобы отсчёт k лежал в k % size
+                self._written += n
+                pos = self._written % size
+                tail = samples[-size:]
+                pcm[pos:] = tail[:size - pos]
+                pcm[:pos] = tail[size - pos:]
+                return
+            pos = self._written % size
+            first = min(n, size - pos)
+            pcm[pos:pos + first] = samples[:first]
+            if first < n:
+                pcm[:n - first] = samples[first:]
+            self._written += n
+
+    def note(self, kind: str, **fields):
+        """Добавить событие конвейера, которого нет на шине"""
+        self._events.append((time.monotonic(), self._written, kind, fields))
+
+    def _on_event(self, event):
+        self._events.append((time.monotonic(), self._written, type(event).__name__,
+                             event_fields(event)))
+
+    def attach(self, bus) -> List:
+        """Записывать события шины (возвращает подписки)"""
+        return subscribe_pipeline_events(bus, self._on_event)
+
+    def snapshot(self) -> Tuple["np.ndarray", int, List[Tuple]]:
+        """
+        Копия содержимого колец
+
+        Звук копируется под блокировкой записи: иначе блок, пришедший во
+        время копирования, перезаписал бы начало ещё не скопированного кольца.
+
+        Returns:
+            (звук по порядку, номер первого отсчёта, события)
+        """
+        import numpy as np
+
+        with self._pcm_lock:
+            written = self._written
+            pcm = self._pcm
+            events = list(self._events)
+            if pcm is None:
+                return np.zeros(0, dtype=np.int16), 0, events
+            size = len(pcm)
+            if written <= size:
+                return pcm[:written].copy(), 0, events
+            pos = written % size
+            audio = np.concatenate((pcm[pos:], pcm[:pos]))
+        return audio, written - size, events
+
+    def dump(self, reason: str, force: bool = False, **fields) -> Optional[str]:
+        """
+        Выгрузить кольцо на диск (запись — в фоновом потоке)
+
+        Args:
+            reason: Причина (попадёт в имя файла)
+            force: Игнорировать ограничение частоты
+            fields: Дополнительные поля заголовка (например, текст команды)
+
+        Returns:
+            Путь к WAV или None, если выгрузка пропущена
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_dump.get(reason, -self.min_interval) < self.min_interval:
+                return None
+            self._last_dump[reason] = now
+        audio, start, events = self.snapshot()
+        if not len(audio):
+            return None
+        wall = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(wall)) + f".{int(wall * 1000) % 1000:03d}"
+        base = os.path.join(self.directory, f"{stamp}_{reason}")
+        header = {"type": "header", "reason": reason, "sample_rate": self.sample_rate,
+                  "samples": len(audio), "start_sample": start, "wall_time": wall, **fields}
+        threading.Thread(target=self._write, args=(base, audio, start, header, events),
+                         daemon=True, name="flight-dump").start()
+        self.dumps += 1
+        return base + ".wav"
+
+    def _write(self, base: str, audio: "np.ndarray", start: int, header: Dict, events: List[Tuple]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with wave.open(base + ".wav", "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(self.sample_rate)
+                wf.writeframes(audio.astype("<i2").tobytes())
+            with open(base + ".jsonl", "w", encoding="utf-8") as f:
+                f.write(json.dumps(header, ensure_ascii=False) + "\n")
+                for _, position, kind, fields in events:
+                    record = {"type": kind, "offset": round((position - start) / self.sample_rate, 3),
+                              **fields}
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            log.info("flight", "dump written", path=base + ".wav", reason=header["reason"])
+            self._prune()
+        except OSError as e:
+            log.error("flight", "dump failed", path=base, error=str(e))
+
+    def _prune(self):
+        dumps = sorted(f for f in os.listdir(self.directory) if f.endswith(".wav"))
+        for name in dumps[:-self.keep] if self.keep else []:
+            for ext in (".wav", ".jsonl"):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-4] + ext))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        return {"seconds": self.seconds, "buffered_seconds": round(min(self._written, self._capacity) / self.sample_rate, 1),
+                "events": len(self._events), "dumps": self.dumps}
+
+
+def load_dump(path: str) -> Tuple["np.ndarray", Dict, List[Dict]]:
+    """
+    Прочитать выгрузку
+
+    Args:
+        path: Путь к .wav (рядом должен лежать .jsonl)
+
+    Returns:
+        (звук, заголовок, события)
+    """
+    import numpy as np
+
+    with wave.open(path, "rb") as wf:
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+        rate = wf.getframerate()
+    header, events = {"sample_rate": rate}, []
+    meta = os.path.splitext(path)[0] + ".jsonl"
+    if os.path.exists(meta):
+        with open(meta, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if records and records[0].get("type") == "header":
+            header = records.pop(0)
+        events = records
+    return audio, header, events
+
+
+def replay(path: str, recognizer, block_ms: int = 100) -> Iterator[Dict]:
+    """
+    Прогнать выгрузку через распознаватель в исходном темпе событий
+
+    Args:
+        path: Путь к .wav выгрузки
+        recognizer: Объект с интерфейсом KaldiRecognizer
+
+    Yields:
+        Записанные события и результаты повторного распознавания
+        ({"type": "replay", "offset": ..., "text": ...}) в порядке времени
+    """
+    audio, header, events = load_dump(path)
+    rate = header.get("sample_rate", 16000)
+    block = rate * block_ms // 1000
+    pending = deque(events)
+    for i in range(0, len(audio), block):
+        offset = (i + block) / rate
+        while pending and pending[0].get("offset", 0) <= offset:
+            yield pending.popleft()
+        if recognizer.AcceptWaveform(audio[i:i + block].tobytes()):
+            text = json.loads(recognizer.Result()).get("text", "")
+            if text:
+                yield {"type": "replay", "offset": round(offset, 3), "text": text}
+    text = json.loads(recognizer.FinalResult()).get("text", "")
+    if text:
+        yield {"type": "replay", "offset": round(len(audio) / rate, 3), "text": text}
+    yield from pending
+
+
+# Общий самописец процесса
+flight = FlightRecorder()
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Повтор выгрузки бортового самописца")
+    parser.add_argument("dump", help="Путь к .wav выгрузки")
+    parser.add_argument("--model", default="models/stt/vosk-model-small-ru-0.22", help="Модель Vosk")
+    args = parser.parse_args(argv)
+
+    from vosk import KaldiRecognizer, Model, SetLogLevel
+
+    from commands import CommandHandler
+
+    SetLogLevel(-1)
+    _, header, _ = load_dump(args.dump)
+    recognizer = KaldiRecognizer(Model(args.model), header.get("sample_rate", 16000))
+    handler = CommandHandler()
+    print(f"[Самописец] {args.dump}: причина {header.get('reason', '?')}")
+    for record in replay(args.dump, recognizer):
+        if record["type"] == "replay":
+            intent = handler.match(record["text"])
+            print(f"  {record['offset']:>7.2f} с  повтор: {record['text']!r} -> {intent or 'нет интента'}")
+        else:
+            fields = {k: v for k, v in record.items() if k not in ("type", "offset", "source")}
+            print(f"  {record.get('offset', 0):>7.2f} с  {record['type']}: {fields}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
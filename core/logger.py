@@ -0,0 +1,289 @@
+"""
+Неблокирующее структурированное логирование
+
+Вызов log.info()/warning()/... только кладёт запись в заранее выделенное
+кольцо — без форматирования и ввода-вывода, поэтому его можно делать
+прямо из аудио-callback PortAudio. Фоновый поток (запускается при
+создании логгера) пачками форматирует записи в JSON lines (или короткий
+текст для консоли) и пишет их; flush() тоже выполняется этим потоком.
+
+Повторяющиеся сообщения ограничиваются по частоте (на пару компонент +
+сообщение), подавленные повторы учитываются в следующей записи. При
+переполнении кольца новые записи отбрасываются и считаются в dropped.
+
+Пример:
+    from core.logger import log
+
+    log.warning("audio", "input overflow", frames=frames)
+"""
+import atexit
+import json
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO, Tuple
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+
+class StructuredLogger:
+    """Логгер с кольцевым буфером и фоновым писателем"""
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 stream: Optional[TextIO] = None,
+                 json_lines: bool = True,
+                 level: int = INFO,
+                 capacity: int = 4096,
+                 flush_interval: float = 0.2,
+                 rate_burst: int = 5,
+                 rate_window: float = 1.0,
+                 start: bool = True):
+        """
+        Args:
+            path: Файл для JSON lines (дописывается); иначе stream
+            stream: Поток вывода (по умолчанию stderr)
+            json_lines: JSON lines или текст «[компонент] сообщение»
+            level: Минимальный уровень записи
+            capacity: Размер кольца записей
+            flush_interval: Как часто писатель сбрасывает накопленное (с)
+            rate_burst: Сколько одинаковых сообщений пропускать за окно
+            rate_window: Окно ограничения частоты (с)
+            start: Сразу запустить поток-писатель
+        """
+        self.path = path
+        self.stream = stream
+        self.json_lines = json_lines
+        self.level = level
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.rate_burst = rate_burst
+        self.rate_window = rate_window
+
+        # Кольцо: слоты выделены заранее, запись — присваивание в слот
+        self._ring: List[Optional[Tuple]] = [None] * capacity
+        self._head = 0  # следующая запись для писателя
+        self._tail = 0  # следующий свободный слот
+        self._lock = threading.Lock()
+        # (компонент, сообщение) -> [начало окна, записей в окне, подавлено]
+        self._rates: Dict[Tuple[str, str], List] = {}
+
+        self.dropped = 0
+        self.suppressed = 0
+        self.written = 0
+        self._reported_dropped = 0
+        self._wakeup = threading.Event()
+        self._flush_waiters: List[threading.Event] = []
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._out: Optional[TextIO] = None
+        if start:
+            self.start()
+
+    def debug(self, component: str, msg: str, **fields):
+        self.log(DEBUG, component, msg, fields)
+
+    def info(self, component: str, msg: str, **fields):
+        self.log(INFO, component, msg, fields)
+
+    def warning(self, component: str, msg: str, **fields):
+        self.log(WARNING, component, msg, fields)
+
+    def error(self, component: str, msg: str, **fields):
+        self.log(ERROR, component, msg, fields)
+
+    def log(self, level: int, component: str, msg: str, fields: Optional[Dict] = None):
+        """Поставить запись в очередь. Не пишет и не форматирует."""
+        if level < self.level or self._closed:
+            return
+        now = time.time()
+        with self._lock:
+            repeats = self._rate_check(component, msg, now)
+            if repeats < 0:
+                return
+            if self._tail - self._head >= self.capacity:
+                self.dropped += 1
+                return
+            self._ring[self._tail % self.capacity] = (now, level, component, msg, fields, repeats)
+            self._tail += 1
+            pending = self._tail - self._head
+
+        if pending >= self.capacity // 2:
+            self._wakeup.set()
+
+    def _rate_check(self, component: str, msg: str, now: float) -> int:
+        """-1 — подавить; иначе число подавленных перед этой записью повторов (под _lock)"""
+        key = (component, msg)
+        state = self._rates.get(key)
+        if state is None:
+            if len(self._rates) > 1024:
+                self._rates.clear()
+            self._rates[key] = [now, 1, 0]
+            return 0
+        if now - state[0] >= self.rate_window:
+            repeats = state[2]
+            state[0], state[1], state[2] = now, 1, 0
+            return repeats
+        if state[1] >= self.rate_burst:
+            state[2] += 1
+            self.suppressed += 1
+            return -1
+        state[1] += 1
+        return 0
+
+    def start(self):
+        """Запустить поток-писатель (не из аудио-callback)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="logger")
+        self._thread.start()
+
+    def _take(self) -> List[Tuple]:
+        with self._lock:
+            head, tail = self._head, self._tail
+            ring, cap = self._ring, self.capacity
+            batch = [ring[i % cap] for i in range(head, tail)]
+            for i in range(head, tail):
+                ring[i % cap] = None
+            self._head = tail
+        return batch
+
+    def _format(self, record: Tuple) -> str:
+        ts, level, component, msg, fields, repeats = record
+        if self.json_lines:
+            data = {
+                "ts": round(ts, 6),
+                "level": LEVEL_NAMES.get(level, str(level)),
+                "component": component,
+                "msg": msg,
+            }
+            if fields:
+                data.update(fields)
+            if repeats:
+                data["suppressed_repeats"] = repeats
+            return json.dumps(data, ensure_ascii=False, default=str)
+        extra = " ".join(f"{k}={v}" for k, v in fields.items()) if fields else ""
+        line = f"[{component}] {msg}" + (f" {extra}" if extra else "")
+        if repeats:
+            line += f" (ещё {repeats} повторов подавлено)"
+        return line
+
+    def _open(self) -> TextIO:
+        if self._out is None:
+            if self.path:
+                self._out = open(self.path, "a", encoding="utf-8")
+            else:
+                self._out = self.stream or sys.stderr
+        return self._out
+
+    def _write_batch(self):
+        batch = self._take()
+        lines = [self._format(r) for r in batch]
+        if self.dropped != self._reported_dropped:
+            lost = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+            lines.append(self._format((time.time(), WARNING, "logger", "records dropped",
+                                       {"dropped": lost, "dropped_total": self.dropped}, 0)))
+        if not lines:
+            return
+        try:
+            out = self._open()
+            out.write("\n".join(lines) + "\n")
+            out.flush()
+            self.written += len(lines)
+        except (OSError, ValueError):
+            pass  # писать некуда — логирование не должно ронять процесс
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write_and_notify()
+        self._write_and_notify()
+
+    def _write_and_notify(self):
+        # Ждущие flush() зарегистрированы до этой пачки — их записи в неё попадут
+        with self._lock:
+            waiters, self._flush_waiters = self._flush_waiters, []
+        self._write_batch()
+        for done in waiters:
+            done.set()
+
+    def flush(self, timeout: float = 2.0):
+        """
+        Дождаться записи накопленного (не из аудио-callback)
+
+        Пишет поток-писатель: запись из двух потоков перемешала бы пачки.
+        """
+        thread = self._thread
+        if (thread is None or self._closed or not thread.is_alive()
+                or thread is threading.current_thread()):
+            self._write_batch()
+            return
+        done = threading.Event()
+        with self._lock:
+            self._flush_waiters.append(done)
+        self._wakeup.set()
+        done.wait(timeout)
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        else:
+            self._write_batch()
+        if self.path and self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def attach_events(self, bus, event_type=None):
+        """
+        Логировать события шины (transport.events)
+
+        Подписка inline: обработчик только ставит запись в кольцо.
+        """
+        from dataclasses import asdict
+        from transport.events import ErrorEvent, Event
+
+        def on_event(event):
+            fields = asdict(event)
+            fields.pop("timestamp", None)
+            source = fields.pop("source", "") or "events"
+            level = ERROR if isinstance(event, ErrorEvent) else INFO
+            self.log(level, source, type(event).__name__, fields)
+
+        return bus.subscribe(event_type or Event, on_event, inline=True)
+
+    def stats(self) -> Dict:
+        return {
+            "written": self.written,
+            "queued": self._tail - self._head,
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+        }
+
+
+# Общий логгер процесса (пишет в stderr, пока не вызван configure)
+log = StructuredLogger()
+
+
+def configure(**kwargs) -> StructuredLogger:
+    """Заменить параметры общего логгера (аргументы как у StructuredLogger)"""
+    log.close()
+    # Меняем атрибуты существующего объекта, чтобы импортированные ссылки продолжали работать;
+    # писатель запускается уже на нём
+    log.__dict__.update(StructuredLogger(start=False, **kwargs).__dict__)
+    log.start()
+    return log
+
+
+@atexit.register
+def _flush_at_exit():
+    log.close()
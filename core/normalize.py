@@ -0,0 +1,213 @@
+"""
+Нормализация русских слов перед сопоставлением с командами
+
+Каждое слово приводится к нижнему регистру, «ё» заменяется на «е»,
+окончание отрезается стеммером (правила Snowball для русского языка),
+а основа при необходимости заменяется синонимом. «включите», «включи»
+и «зажги» дают одну форму, поэтому в commands.json достаточно одной
+фразы на смысл.
+
+Результат для слова запоминается (LRU), так что в цикле диалога
+нормализация почти всегда сводится к поиску в словаре.
+
+Пример:
+    python -m core.normalize включите свет пожалуйста
+"""
+import re
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_VOWELS = "аеиоуыэюя"
+_WORD = re.compile(r"\w+")
+
+# Группы окончаний: (окончания, требуется ли перед ними «а»/«я»)
+_PERFECTIVE_GERUND = (("вшись", "вши", "в"), True), (("ившись", "ывшись", "ивши", "ывши", "ив", "ыв"), False)
+_REFLEXIVE = (("ся", "сь"), False),
+_ADJECTIVE = ("ими", "ыми", "его", "ого", "ему", "ому", "ее", "ие", "ые", "ое", "ей", "ий", "ый",
+              "ой", "ем", "им", "ым", "ом", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею")
+_PARTICIPLE = (("ем", "нн", "вш", "ющ", "щ"), True), (("ивш", "ывш", "ующ"), False)
+_VERB = (
+    (("ете", "йте", "ешь", "нно", "ла", "на", "ли", "ем", "ло", "но", "ет", "ют", "ны", "ть", "й", "л", "н"), True),
+    (("ейте", "уйте", "ила", "ыла", "ена", "ите", "или", "ыли", "ило", "ыло", "ено", "ует", "уют", "ены",
+      "ить", "ыть", "ишь", "ей", "уй", "ил", "ыл", "им", "ым", "ен", "ят", "ит", "ыт", "ую", "ю"), False),
+)
+_NOUN = (("иями", "ями", "ами", "ией", "иям", "ием", "иях", "ев", "ов", "ие", "ье", "еи", "ии", "ей",
+          "ой", "ий", "ям", "ем", "ам", "ом", "ах", "ях", "ию", "ью", "ия", "ья", "а", "е", "и", "й",
+          "о", "у", "ы", "ь", "ю", "я"), False),
+_SUPERLATIVE = (("ейше", "ейш"), False),
+_DERIVATIONAL = (("ость", "ост"), False),
+
+# Синонимы: слово -> слово с тем же смыслом в командах (обе стороны нормализуются)
+DEFAULT_SYNONYMS = {
+    "зажги": "включи",
+    "погаси": "выключи",
+    "лампу": "свет",
+    "фонарь": "свет",
+    "асистент": "ассистент",
+}
+
+
+def _sorted_groups(groups) -> Tuple:
+    return tuple((tuple(sorted(endings, key=len, reverse=True)), after_a) for endings, after_a in groups)
+
+
+_PERFECTIVE_GERUND = _sorted_groups(_PERFECTIVE_GERUND)
+_REFLEXIVE = _sorted_groups(_REFLEXIVE)
+_ADJECTIVE = tuple(sorted(_ADJECTIVE, key=len, reverse=True))
+_PARTICIPLE = _sorted_groups(_PARTICIPLE)
+_VERB = _sorted_groups(_VERB)
+_NOUN = _sorted_groups(_NOUN)
+_SUPERLATIVE = _sorted_groups(_SUPERLATIVE)
+_DERIVATIONAL = _sorted_groups(_DERIVATIONAL)
+
+
+def _strip(rv: str, groups) -> Optional[str]:
+    """Отрезать самое длинное подходящее окончание; None — не нашлось"""
+    best = None
+    for endings, after_a in groups:
+        for ending in endings:
+            if rv.endswith(ending):
+                rest = rv[:-len(ending)]
+                if after_a and not rest.endswith(("а", "я")):
+                    continue
+                if best is None or len(rest) < len(best):
+                    best = rest
+                break
+    return best
+
+
+def _strip_adjectival(rv: str) -> Optional[str]:
+    for ending in _ADJECTIVE:
+        if rv.endswith(ending):
+            rest = rv[:-len(ending)]
+            participle = _strip(rest, _PARTICIPLE)
+            return participle if participle is not None else rest
+    return None
+
+
+def _region(word: str, start: int) -> int:
+    """Начало области после первой пары «гласная, согласная» начиная с start"""
+    for i in range(start + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word: str) -> str:
+    """
+    Основа русского слова по алгоритму Snowball
+
+    Args:
+        word: Слово в нижнем регистре, «ё» уже заменена
+
+    Returns:
+        Слово без окончания
+    """
+    rv_start = next((i + 1 for i, ch in enumerate(word) if ch in _VOWELS), len(word))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    r2 = max(_region(word, _region(word, 0)) - rv_start, 0)
+
+    # Шаг 1: деепричастие, иначе возвратность + прилагательное/глагол/существительное
+    rest = _strip(rv, _PERFECTIVE_GERUND)
+    if rest is None:
+        reflexive = _strip(rv, _REFLEXIVE)
+        if reflexive is not None:
+            rv = reflexive
+        for strip in (_strip_adjectival, lambda s: _strip(s, _VERB), lambda s: _strip(s, _NOUN)):
+            rest = strip(rv)
+            if rest is not None:
+                break
+    if rest is not None:
+        rv = rest
+
+    # Шаг 2: конечная «и»
+    if rv.endswith("и"):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2
+    rest = _strip(rv, _DERIVATIONAL)
+    if rest is not None and len(rest) >= r2:
+        rv = rest
+
+    # Шаг 4: «нн» -> «н», превосходная степень, мягкий знак
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    else:
+        rest = _strip(rv, _SUPERLATIVE)
+        if rest is not None:
+            rv = rest[:-1] if rest.endswith("нн") else rest
+        elif rv.endswith("ь"):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+class Normalizer:
+    """Приведение слов к нормальной форме с памятью уже виденных слов"""
+
+    def __init__(self, synonyms: Optional[Dict[str, str]] = None, min_length: int = 4,
+                 cache_size: int = 8192):
+        """
+        Args:
+            synonyms: Слово -> слово-заменитель (по умолчанию DEFAULT_SYNONYMS)
+            min_length: Более короткие слова не стеммируются («хай», «стоп»)
+            cache_size: Сколько нормальных форм помнить
+        """
+        self.min_length = min_length
+        self.cache_size = cache_size
+        self._synonyms: Dict[str, str] = {}
+        self.word = lru_cache(maxsize=cache_size)(self._normalize_word)
+        self.add_synonyms(DEFAULT_SYNONYMS if synonyms is None else synonyms)
+
+    def resize(self, cache_size: int):
+        """Изменить размер памяти нормальных форм (текущая очищается)"""
+        self.cache_size = cache_size
+        self.word = lru_cache(maxsize=cache_size)(self._normalize_word)
+
+    def add_synonyms(self, synonyms: Dict[str, str]):
+        """Добавить синонимы (сбрасывает память нормальных форм)"""
+        for word, target in synonyms.items():
+            self._synonyms[self._base(word)] = self._base(target)
+        self.word.cache_clear()
+
+    def _base(self, word: str) -> str:
+        word = word.lower().replace("ё", "е")
+        return stem(word) if len(word) >= self.min_length else word
+
+    def _normalize_word(self, word: str) -> str:
+        base = self._base(word)
+        return self._synonyms.get(base, base)
+
+    def words(self, text: str) -> List[str]:
+        """Нормальные формы слов текста"""
+        word = self.word
+        return [word(w) for w in _WORD.findall(text.lower())]
+
+    def text(self, text: str) -> str:
+        """Текст из нормальных форм через пробел"""
+        return " ".join(self.words(text))
+
+    def phrases(self, phrases: Iterable[str]) -> List[str]:
+        """Нормализовать фразы каталога, убрав совпавшие после нормализации"""
+        return list(dict.fromkeys(p for p in map(self.text, phrases) if p))
+
+    def stats(self) -> Dict[str, int]:
+        info = self.word.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize,
+                "synonyms": len(self._synonyms)}
+
+
+# Общий нормализатор процесса
+normalizer = Normalizer()
+
+
+if __name__ == "__main__":
+    sample = " ".join(sys.argv[1:]) or "включите, пожалуйста, следующие треки"
+    print(f"[Нормализация] {sample!r} -> {normalizer.text(sample)!r}")
+    start = time.perf_counter()
+    for _ in range(10000):
+        normalizer.text(sample)
+    per_call = (time.perf_counter() - start) / 10000 * 1e6
+    print(f"[Нормализация] {per_call:.1f} мкс на фразу (с памятью), {normalizer.stats()}")
+    sys.exit(0)
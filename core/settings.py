@@ -0,0 +1,348 @@
+"""
+Настройки ассистента и профили производительности
+
+Значения берутся из config/settings.yaml: секция defaults, поверх неё —
+выбранный профиль (profiles: low-power, low-latency, server-multiroom,
+...), поверх профиля — переопределения устройства из config/devices.yaml.
+Результат проверяется один раз при запуске: неизвестные ключи, неверные
+типы и значения вне допустимых пределов дают SettingsError со списком
+всех ошибок сразу.
+
+Профиль выбирается так (по убыванию приоритета):
+    аргумент profile / переменная VOICE_ASSISTANT_PROFILE
+    профиль устройства из devices.yaml (устройство — аргумент device,
+        VOICE_ASSISTANT_DEVICE или имя хоста)
+    default_profile из devices.yaml
+
+Пример (показать итоговые настройки):
+    python -m core.settings --profile low-latency
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+SETTINGS_PATH = os.path.join("config", "settings.yaml")
+DEVICES_PATH = os.path.join("config", "devices.yaml")
+
+
+class SettingsError(ValueError):
+    """Ошибки в файлах настроек"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Ошибки в настройках:\n  " + "\n  ".join(errors))
+
+
+@dataclass
+class AudioSettings:
+    sample_rate: int = 16000
+    block_ms: float = 100          # Блок захвата потока
+    feed_ms: float = 100           # Порция распознавателя
+    device: Optional[Union[int, str]] = None
+    channels: int = 1
+    mix: str = "best"              # Сведение каналов: best | beam
+    record_session: Optional[str] = None  # Каталог записи сессии (audio.session)
+    replay_session: Optional[str] = None  # Сессия вместо микрофона
+    replay_speed: float = 1.0      # Темп воспроизведения (0 — без пауз)
+
+    def validate(self) -> List[str]:
+        errors = []
+        if self.sample_rate not in (8000, 16000, 22050, 32000, 44100, 48000):
+            errors.append(f"audio.sample_rate: неподдерживаемая частота {self.sample_rate}")
+        if not 5 <= self.block_ms <= 1000:
+            errors.append(f"audio.block_ms: {self.block_ms} вне 5..1000")
+        if not 5 <= self.feed_ms <= 1000:
+            errors.append(f"audio.feed_ms: {self.feed_ms} вне 5..1000")
+        if self.channels < 1:
+            errors.append("audio.channels: должно быть не меньше 1")
+        if self.mix not in ("best", "beam"):
+            errors.append(f"audio.mix: {self.mix!r}, ожидается best или beam")
+        if self.replay_speed < 0:
+            errors.append("audio.replay_speed: не может быть отрицательным")
+        if self.record_session and self.record_session == self.replay_session:
+            errors.append("audio.record_session: совпадает с replay_session")
+        return errors
+
+
+@dataclass
+class VADSettings:
+    silence_seconds: float = 1.5   # Тишина, завершающая команду
+    command_timeout: float = 10.0  # Сколько ждать команду
+    dialogue_timeout: float = 15.0  # Бездействие до выхода из диалога
+    echo_tail: float = 0.3         # Сколько гасить захват после реплики
+    barge_in_rms: float = 1000.0   # Уровень, с которого речь перебивает ассистента
+
+    def validate(self) -> List[str]:
+        errors = []
+        for name in ("silence_seconds", "command_timeout", "dialogue_timeout"):
+            if getattr(self, name) <= 0:
+                errors.append(f"vad.{name}: должно быть больше 0")
+        if self.silence_seconds >= self.command_timeout:
+            errors.append("vad.silence_seconds: должно быть меньше command_timeout")
+        if self.echo_tail < 0 or self.barge_in_rms < 0:
+            errors.append("vad.echo_tail и vad.barge_in_rms не могут быть отрицательными")
+        return errors
+
+
+@dataclass
+class STTSettings:
+    model_path: str = "models/stt/vosk-model-small-ru-0.22"
+    large_model_path: Optional[str] = None
+    tier: str = "small"            # small | tiered (второй проход большой моделью)
+    process: bool = False          # Распознавание в отдельном процессе
+    grammar: bool = True           # Команды в диалоге — по грамматике каталога
+    recycle_seconds: float = 900.0  # Замена распознавателя после стольких секунд звука
+    min_confidence: float = 0.7
+    max_added_latency: float = 1.5
+    min_headroom: float = 0.3
+
+    def validate(self) -> List[str]:
+        errors = []
+        if self.tier not in ("small", "tiered"):
+            errors.append(f"stt.tier: {self.tier!r}, ожидается small или tiered")
+        if self.tier == "tiered" and not self.large_model_path:
+            errors.append("stt.tier: tiered требует stt.large_model_path")
+        if self.tier == "tiered" and self.process:
+            errors.append("stt.tier: tiered недоступен при stt.process")
+        if self.recycle_seconds <= 0:
+            errors.append("stt.recycle_seconds: должно быть больше 0")
+        for name in ("min_confidence", "min_headroom"):
+            if not 0 <= getattr(self, name) <= 1:
+                errors.append(f"stt.{name}: ожидается доля от 0 до 1")
+        return errors
+
+
+@dataclass
+class TTSSettings:
+    engine: str = "pyttsx3"
+    rate: int = 150                # Слов в минуту
+    volume: float = 0.9
+    voice: Optional[str] = None
+
+    def validate(self) -> List[str]:
+        errors = []
+        if self.engine != "pyttsx3":
+            errors.append(f"tts.engine: {self.engine!r}, поддерживается только pyttsx3")
+        if not 0 <= self.volume <= 1:
+            errors.append("tts.volume: ожидается от 0 до 1")
+        if self.rate <= 0:
+            errors.append("tts.rate: должно быть больше 0")
+        return errors
+
+
+@dataclass
+class CacheSettings:
+    normalizer_size: int = 8192    # Нормальных форм слов в памяти
+    router_candidates: int = 8     # Кандидатов нечёткого поиска на проверку
+
+    def validate(self) -> List[str]:
+        if self.normalizer_size < 0 or self.router_candidates < 1:
+            return ["cache: размеры должны быть положительными"]
+        return []
+
+
+@dataclass
+class WorkerSettings:
+    executor_concurrency: int = 4  # Одновременных внешних действий
+    action_timeout: float = 5.0
+
+    def validate(self) -> List[str]:
+        errors = []
+        if self.executor_concurrency < 1:
+            errors.append("workers.executor_concurrency: должно быть не меньше 1")
+        if self.action_timeout <= 0:
+            errors.append("workers.action_timeout: должно быть больше 0")
+        return errors
+
+
+@dataclass
+class TelemetrySettings:
+    enabled: bool = False
+    port: Optional[int] = 9108     # Prometheus: http://127.0.0.1:<port>/metrics
+    interval: float = 5.0          # Период опроса (с)
+    snapshot_path: Optional[str] = None  # JSON-снимок на диске
+
+    def validate(self) -> List[str]:
+        errors = []
+        if self.interval < 0.1:
+            errors.append("telemetry.interval: не меньше 0.1 с")
+        if self.port is not None and not 0 <= self.port <= 65535:
+            errors.append(f"telemetry.port: {self.port} вне 0..65535")
+        return errors
+
+
+@dataclass
+class FlightSettings:
+    enabled: bool = True
+    seconds: float = 30.0          # Последние секунды звука в памяти
+    directory: str = "recordings/flight"
+    min_interval: float = 10.0     # Не чаще одной выгрузки с той же причиной
+
+    def validate(self) -> List[str]:
+        errors = []
+        if not 1 <= self.seconds <= 600:
+            errors.append(f"flight.seconds: {self.seconds} вне 1..600")
+        if self.min_interval < 0:
+            errors.append("flight.min_interval: не может быть отрицательным")
+        return errors
+
+
+@dataclass
+class Settings:
+    profile: str = "default"
+    device: str = ""
+    wake_word: str = "ассистент"
+    commands_path: str = "commands.json"
+    audio: AudioSettings = field(default_factory=AudioSettings)
+    vad: VADSettings = field(default_factory=VADSettings)
+    stt: STTSettings = field(default_factory=STTSettings)
+    tts: TTSSettings = field(default_factory=TTSSettings)
+    cache: CacheSettings = field(default_factory=CacheSettings)
+    workers: WorkerSettings = field(default_factory=WorkerSettings)
+    telemetry: TelemetrySettings = field(default_factory=TelemetrySettings)
+    flight: FlightSettings = field(default_factory=FlightSettings)
+
+    def validate(self) -> List[str]:
+        errors = [] if self.wake_word.strip() else ["wake_word: пустое ключевое слово"]
+        for section in (self.audio, self.vad, self.stt, self.tts, self.cache, self.workers,
+                        self.telemetry, self.flight):
+            errors.extend(section.validate())
+        return errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _matches(value: Any, hint: Any) -> bool:
+    if hint is Any:
+        return True
+    origin = get_origin(hint)
+    if origin is Union:
+        return any(_matches(value, arg) for arg in get_args(hint))
+    if hint is type(None):
+        return value is None
+    if hint is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if hint is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, hint)
+
+
+def _build(cls, data: Dict[str, Any], path: str, errors: List[str]):
+    """Собрать dataclass из словаря, проверив ключи и типы"""
+    if not isinstance(data, dict):
+        errors.append(f"{path or 'корень'}: ожидается словарь, получено {type(data).__name__}")
+        return cls()
+    hints = get_type_hints(cls)
+    known = {f.name for f in fields(cls)}
+    for key in data:
+        if key not in known:
+            errors.append(f"{path}{key}: неизвестный параметр")
+    kwargs = {}
+    for f in fields(cls):
+        if f.name not in data:
+            continue
+        value, hint = data[f.name], hints[f.name]
+        if is_dataclass(hint):
+            kwargs[f.name] = _build(hint, value, f"{path}{f.name}.", errors)
+        elif _matches(value, hint):
+            kwargs[f.name] = float(value) if hint is float else value
+        else:
+            errors.append(f"{path}{f.name}: неверный тип {type(value).__name__} ({value!r})")
+    return cls(**kwargs)
+
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    out = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = _merge(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+def _read_yaml(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        raise SettingsError([f"{path}: для чтения настроек нужен пакет PyYAML"])
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise SettingsError([f"{path}: {e}"])
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise SettingsError([f"{path}: ожидается словарь на верхнем уровне"])
+    return data
+
+
+def load_settings(profile: Optional[str] = None, device: Optional[str] = None,
+                  path: str = SETTINGS_PATH, devices_path: str = DEVICES_PATH) -> Settings:
+    """
+    Прочитать и проверить настройки
+
+    Args:
+        profile: Имя профиля (None — по устройству или default_profile)
+        device: Имя устройства в devices.yaml (None — переменная
+            VOICE_ASSISTANT_DEVICE или имя хоста)
+        path: Файл с defaults и profiles
+        devices_path: Файл с устройствами
+
+    Returns:
+        Проверенные настройки
+
+    Raises:
+        SettingsError: есть ошибки в файлах или значениях
+    """
+    config = _read_yaml(path)
+    devices = _read_yaml(devices_path)
+    errors: List[str] = []
+
+    device = device or os.environ.get("VOICE_ASSISTANT_DEVICE") or socket.gethostname()
+    device_entry = (devices.get("devices") or {}).get(device) or {}
+    profile = (profile or os.environ.get("VOICE_ASSISTANT_PROFILE")
+               or device_entry.get("profile") or devices.get("default_profile") or "default")
+
+    profiles = config.get("profiles") or {}
+    data = dict(config.get("defaults") or {})
+    if profile != "default":
+        if profile not in profiles:
+            known = ", ".join(sorted(profiles)) or "нет"
+            raise SettingsError([f"профиль {profile!r} не найден (есть: {known})"])
+        data = _merge(data, profiles[profile] or {})
+    data = _merge(data, device_entry.get("overrides") or {})
+    data.update(profile=profile, device=device if device_entry else "")
+
+    settings = _build(Settings, data, "", errors)
+    errors.extend(settings.validate())
+    if errors:
+        raise SettingsError(errors)
+    return settings
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Проверка и вывод настроек")
+    parser.add_argument("--profile", help="Профиль")
+    parser.add_argument("--device", help="Устройство из devices.yaml")
+    args = parser.parse_args(argv)
+    try:
+        settings = load_settings(args.profile, args.device)
+    except SettingsError as e:
+        print(f"[Настройки] {e}")
+        return 1
+    print(json.dumps(settings.to_dict(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Телеметрия ресурсов процесса
+
+Компоненты регистрируют источники — функции без аргументов, которые
+возвращают число (или словарь «метка -> число» для метрик с меткой).
+Фоновый поток раз в interval секунд опрашивает их и сохраняет снимок;
+аудио-callback и цикл распознавания ничего не делают, кроме увеличения
+своих счётчиков.
+
+Снимок доступен:
+    - в формате Prometheus: http://127.0.0.1:<port>/metrics
+    - в JSON: http://127.0.0.1:<port>/snapshot.json и в файле snapshot_path
+      (перезаписывается атомарно на каждом опросе)
+
+Встроенные источники: RSS, процессорное время процесса и по потокам
+(psutil, /proc или только суммарно), очередь логгера и подписчиков шины.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from core.logger import log
+
+Value = Union[int, float]
+Source = Callable[[], Union[Value, Dict[str, Value], None]]
+
+PREFIX = "assistant_"
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            return 0
+
+
+class ThreadCPU:
+    """Процессорное время по потокам процесса (имя потока -> секунды)"""
+
+    def __init__(self):
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        try:
+            import psutil
+
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+        self.available = self._process is not None or os.path.isdir("/proc/self/task")
+
+    def __call__(self) -> Dict[str, float]:
+        names = {t.native_id: t.name for t in threading.enumerate() if t.native_id is not None}
+        times: Dict[str, float] = {}
+        for tid, seconds in self._per_thread():
+            # Потоки без имени в Python (PortAudio, Vosk) группируются по native id
+            name = names.get(tid, f"native-{tid}")
+            times[name] = times.get(name, 0.0) + seconds
+        return times
+
+    def _per_thread(self) -> List[Tuple[int, float]]:
+        if self._process is not None:
+            return [(t.id, t.user_time + t.system_time) for t in self._process.threads()]
+        result = []
+        try:
+            tids = os.listdir("/proc/self/task")
+        except OSError:
+            return result
+        for tid in tids:
+            try:
+                with open(f"/proc/self/task/{tid}/stat") as f:
+                    # Имя потока в скобках может содержать пробелы — режем после ')'
+                    fields = f.read().rsplit(")", 1)[1].split()
+                result.append((int(tid), (int(fields[11]) + int(fields[12])) / self._ticks))
+            except (OSError, ValueError, IndexError):
+                continue
+        return result
+
+
+class Telemetry:
+    """Реестр источников метрик, фоновый опрос и экспорт"""
+
+    def __init__(self, interval: float = 5.0):
+        """
+        Args:
+            interval: Период опроса источников (с)
+        """
+        self.interval = interval
+        self._sources: Dict[str, Tuple[str, str, Source, str]] = {}
+        self._lock = threading.Lock()
+        self._snapshot: Dict = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.snapshot_path: Optional[str] = None
+        self.sample_seconds = 0.0
+
+    def register(self, name: str, source: Source, kind: str = "gauge", help: str = "",
+                 label: str = ""):
+        """
+        Добавить источник
+
+        Args:
+            name: Имя метрики без префикса (например, audio_queue_depth)
+            source: Функция без аргументов: число, словарь метка -> число или None
+            kind: gauge или counter
+            help: Описание для Prometheus
+            label: Имя метки, если source возвращает словарь
+        """
+        with self._lock:
+            self._sources[name] = (kind, help, source, label)
+
+    def gauge(self, name: str, source: Source, help: str = "", label: str = ""):
+        self.register(name, source, "gauge", help, label)
+
+    def counter(self, name: str, source: Source, help: str = "", label: str = ""):
+        self.register(name, source, "counter", help, label)
+
+    def ratio(self, name: str, numerator: Callable[[], Value], denominator: Callable[[], Value],
+              help: str = ""):
+        """Отношение приростов двух счётчиков между опросами (например, RTF)"""
+        last = [None, None, None]  # числитель, знаменатель, последнее отношение
+
+        def source():
+            num, den = numerator(), denominator()
+            prev_num, prev_den = last[0], last[1]
+            last[0], last[1] = num, den
+            # Без прироста знаменателя (нет звука) остаётся прежнее значение
+            if prev_num is not None and den > prev_den:
+                last[2] = (num - prev_num) / (den - prev_den)
+            return last[2]
+
+        self.gauge(name, source, help)
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._sources.pop(name, None)
+
+    def sample(self) -> Dict:
+        """Опросить все источники (вызывается из фонового потока)"""
+        start = time.perf_counter()
+        with self._lock:
+            sources = list(self._sources.items())
+        metrics = {}
+        for name, (kind, help, source, label) in sources:
+            try:
+                value = source()
+            except Exception as e:
+                log.warning("telemetry", "source failed", metric=name, error=str(e))
+                continue
+            if value is None:
+                continue
+            metrics[name] = {"type": kind, "help": help, "label": label, "value": value}
+        self.sample_seconds = time.perf_counter() - start
+        snapshot = {"timestamp": time.time(), "pid": os.getpid(),
+                    "sample_ms": round(self.sample_seconds * 1000, 3), "metrics": metrics}
+        self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self) -> Dict:
+        """Последний снимок"""
+        return self._snapshot
+
+    def prometheus(self) -> str:
+        """Последний снимок в текстовом формате Prometheus"""
+        lines = []
+        for name, metric in sorted(self._snapshot.get("metrics", {}).items()):
+            full = PREFIX + name
+            if metric["help"]:
+                lines.append(f"# HELP {full} {metric['help']}")
+            lines.append(f"# TYPE {full} {metric['type']}")
+            value = metric["value"]
+            if isinstance(value, dict):
+                label = metric["label"] or "key"
+                for key, v in sorted(value.items()):
+                    escaped = (str(key).replace("\\", "\\\\").replace('"', '\\"')
+                               .replace("\n", "\\n"))
+                    lines.append(f'{full}{{{label}="{escaped}"}} {_number(v)}')
+            else:
+                lines.append(f"{full} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _write_snapshot(self, snapshot: Dict):
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, self.snapshot_path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            snapshot = self.sample()
+            if self.snapshot_path:
+                try:
+                    self._write_snapshot(snapshot)
+                except OSError as e:
+                    log.warning("telemetry", "snapshot write failed", error=str(e))
+            self._stop.wait(self.interval)
+
+    def start(self, port: Optional[int] = None, snapshot_path: Optional[str] = None,
+              host: str = "127.0.0.1"):
+        """
+        Запустить опрос и экспорт
+
+        Args:
+            port: Порт HTTP (None — без HTTP)
+            snapshot_path: Файл JSON-снимка (None — не писать)
+            host: Адрес HTTP (по умолчанию только локальный)
+        """
+        if self._thread is not None:
+            return
+        self.snapshot_path = snapshot_path
+        self._stop.clear()
+        self.sample()
+        if port is not None:
+            self._server = ThreadingHTTPServer((host, port), _Handler)
+            self._server.daemon_threads = True
+            self._server.telemetry = self
+            threading.Thread(target=self._server.serve_forever, daemon=True,
+                             name="telemetry-http").start()
+            print(f"[Телеметрия] http://{host}:{self._server.server_address[1]}/metrics")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="telemetry")
+        self._thread.start()
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server is not None else None
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _number(value: Value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        telemetry: Telemetry = self.server.telemetry
+        if self.path.split("?")[0] == "/metrics":
+            body = telemetry.prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split("?")[0] == "/snapshot.json":
+            body = json.dumps(telemetry.snapshot(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _register_defaults(t: Telemetry):
+    from transport.events import bus
+
+    t.gauge("rss_bytes", rss_bytes, "Resident set size")
+    t.counter("process_cpu_seconds_total", time.process_time, "CPU time of the process")
+    thread_cpu = ThreadCPU()
+    if thread_cpu.available:
+        t.counter("thread_cpu_seconds_total", thread_cpu, "CPU time per thread", label="thread")
+    t.gauge("threads", threading.active_count, "Python threads")
+    t.gauge("log_queue_depth", lambda: log.stats()["queued"], "Records waiting for the log writer")
+    t.counter("log_dropped_total", lambda: log.stats()["dropped"], "Log records dropped on overflow")
+    t.gauge("bus_queue_depth", lambda: {f"{s['event']}:{s['handler']}": s["queued"] for s in bus.stats()},
+            "Events queued per subscriber", label="subscriber")
+    t.counter("bus_dropped_total", lambda: {f"{s['event']}:{s['handler']}": s["dropped"] for s in bus.stats()},
+              "Events dropped per subscriber", label="subscriber")
+
+
+# Общая телеметрия процесса
+telemetry = Telemetry()
+_register_defaults(telemetry)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9108
+    telemetry.interval = 1.0
+    telemetry.start(port=port)
+    try:
+        while True:
+            time.sleep(1)
+            print(f"[Телеметрия] опрос {telemetry.snapshot()['sample_ms']} мс")
+    except KeyboardInterrupt:
+        telemetry.stop()
@@ -0,0 +1,239 @@
+"""
+Демон голосового ассистента
+
+Держит модель Vosk и TTS загруженными и принимает запросы через
+Unix-сокет. Клиент: daemonctl.py
+
+Сокет по умолчанию — в $XDG_RUNTIME_DIR, права 0600: выполнять команды
+и останавливать демон может только его владелец.
+
+Протокол: на каждый запрос одна строка JSON, ответ — одна строка JSON.
+Если в запросе указано "payload_bytes": N, сразу после строки идут
+N байт сырого PCM16 mono (без base64).
+
+Команды:
+    ping                                  -> {"ok": true}
+    transcribe {"path": "file.wav"}       -> {"text": "..."}
+    transcribe {"sample_rate": 16000} + PCM
+    execute {"text": "..."}               -> {"matched": bool, "intent": str | null}
+    speak {"text": "..."}
+    stats                                 -> счётчики и задержки
+    shutdown
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from daemonctl import DEFAULT_SOCKET
+from utils.timing import StartupTimer
+
+MAX_PAYLOAD = 64 * 1024 * 1024  # 64 МБ PCM (~35 минут при 16 кГц)
+
+
+class AssistantDaemon:
+    """Сервер с постоянно загруженными STT и TTS"""
+
+    def __init__(self,
+                 model_path: str = "models/stt/vosk-model-small-ru-0.22",
+                 socket_path: str = DEFAULT_SOCKET,
+                 stt_workers: int = 2):
+        """
+        Args:
+            model_path: Путь к модели Vosk
+            socket_path: Путь к Unix-сокету
+            stt_workers: Количество параллельных распознаваний
+        """
+        self.model_path = model_path
+        self.socket_path = socket_path
+        self.startup = StartupTimer()
+        self.stt = None
+        self.command_handler = None
+
+        # Распознавание может идти параллельно (модель общая),
+        # pyttsx3 не потокобезопасен — для TTS отдельный поток
+        self._stt_pool = ThreadPoolExecutor(max_workers=stt_workers, thread_name_prefix="daemon-stt")
+        self._tts_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="daemon-tts")
+
+        self.started_at = time.time()
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def load(self):
+        """Загрузить движки (модель и TTS параллельно)"""
+        from commands import CommandHandler
+        from stt.vosk_stt import VoskSTT
+
+        stt_future = self.startup.start_background("Модель Vosk", lambda: VoskSTT(self.model_path))
+        self.command_handler = CommandHandler()
+        tts_future = self._tts_pool.submit(self._warmup_tts)
+        self.stt = stt_future.result()
+        tts_future.result()
+        print(self.startup.report())
+
+    def _warmup_tts(self):
+        # Движок создаётся в том же потоке, где потом будет говорить
+        with self.startup.measure("TTS (pyttsx3)"):
+            self.command_handler.warmup()
+
+    async def _remove_stale_socket(self):
+        """
+        Удалить сокет, оставшийся от упавшего демона
+
+        Raises:
+            RuntimeError: на сокете отвечает работающий демон
+        """
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            _, writer = await asyncio.open_unix_connection(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+            return
+        writer.close()
+        raise RuntimeError(f"Демон уже запущен: {self.socket_path}")
+
+    async def serve(self):
+        """Запустить сервер и обслуживать клиентов до команды shutdown"""
+        await self._remove_stale_socket()
+
+        self._stopping = asyncio.Event()
+        # Сокет создаётся сразу с правами 0600 (umask на время bind), а не
+        # открытым на чтение-запись всем локальным пользователям
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self._handle_client, path=self.socket_path, limit=MAX_PAYLOAD)
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, 0o600)
+        # Сокет удаляется при остановке, только если его не заменил другой демон
+        socket_inode = os.stat(self.socket_path).st_ino
+        print(f"[Демон] Слушаю {self.socket_path}")
+
+        try:
+            await self._stopping.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            try:
+                if os.stat(self.socket_path).st_ino == socket_inode:
+                    os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+            self._stt_pool.shutdown(wait=False)
+            self._tts_pool.shutdown(wait=False)
+            print("[Демон] Остановлен")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                start = time.perf_counter()
+                request: Dict[str, Any] = {}
+                try:
+                    request = json.loads(line)
+                    payload = None
+                    size = int(request.get("payload_bytes", 0))
+                    if size:
+                        if size > MAX_PAYLOAD:
+                            raise ValueError(f"Слишком большой payload: {size} байт")
+                        payload = await reader.readexactly(size)
+                    response = await self._dispatch(request, payload)
+                    response["ok"] = True
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+
+                elapsed = time.perf_counter() - start
+                self._record(str(request.get("cmd", "?")), elapsed)
+                response["elapsed_ms"] = round(elapsed * 1000, 3)
+
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any], payload: Optional[bytes]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        cmd = request.get("cmd")
+
+        if cmd == "ping":
+            return {}
+
+        if cmd == "transcribe":
+            if payload is not None:
+                rate = int(request.get("sample_rate", 16000))
+                text = await loop.run_in_executor(self._stt_pool, self.stt.transcribe_pcm, payload, rate)
+            elif "path" in request:
+                text = await loop.run_in_executor(self._stt_pool, self.stt.transcribe, request["path"])
+            else:
+                raise ValueError("Нужен path или PCM payload")
+            return {"text": text}
+
+        if cmd == "execute":
+            # «выход» в демоне только отвечает: процесс продолжает обслуживать клиентов
+            intent = await loop.run_in_executor(
+                self._tts_pool, self.command_handler.dispatch, request.get("text", ""))
+            return {"matched": intent is not None, "intent": intent}
+
+        if cmd == "speak":
+            await loop.run_in_executor(self._tts_pool, self.command_handler.speak, request.get("text", ""))
+            return {}
+
+        if cmd == "stats":
+            return {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "startup_s": self.startup.summary(),
+                "requests": self.stats,
+            }
+
+        if cmd == "shutdown":
+            self._stopping.set()
+            return {}
+
+        raise ValueError(f"Неизвестная команда: {cmd}")
+
+    def _record(self, cmd: str, elapsed: float):
+        entry = self.stats.setdefault(cmd, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += elapsed * 1000
+        entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+
+
+def main():
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Демон голосового ассистента")
+    parser.add_argument("--model", default="models/stt/vosk-model-small-ru-0.22", help="Путь к модели Vosk")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Путь к Unix-сокету")
+    parser.add_argument("--stt-workers", type=int, default=2, help="Параллельных распознаваний")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"[ОШИБКА] Модель не найдена: {args.model}")
+        return 1
+
+    daemon = AssistantDaemon(model_path=args.model, socket_path=args.socket,
+                             stt_workers=args.stt_workers)
+    daemon.load()
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        print("\n[Демон] Прервано")
+    except RuntimeError as e:
+        print(f"[ОШИБКА] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
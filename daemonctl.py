@@ -0,0 +1,130 @@
+"""
+Тонкий клиент демона голосового ассистента (см. daemon.py)
+
+Примеры:
+    python daemonctl.py ping
+    python daemonctl.py transcribe command.wav
+    python daemonctl.py speak "Привет"
+    python daemonctl.py stats
+"""
+import json
+import os
+import socket
+import sys
+import wave
+from typing import Any, Dict, Optional
+
+
+def default_socket_path() -> str:
+    """
+    Путь к сокету демона: $VOICE_ASSISTANT_SOCKET, иначе личный каталог
+    $XDG_RUNTIME_DIR (доступен только владельцу), иначе /tmp
+    """
+    path = os.environ.get("VOICE_ASSISTANT_SOCKET")
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "voice-assistant.sock")
+    return "/tmp/voice-assistant.sock"
+
+
+DEFAULT_SOCKET = default_socket_path()
+
+
+class DaemonClient:
+    """Синхронный клиент с постоянным соединением"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: Optional[float] = 60.0):
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self._reader = self.sock.makefile("rb")
+
+    def request(self, cmd: str, payload: Optional[bytes] = None, **params) -> Dict[str, Any]:
+        """Отправить запрос и дождаться ответа"""
+        params["cmd"] = cmd
+        if payload is not None:
+            params["payload_bytes"] = len(payload)
+        message = json.dumps(params, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.sock.sendall(message + payload if payload is not None else message)
+
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Демон закрыл соединение")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "неизвестная ошибка"))
+        return response
+
+    def ping(self) -> float:
+        """Задержка обращения к демону (мс)"""
+        return self.request("ping")["elapsed_ms"]
+
+    def transcribe_file(self, path: str) -> str:
+        """Распознать WAV (файл читает демон)"""
+        return self.request("transcribe", path=os.path.abspath(path))["text"]
+
+    def transcribe_pcm(self, pcm: bytes, sample_rate: int = 16000) -> str:
+        """Распознать PCM16 mono из памяти клиента"""
+        return self.request("transcribe", payload=pcm, sample_rate=sample_rate)["text"]
+
+    def execute(self, text: str) -> bool:
+        return self.request("execute", text=text)["matched"]
+
+    def speak(self, text: str):
+        self.request("speak", text=text)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request("stats")
+
+    def shutdown(self):
+        self.request("shutdown")
+
+    def close(self):
+        self._reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    """Точка входа"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Клиент демона голосового ассистента")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Путь к Unix-сокету")
+    parser.add_argument("--send-audio", action="store_true",
+                        help="Передать аудио в теле запроса (если демон не видит файл)")
+    parser.add_argument("cmd", choices=["ping", "transcribe", "execute", "speak", "stats", "shutdown"])
+    parser.add_argument("arg", nargs="?", help="Файл WAV или текст")
+    args = parser.parse_args(argv)
+
+    with DaemonClient(args.socket) as client:
+        if args.cmd == "ping":
+            print(f"{client.ping():.3f} мс")
+        elif args.cmd == "transcribe":
+            if args.send_audio:
+                with wave.open(args.arg, "rb") as wf:
+                    pcm = wf.readframes(wf.getnframes())
+                    print(client.transcribe_pcm(pcm, wf.getframerate()))
+            else:
+                print(client.transcribe_file(args.arg))
+        elif args.cmd == "execute":
+            print("OK" if client.execute(args.arg or "") else "Команда не найдена")
+        elif args.cmd == "speak":
+            client.speak(args.arg or "")
+        elif args.cmd == "stats":
+            print(json.dumps(client.stats(), ensure_ascii=False, indent=2))
+        elif args.cmd == "shutdown":
+            client.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
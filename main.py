@@ -8,30 +8,137 @@ import queue
 import json
 import time
 from pathlib import Path
-
-import sounddevice as sd
-import numpy as np
-from vosk import Model, KaldiRecognizer
+from typing import Optional
 
 from commands import CommandHandler
+from core.executor import executor
+from core.flight import flight
+from core.logger import log
+from core.normalize import normalizer
+from core.settings import Settings, SettingsError, load_settings
+from core.telemetry import telemetry
+from transport.events import ErrorEvent, FinalTranscript, PartialTranscript, WakeDetected, bus
+from utils.timing import StartupTimer
+
+# Уровень блока захвата (RMS), с которого он считается речью
+SPEECH_RMS = 500.0
 
 class VoiceAssistant:
     def __init__(self, 
                  model_path: str = "models/vosk-model-small-ru-0.22",
                  wake_word: str = "ассистент",
-                 sample_rate: int = 16000):
+                 sample_rate: int = 16000,
+                 startup: Optional[StartupTimer] = None,
+                 stt_process: bool = False,
+                 command_grammar: bool = False,
+                 large_model_path: Optional[str] = None,
+                 block_ms: float = 100,
+                 feed_ms: float = 100,
+                 silence_seconds: float = 1.5,
+                 command_timeout: float = 10.0,
+                 dialogue_timeout: float = 15.0,
+                 recycle_seconds: float = 900.0,
+                 audio_device=None,
+                 channels: int = 1,
+                 mix: str = "best",
+                 echo_options: Optional[dict] = None,
+                 commands_path: str = "commands.json",
+                 tts_options: Optional[dict] = None,
+                 flight_recorder: bool = True,
+                 record_session: Optional[str] = None,
+                 replay_session: Optional[str] = None,
+                 replay_speed: float = 1.0):
         """
         Инициализация голосового ассистента
         
+        Модель Vosk и TTS загружаются в фоне параллельно, чтобы
+        аудиопоток можно было открыть сразу.
+        
         Args:
             model_path: Путь к модели Vosk
             wake_word: Ключевое слово для активации
             sample_rate: Частота дискретизации аудио
+            startup: Отчёт о времени запуска компонентов
+            stt_process: Распознавать в отдельном процессе (stt.worker):
+                захват пишет в разделяемое кольцо и не делит GIL с Vosk
+            command_grammar: В режиме диалога распознавать по грамматике
+                из commands.json (stt.grammar); фразы вне неё
+                распознаются заново открытым словарём
+            large_model_path: Большая модель Vosk для повторного распознавания
+                команд с низкой уверенностью или без интента (stt.tiering);
+                грузится в фоне, используется при свободном процессоре
+            block_ms: Блок захвата аудиопотока (мс): чем меньше, тем раньше
+                распознаватель видит звук (подбор: python -m audio.chunking)
+            feed_ms: Порция, которой звук отдаётся распознавателю (мс)
+            silence_seconds: Тишина, после которой команда считается законченной
+            command_timeout: Сколько ждать команду
+            dialogue_timeout: Бездействие, после которого диалог завершается
+            recycle_seconds: Замена распознавателя после стольких секунд звука
+            audio_device: Устройство захвата (None — по умолчанию)
+            channels: Каналов захвата; при нескольких микрофонах они сводятся
+                в моно до ресемплинга (audio.input.ChannelSelector)
+            mix: Сведение каналов: "best" — лучший канал, "beam" — delay-and-sum
+            echo_options: Параметры EchoGate (tail, barge_in_rms, ...)
+            commands_path: Каталог команд
+            tts_options: Параметры голоса (rate, volume, voice)
+            flight_recorder: Держать в памяти последние секунды звука и
+                событий и выгружать их при ошибках (core.flight)
+            record_session: Каталог для записи сессии захвата (audio.session)
+            replay_session: Каталог записанной сессии: звук берётся из неё
+                вместо микрофона (audio.input.ReplayAudioInput)
+            replay_speed: Темп воспроизведения сессии (0 — без пауз)
         """
         self.sample_rate = sample_rate
         self.wake_word = wake_word.lower()
+        # Малая модель путает «е» и «и» в ключевом слове
+        normalizer.add_synonyms({self.wake_word.replace('е', 'и'): self.wake_word,
+                                 self.wake_word.replace('и', 'е'): self.wake_word})
+        self._wake_form = normalizer.word(self.wake_word)
         self.is_active = False  # Активен ли диалоговый режим
+        self.stop_requested = False  # Команда «выход»: завершить работу после диалога
         self.audio_queue = queue.Queue()
+        self.block_ms = block_ms
+        self.audio_device = audio_device
+        self.channels = channels
+        self.mix = mix
+        self.channel_selector = None  # Создаётся при открытии многоканального потока
+        self.silence_seconds = silence_seconds
+        self.command_timeout = command_timeout
+        self.recycle_seconds = recycle_seconds
+        # Модули захвата (NumPy на уровне модуля) импортируются здесь, а не при старте
+        from audio.chunking import Rechunker, block_samples
+        from audio.input import CaptureBlocks
+        from audio.output import EchoGate
+
+        # Блоки захвата любого размера нарезаются в порции распознавателя
+        self.rechunker = Rechunker(block_samples(sample_rate, feed_ms))
+        self.capture = CaptureBlocks(speech_rms=SPEECH_RMS)
+        self.resampler = None  # Создаётся, если устройство не работает на sample_rate
+        # Блоки с собственной речью ассистента не попадают в распознаватель
+        self.echo_gate = EchoGate(sample_rate=sample_rate, **(echo_options or {}))
+        # Счётчики аудио-callback (только инкременты; читает телеметрия)
+        self.stream_status_events = 0
+        self.last_speech_time = 0.0  # time.monotonic() последнего блока с речью
+        self.input_overflows = 0
+        # Подписки этого ассистента: при остановке снимаются только они,
+        # общая шина процесса остаётся рабочей
+        self._subscriptions = []
+        # Бортовой самописец: звук до эхо-фильтра и события шины
+        self.flight = None
+        if flight_recorder:
+            self.flight = flight
+            flight.configure(sample_rate=sample_rate)
+            self._subscriptions += flight.attach(bus)
+        # Запись сессии для прогонов без микрофона; источник вместо микрофона
+        self.session_recorder = None
+        if record_session:
+            from audio.session import SessionRecorder
+
+            self.session_recorder = SessionRecorder(record_session, sample_rate)
+            self._subscriptions += self.session_recorder.attach(bus)
+        self.replay_session = replay_session
+        self.replay_speed = replay_speed
+        self._stream = None
         
         # Проверка модели
         if not os.path.exists(model_path):
@@ -40,82 +147,301 @@ class VoiceAssistant:
                 f"Скачайте модель с https://alphacephei.com/vosk/models"
             )
         
-        print(f"[Загрузка] Модель Vosk из {model_path}...")
-        self.model = Model(model_path)
-        self.recognizer = KaldiRecognizer(self.model, sample_rate)
-        print("[OK] Модель загружена")
+        self.startup = startup or StartupTimer()
+        self.model = None
+        self.recognizer = None
+        self.command_recognizer = None  # Грамматика команд (только без stt_process)
+        self.command_grammar = command_grammar and not stt_process
+        self.stt_worker = None
+        # Звук и уверенность текущей команды для второго прохода большой моделью
+        self.tiering = None
+        self._command_audio = []
+        self._command_confidence = []
+        if large_model_path and not stt_process:
+            if os.path.exists(large_model_path):
+                from stt.tiering import TieredRecognizer
+
+                self.tiering = TieredRecognizer(sample_rate=sample_rate)
+                self.startup.start_background(
+                    "Большая модель Vosk", lambda: self._load_large_model(large_model_path))
+            else:
+                print(f"[STT] Большая модель не найдена ({large_model_path}), только малая")
+
+        # Обработчик команд (до загрузки модели: из каталога строится грамматика)
+        self.command_handler = CommandHandler(commands_path, tts_options=tts_options)
+        if self.command_grammar:
+            from core.normalize import DEFAULT_SYNONYMS
+            from stt.grammar import CommandGrammar
+
+            # Слова-синонимы убраны из каталога, но должны распознаваться
+            self.grammar = CommandGrammar(self.command_handler.config_path,
+                                          extra=[self.wake_word] + list(DEFAULT_SYNONYMS))
+        
+        print(f"[Загрузка] Модель Vosk из {model_path} (в фоне)...")
+        if stt_process:
+            from stt.worker import RecognizerProcess
+
+            self.stt_worker = RecognizerProcess(model_path, sample_rate)
+            self._model_future = self.startup.start_background(
+                "Модель Vosk (процесс)", self._start_worker)
+        else:
+            self._model_future = self.startup.start_background(
+                "Модель Vosk", lambda: self._load_model(model_path))
+        
+        # В фоне только импорт pyttsx3: движок создаётся в run() в основном
+        # потоке, из которого говорит ассистент
+        self._tts_future = self.startup.start_background(
+            "TTS (импорт pyttsx3)", self.command_handler.preload)
         
-        # Обработчик команд
-        self.command_handler = CommandHandler()
+        self._register_telemetry()
         
         # Время последней активности
         self.last_activity_time = time.time()
-        self.dialogue_timeout = 15  # Таймаут неактивности в диалоге (секунды)
+        self.dialogue_timeout = dialogue_timeout  # Таймаут неактивности в диалоге (секунды)
         
+    @classmethod
+    def from_settings(cls, settings: Settings, startup: Optional[StartupTimer] = None) -> "VoiceAssistant":
+        """Собрать ассистента по проверенным настройкам (core.settings)"""
+        executor.max_concurrency = settings.workers.executor_concurrency
+        executor.default_timeout = settings.workers.action_timeout
+        normalizer.resize(settings.cache.normalizer_size)
+        flight.configure(seconds=settings.flight.seconds, directory=settings.flight.directory,
+                         min_interval=settings.flight.min_interval)
+        if settings.telemetry.enabled:
+            telemetry.interval = settings.telemetry.interval
+            telemetry.start(port=settings.telemetry.port,
+                            snapshot_path=settings.telemetry.snapshot_path)
+        stt = settings.stt
+        assistant = cls(
+            model_path=stt.model_path,
+            wake_word=settings.wake_word,
+            sample_rate=settings.audio.sample_rate,
+            startup=startup,
+            stt_process=stt.process,
+            command_grammar=stt.grammar,
+            large_model_path=stt.large_model_path if stt.tier == "tiered" else None,
+            block_ms=settings.audio.block_ms,
+            feed_ms=settings.audio.feed_ms,
+            silence_seconds=settings.vad.silence_seconds,
+            command_timeout=settings.vad.command_timeout,
+            dialogue_timeout=settings.vad.dialogue_timeout,
+            recycle_seconds=stt.recycle_seconds,
+            audio_device=settings.audio.device,
+            channels=settings.audio.channels,
+            mix=settings.audio.mix,
+            echo_options={"tail": settings.vad.echo_tail, "barge_in_rms": settings.vad.barge_in_rms},
+            commands_path=settings.commands_path,
+            tts_options={"rate": settings.tts.rate, "volume": settings.tts.volume,
+                         "voice": settings.tts.voice},
+            flight_recorder=settings.flight.enabled,
+            record_session=settings.audio.record_session,
+            replay_session=settings.audio.replay_session,
+            replay_speed=settings.audio.replay_speed,
+        )
+        if assistant.command_handler.router is not None:
+            assistant.command_handler.router.max_candidates = settings.cache.router_candidates
+        if assistant.tiering is not None:
+            assistant.tiering.min_confidence = stt.min_confidence
+            assistant.tiering.max_added_latency = stt.max_added_latency
+            assistant.tiering.min_headroom = stt.min_headroom
+        return assistant
+
+    def _register_telemetry(self):
+        """Источники метрик ассистента (опрашиваются фоновым потоком core.telemetry)"""
+        telemetry.gauge("audio_queue_depth", self.audio_queue.qsize, "Blocks waiting for the recognizer")
+        telemetry.gauge("rechunker_pending_samples", lambda: self.rechunker.pending,
+                        "Samples waiting for a full recognizer feed")
+        telemetry.counter("stream_status_total", lambda: self.stream_status_events,
+                          "Callbacks with a non-empty PortAudio status")
+        telemetry.counter("input_overflows_total", lambda: self.input_overflows,
+                          "PortAudio input overflows")
+        if self.flight is not None:
+            telemetry.counter("flight_dumps_total", lambda: self.flight.dumps,
+                              "Flight recorder dumps written")
+        telemetry.gauge("dialogue_active", lambda: int(self.is_active), "1 while in dialogue mode")
+        if self.stt_worker is not None:
+            telemetry.gauge("stt_ring_pending_samples", self.stt_worker.pending,
+                            "Samples in the shared ring not yet decoded")
+            telemetry.counter("stt_ring_lost_samples_total", lambda: self.stt_worker.stats()["lost_samples"],
+                              "Samples overwritten before the worker read them")
+            telemetry.counter("stt_worker_restarts_total", lambda: self.stt_worker.restarts,
+                              "Recognizer process restarts")
+        else:
+            telemetry.ratio("recognizer_rtf",
+                            lambda: self.recognizer.decode_seconds if self.recognizer else 0.0,
+                            lambda: self.recognizer.total_seconds if self.recognizer else 0.0,
+                            "Decode time per second of audio since the previous sample")
+            telemetry.counter("recognizer_recycles_total",
+                              lambda: self.recognizer.recycles if self.recognizer else None,
+                              "Recognizer instances replaced")
+        if self.tiering is not None:
+            telemetry.counter("second_pass_total", lambda: self.tiering.counts["escalations"],
+                              "Commands re-decoded by the large model")
+
+    def _load_model(self, model_path: str):
+        """Загрузка модели и распознавателя (выполняется в фоновом потоке)"""
+        from vosk import Model
+        from stt.lifecycle import ManagedRecognizer
+
+        model = Model(model_path)
+        # Распознаватель сбрасывается на границах фраз и периодически заменяется
+        # прогретым запасным, чтобы круглосуточная работа не копила состояние
+        recognizer = ManagedRecognizer(lambda: self._new_recognizer(model),
+                                       sample_rate=self.sample_rate,
+                                       max_seconds=self.recycle_seconds)
+        if self.command_grammar:
+            from stt.grammar import GrammarRecognizer
+
+            self.command_recognizer = GrammarRecognizer(
+                lambda grammar: self._new_recognizer(model, grammar),
+                fallback=self._new_recognizer(model), grammar=self.grammar,
+                sample_rate=self.sample_rate)
+        return model, recognizer
+
+    def _new_recognizer(self, model, grammar: Optional[str] = None):
+        """KaldiRecognizer; с уровнями моделей — с уверенностью по словам"""
+        from vosk import KaldiRecognizer
+
+        if grammar is None:
+            rec = KaldiRecognizer(model, self.sample_rate)
+        else:
+            rec = KaldiRecognizer(model, self.sample_rate, grammar)
+        if self.tiering is not None:
+            rec.SetWords(True)
+        return rec
+
+    def _load_large_model(self, model_path: str):
+        """Загрузка большой модели для второго прохода (в фоне, не задерживает запуск)"""
+        from vosk import Model
+
+        model = Model(model_path)
+        self.tiering.set_factory(lambda: self._new_recognizer(model))
+        print("[OK] Большая модель загружена")
+
+    def _start_worker(self):
+        """Запустить процесс распознавания и дождаться загрузки модели в нём"""
+        self.stt_worker.start()
+        if not self.stt_worker.wait_ready(timeout=120):
+            raise RuntimeError("Процесс распознавания не загрузил модель")
+
+    def wait_ready(self):
+        """Дождаться окончания фоновой загрузки модели"""
+        if self.stt_worker is not None:
+            self._model_future.result()
+        elif self.recognizer is None:
+            self.model, self.recognizer = self._model_future.result()
+            print("[OK] Модель загружена")
+
     def audio_callback(self, indata, frames, time_info, status):
-        """Callback для обработки входящего аудио"""
+        """Callback для обработки входящего аудио (без блокирующего вывода)"""
         if status:
-            print(f"[Аудио] Статус: {status}")
-        self.audio_queue.put(bytes(indata))
+            self.stream_status_events += 1
+            if getattr(status, "input_overflow", False):
+                self.input_overflows += 1
+            log.warning("audio", "stream status", status=str(status))
+        samples = self.capture.decode(indata)
+        if self.channel_selector is not None:
+            samples = self.channel_selector.process(samples.reshape(-1, self.channels))
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        if self.flight is not None:
+            self.flight.write(samples)
+        if self.session_recorder is not None:
+            self.session_recorder.write(samples)
+        # В записанной сессии эха нашего TTS нет: глушить её блоки нельзя
+        if self.replay_session is None and self.echo_gate.should_drop(samples):
+            return
+        if self.capture.is_speech(samples):
+            self.last_speech_time = time.monotonic()
+        if self.stt_worker is not None:
+            self.stt_worker.feed(samples)
+            return
+        for chunk in self.rechunker.push(samples):
+            self.audio_queue.put(chunk)
     
+    @property
+    def decoder(self):
+        """Распознаватель текущего состояния: в диалоге — по грамматике команд"""
+        if self.is_active and self.command_recognizer is not None:
+            return self.command_recognizer
+        return self.recognizer
+
     def process_audio(self, audio_data):
         """Обработка аудио данных"""
-        if self.recognizer.AcceptWaveform(audio_data):
-            result = json.loads(self.recognizer.Result())
+        decoder = self.decoder
+        if self.tiering is not None and self.is_active:
+            self._command_audio.append(audio_data)
+        if decoder.AcceptWaveform(audio_data):
+            result = json.loads(decoder.Result())
             text = result.get("text", "").strip()
+            self._note_confidence(result)
             
             if text:
                 return text
+        elif bus.wants(PartialTranscript):
+            # Частичный результат разбирается, только если на него подписаны
+            partial = json.loads(decoder.PartialResult()).get("partial", "")
+            if partial:
+                bus.publish(PartialTranscript(source="main", text=partial))
         
         return None
     
+    def next_text(self, timeout: float) -> Optional[str]:
+        """
+        Следующий результат распознавания
+
+        Raises:
+            queue.Empty: за timeout не пришло ни звука, ни текста
+        """
+        if self.stt_worker is not None:
+            return self.stt_worker.get_text(timeout=timeout)
+        return self.process_audio(self.audio_queue.get(timeout=timeout))
+
+    def final_text(self) -> str:
+        """Закрыть текущую фразу и вернуть остаток распознавания"""
+        if self.stt_worker is not None:
+            return self.stt_worker.finish()
+        result = json.loads(self.decoder.FinalResult())
+        self._note_confidence(result)
+        return result.get("text", "")
+
+    def _note_confidence(self, result: dict):
+        if self.tiering is not None and self.is_active:
+            from stt.tiering import result_confidence
+
+            confidence = result_confidence(result)
+            if confidence is not None:
+                self._command_confidence.append(confidence)
+
+    def replay_finished(self) -> bool:
+        """Записанная сессия доиграна и весь её звук распознан"""
+        return (self.replay_session is not None and self._stream is not None
+                and self._stream.finished.is_set() and not self.has_pending_audio())
+
+    def has_pending_audio(self) -> bool:
+        if self.stt_worker is not None:
+            return self.stt_worker.pending() > 0
+        return not self.audio_queue.empty()
+
+    def drop_pending_audio(self):
+        """Отбросить накопленный звук (например, собственную реплику)"""
+        if self.replay_session is not None:
+            # Источник записи не ждёт потребителя (при темпе 0 в очереди вся
+            # сессия) и собственной реплики в нём нет — отбрасывать нечего
+            return
+        if self.stt_worker is not None:
+            self.stt_worker.reset()
+            return
+        while not self.audio_queue.empty():
+            self.audio_queue.get()
+        self.rechunker.clear()
+
     def check_wake_word(self, text: str) -> bool:
-        """Проверка наличия ключевого слова"""
-        text_lower = text.lower().strip()
-        
-        # Варианты распознавания wake word
-        wake_word_variants = [
-            self.wake_word,
-            self.wake_word.replace('е', 'и'),  # ассистент -> ассистинт
-            self.wake_word.replace('и', 'е'),
-            'асистент',
-            'ассистент',
-            'ассистенты',
-            'асистенты',
-        ]
-        
-        # Проверяем точное совпадение и вхождение
-        for variant in wake_word_variants:
-            if variant in text_lower or text_lower in variant:
-                print(f"[DEBUG] Найдено ключевое слово: '{variant}' в '{text_lower}'")
-                return True
-        
-        return False
-    
-    def check_goodbye(self, text: str) -> bool:
-        """Проверка на слова прощания"""
-        text_lower = text.lower()
-        
-        goodbye_words = [
-            'пока',
-            'до свидания',
-            'досвидания',
-            'спасибо пока',
-            'всё спасибо',
-            'хватит',
-            'стоп',
-            'закончили',
-            'завершить',
-            'выход',
-            'отмена',
-            'всё',
-            'достаточно',
-        ]
-        
-        for word in goodbye_words:
-            if word in text_lower:
-                return True
-        
+        """Проверка наличия ключевого слова (по нормальной форме слов)"""
+        words = normalizer.words(text)
+        if self._wake_form in words:
+            print(f"[DEBUG] Найдено ключевое слово: '{self.wake_word}' в '{text}'")
+            return True
         return False
     
     def listen_for_wake_word(self):
@@ -125,13 +451,13 @@ class VoiceAssistant:
         
         while not self.is_active:
             try:
-                data = self.audio_queue.get(timeout=1)
-                text = self.process_audio(data)
+                text = self.next_text(timeout=1)
                 
                 if text:
                     print(f"[Услышано]: '{text}'")
                     
                     if self.check_wake_word(text):
+                        bus.publish(WakeDetected(source="main", keyword=self.wake_word))
                         print(f"\n{'='*60}")
                         print(f"  ✓ АССИСТЕНТ АКТИВИРОВАН")
                         print(f"{'='*60}")
@@ -140,19 +466,21 @@ class VoiceAssistant:
                         self.last_activity_time = time.time()
                         
                         # Очищаем очередь
-                        while not self.audio_queue.empty():
-                            self.audio_queue.get()
+                        self.drop_pending_audio()
                         
                         return True
                     
             except queue.Empty:
+                if self.replay_finished():
+                    print("\n[Сессия] Воспроизведение закончено")
+                    return False
                 continue
             except KeyboardInterrupt:
                 return False
         
         return False
     
-    def listen_for_command(self, timeout: float = 10.0):
+    def listen_for_command(self, timeout: Optional[float] = None):
         """
         Режим прослушивания команды с таймаутом
         
@@ -163,16 +491,19 @@ class VoiceAssistant:
             Распознанный текст или None
         """
         print("\n[Слушаю] Говорите команду...")
+        timeout = timeout or self.command_timeout
+        self._command_audio = []
+        self._command_confidence = []
         
         start_time = time.time()
+        listen_start = time.monotonic()
         command_parts = []
         silence_start = time.time()
-        silence_threshold = 1.5  # Секунд тишины для завершения команды
+        silence_threshold = self.silence_seconds  # Секунд тишины для завершения команды
         
         while time.time() - start_time < timeout:
             try:
-                data = self.audio_queue.get(timeout=0.1)
-                text = self.process_audio(data)
+                text = self.next_text(timeout=0.1)
                 
                 if text:
                     command_parts.append(text)
@@ -191,8 +522,7 @@ class VoiceAssistant:
         
         # Получаем финальный результат
         try:
-            final_result = json.loads(self.recognizer.FinalResult())
-            final_text = final_result.get("text", "")
+            final_text = self.final_text()
             if final_text and final_text not in command_parts:
                 command_parts.append(final_text)
         except:
@@ -202,10 +532,17 @@ class VoiceAssistant:
         
         if full_command:
             print(f"\n[Команда получена]: {full_command}")
+            bus.publish(FinalTranscript(source="main", text=full_command))
             self.last_activity_time = time.time()
             return full_command
         else:
             print("[Таймаут] Команда не распознана")
+            if self.flight is not None:
+                self.flight.note("command_timeout", seconds=timeout)
+                # Выгружаем, только если речь была, но не распозналась; в тишине
+                # разбирать нечего
+                if self.last_speech_time > listen_start:
+                    self.flight.dump("timeout")
             return None
     
     def execute_command(self, command: str) -> bool:
@@ -219,27 +556,45 @@ class VoiceAssistant:
             self.command_handler.speak("Я вас не расслышала. Повторите, пожалуйста")
             return True
         
-        # Проверка на прощание
-        if self.check_goodbye(command):
+        if self.tiering is not None:
+            command = self._second_pass(command)
+
+        # Выполнение команды
+        # Прощание — интент каталога, только как всё высказывание: «пока не надо»
+        # и «покажи» диалог не завершают, «стоп» остаётся паузой музыки
+        action = self.command_handler.dispatch(command)
+        if action == "farewell":
             print(f"\n{'='*60}")
             print(f"  ✓ ЗАВЕРШЕНИЕ ДИАЛОГА")
             print(f"{'='*60}\n")
-            self.command_handler.speak("До свидания! Обращайтесь ещё")
+            self.stop_requested = True
             return False
         
-        # Выполнение команды
-        success = self.command_handler.execute(command)
-        
-        if not success:
+        if action is None:
+            if self.flight is not None:
+                self.flight.note("no_intent", text=command)
+                self.flight.dump("no-intent", text=command)
             self.command_handler.speak("Извините, я не поняла команду. Попробуйте ещё раз или скажите 'помощь'")
         
         # Продолжаем диалог в любом случае
         return True
     
+    def _second_pass(self, command: str) -> str:
+        """Перепроверить команду большой моделью, если первый проход сомнителен"""
+        confidence = min(self._command_confidence) if self._command_confidence else None
+        matched = self.command_handler.match(command) is not None
+        if not self.tiering.needs_second_pass(confidence, matched):
+            return command
+        text = self.tiering.redecode(self._command_audio, first_text=command)
+        if text and (not matched or self.command_handler.match(text) is not None):
+            print(f"[STT] Уточнено большой моделью: {text}")
+            return text
+        return command
+
     def dialogue_mode(self):
         """Режим диалога - цикл команд"""
         print("\n[Режим диалога] Можете задавать команды")
-        print("Для выхода скажите: 'пока', 'до свидания', 'хватит' или 'стоп'\n")
+        print("Для выхода скажите: 'пока' или 'до свидания'\n")
         
         while self.is_active:
             # Проверка таймаута неактивности
@@ -247,11 +602,14 @@ class VoiceAssistant:
                 print(f"\n[Таймаут] {self.dialogue_timeout} секунд без активности")
                 self.command_handler.speak("Вы ещё здесь? Если нужна помощь - я слушаю")
                 self.last_activity_time = time.time()
+                prompted_at = time.monotonic()
                 
-                # Ждём ещё немного
+                # Ждём ещё немного. Очередь звука здесь не показатель: в неё
+                # идёт и тишина, а кольцо процесса распознавания пустеет за
+                # миллисекунды — ждём именно речь после вопроса
                 waited = 0
                 while waited < 5:
-                    if not self.audio_queue.empty():
+                    if self.last_speech_time > prompted_at:
                         break
                     time.sleep(0.5)
                     waited += 0.5
@@ -278,6 +636,45 @@ class VoiceAssistant:
             print("       (Или скажите 'пока' для выхода)")
             print("-"*60)
     
+    def _open_stream(self):
+        """Поток захвата: микрофон или записанная сессия"""
+        from audio.devices import PolyphaseResampler
+
+        if self.replay_session is not None:
+            from audio.input import ReplayAudioInput
+
+            source = ReplayAudioInput(self.replay_session, speed=self.replay_speed)
+            rate = source.session.sample_rate
+            print(f"[Сессия] Воспроизведение {self.replay_session} "
+                  f"({source.session.duration:.1f} с, темп x{self.replay_speed or 'max'})")
+            if rate != self.sample_rate:
+                self.resampler = PolyphaseResampler(rate, self.sample_rate)
+            return source.open_raw_stream(self.audio_callback)
+
+        import sounddevice as sd
+        from audio.chunking import block_samples
+        from audio.devices import negotiate_input_rate
+
+        device_rate = negotiate_input_rate(self.audio_device, target=self.sample_rate,
+                                           channels=self.channels)
+        if device_rate != self.sample_rate:
+            print(f"[Аудио] Устройство работает на {device_rate} Гц, "
+                  f"ресемплинг в {self.sample_rate} Гц")
+            self.resampler = PolyphaseResampler(device_rate, self.sample_rate)
+        if self.channels > 1:
+            from audio.input import ChannelSelector
+
+            print(f"[Аудио] Каналов: {self.channels}, сведение: {self.mix}")
+            self.channel_selector = ChannelSelector(self.channels, self.mix)
+        return sd.RawInputStream(
+            samplerate=device_rate,
+            blocksize=block_samples(device_rate, self.block_ms),
+            dtype='int16',
+            channels=self.channels,
+            device=self.audio_device,
+            callback=self.audio_callback
+        )
+
     def run(self):
         """Основной цикл работы ассистента"""
         print("\n" + "="*60)
@@ -289,13 +686,20 @@ class VoiceAssistant:
         print("="*60 + "\n")
         
         try:
-            with sd.RawInputStream(
-                samplerate=self.sample_rate,
-                blocksize=8000,
-                dtype='int16',
-                channels=1,
-                callback=self.audio_callback
-            ):
+            # Поток открывается до готовности модели: звук копится в очереди
+            # и будет распознан сразу после загрузки
+            with self.startup.measure("Аудиоустройство"):
+                stream = self._open_stream()
+            self._stream = stream
+            with stream:
+                # Пока модель грузится в фоне, создаём движок TTS в этом потоке
+                with self.startup.measure("TTS (pyttsx3)"):
+                    self._tts_future.result()
+                    self.command_handler.warmup()
+                self.wait_ready()
+                self.startup.mark("Готов к wake word")
+                print(self.startup.report())
+                
                 while True:
                     # Режим ожидания wake word
                     if not self.is_active:
@@ -305,6 +709,9 @@ class VoiceAssistant:
                     # Режим диалога (цикл команд)
                     if self.is_active:
                         self.dialogue_mode()
+                        if self.stop_requested:
+                            print("\n[Завершение работы] По команде")
+                            break
                         
                         # После выхода из диалога
                         print("\n[Возврат] Возвращаюсь в режим ожидания...\n")
@@ -315,35 +722,58 @@ class VoiceAssistant:
             self.command_handler.speak("До свидания!")
         except Exception as e:
             print(f"\n[ОШИБКА]: {e}")
+            bus.publish(ErrorEvent(source="main", component="VoiceAssistant", message=str(e)))
             import traceback
             traceback.print_exc()
         finally:
+            if self.recognizer is not None:
+                print(f"[STT] Распознаватель: {self.recognizer.stats()}")
+            if self.command_recognizer is not None:
+                print(f"[STT] Грамматика команд: {self.command_recognizer.stats()}")
+            if self.tiering is not None:
+                print(f"[STT] Второй проход: {self.tiering.stats()}")
+            print(executor.latency_table())
+            executor.shutdown()
+            telemetry.stop()
+            for sub in self._subscriptions:
+                bus.unsubscribe(sub)
+            if self.session_recorder is not None:
+                self.session_recorder.close()
+                print(f"[Сессия] Записано {self.session_recorder.samples / self.sample_rate:.1f} с "
+                      f"в {self.session_recorder.path}")
+            if self.stt_worker is not None:
+                print(f"[STT] Процесс распознавания: {self.stt_worker.stats()}")
+                self.stt_worker.stop()
+            log.flush()
+            gated = self.echo_gate.stats()
+            print(f"[Эхо] Отброшено блоков: {gated['gated_blocks']} "
+                  f"({gated['gated_seconds']} с аудио не декодировалось)")
             print("\nАссистент остановлен.")
 
 
 def main():
     """Точка входа"""
-    # Настройка путей
-    MODEL_PATH = "models/stt/vosk-model-small-ru-0.22"
-    WAKE_WORD = "ассистент"
-    DIALOGUE_TIMEOUT = 15  # секунд
+    # Все параметры — в config/settings.yaml (профиль выбирается по устройству)
+    try:
+        settings = load_settings()
+    except SettingsError as e:
+        print(f"\n[ОШИБКА] {e}")
+        return 1
+    print(f"[Настройки] Профиль: {settings.profile}"
+          + (f", устройство: {settings.device}" if settings.device else ""))
     
     # Проверка наличия модели
-    if not os.path.exists(MODEL_PATH):
-        print(f"\n[ОШИБКА] Модель не найдена: {MODEL_PATH}")
+    if not os.path.exists(settings.stt.model_path):
+        print(f"\n[ОШИБКА] Модель не найдена: {settings.stt.model_path}")
         print("\nСкачайте русскую модель Vosk:")
         print("1. Перейдите на https://alphacephei.com/vosk/models")
         print("2. Скачайте 'vosk-model-small-ru-0.22'")
-        print(f"3. Распакуйте в папку: {MODEL_PATH}")
+        print(f"3. Распакуйте в папку: {settings.stt.model_path}")
         print()
         return 1
     
     try:
-        assistant = VoiceAssistant(
-            model_path=MODEL_PATH,
-            wake_word=WAKE_WORD
-        )
-        assistant.dialogue_timeout = DIALOGUE_TIMEOUT
+        assistant = VoiceAssistant.from_settings(settings, startup=StartupTimer())
         assistant.run()
         return 0
         
@@ -355,4 +785,4 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -1,22 +1,34 @@
 import asyncio
+import os
 import numpy as np
 import wave
 from audio.input import WindowsAudioInput
 from stt.vosk_stt import VoskSTT
 from wakeword.openwakeword import WakeWord
-from speaker_id.verifier import SpeakerVerifier
+from speaker_id.verifier import SpeakerVerifier, StreamingSpeakerID
+from transport.events import FinalTranscript, WakeDetected, bus
 from tts.piper_tts import PiperTTS
+from utils.timing import StartupTimer
 
 async def main():
+    startup = StartupTimer()
     audio = WindowsAudioInput()
-    stt = VoskSTT(model_path="models/stt/ru")
-    wake = WakeWord(model_path="models/stt/ru", keyword="эй колонка")
+    # Тяжёлые движки загружаются параллельно в фоне
+    stt_future = asyncio.wrap_future(startup.start_background(
+        "Vosk STT", lambda: VoskSTT(model_path="models/stt/ru")))
+    wake_future = asyncio.wrap_future(startup.start_background(
+        "Wake word", lambda: WakeWord(model_path="models/stt/ru", keyword="эй колонка")))
+    tts_future = asyncio.wrap_future(startup.start_background(
+        "Piper TTS", lambda: PiperTTS(voice="ru_RU-ruslan-medium")))
     verifier = SpeakerVerifier()
+    # Идентификация по голосу идёт параллельно с записью команды
+    speaker = StreamingSpeakerID(sample_rate=16000)
+    if os.path.isdir("models/speaker"):
+        speaker.load_profiles("models/speaker")
+    speaker.start()
 
-    tts = PiperTTS(voice="ru_RU-ruslan-medium")
-    tts.synthesize("Привет! Как дела?", "output.wav")
-
-    print("Ассистент готов. Слушаем...")
+    # Для прослушивания нужен только wake word — STT и TTS догружаются
+    wake = await wake_future
 
     command_mode = False
     buffer = []
@@ -24,16 +36,28 @@ async def main():
     def process_block(data):
         nonlocal command_mode, buffer
         buffer.append(data)
-        if not command_mode:
+        if command_mode:
+            speaker.feed(data)
+        else:
             # сохраняем фрагмент во временный WAV для проверки wake word
             temp_file = "temp.wav"
             save_wav(np.concatenate(buffer), temp_file)
             if wake.check_wakeword(temp_file):
                 print("Wake word обнаружено!")
+                bus.publish(WakeDetected(source="main_async", keyword="эй колонка"))
+                speaker.reset()
                 command_mode = True
                 buffer.clear()
 
-    stream, q = audio.record_async(callback=process_block)
+    with startup.measure("Аудиоустройство"):
+        stream, q = audio.record_async(callback=process_block)
+    startup.mark("Готов к wake word")
+    print("Ассистент готов. Слушаем...")
+
+    stt = await stt_future
+    tts = await tts_future
+    print(startup.report())
+    tts.synthesize("Привет! Как дела?", "output.wav")
 
     while True:
         if command_mode:
@@ -41,10 +65,13 @@ async def main():
             await asyncio.sleep(3)  # запись команды
             temp_file = "command.wav"
             save_wav(np.concatenate(buffer), temp_file)
-            text = stt.transcribe(temp_file)
-            user = verifier.identify(text)
+            text = await asyncio.to_thread(stt.transcribe, temp_file)
+            # Решение о дикторе обычно уже принято, пока шло распознавание
+            decision = speaker.decision
+            user = decision[0] if decision else verifier.identify(text)
             print(f"Команда: {text}")
             print(f"Пользователь: {user}")
+            bus.publish(FinalTranscript(source="main_async", text=text, user=user))
             buffer.clear()
             command_mode = False
         await asyncio.sleep(0.1)  # предотвращаем блокировку
@@ -0,0 +1,107 @@
+"""
+Базовый класс для управления медиаплеером
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class PlayerState:
+    """Локальная копия состояния плеера"""
+    state: str = "stop"  # play / pause / stop
+    title: str = ""
+    artist: str = ""
+    volume: Optional[int] = None
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def describe(self) -> str:
+        """Фраза для ответа на «что играет»"""
+        if self.state == "stop" or not (self.title or self.artist):
+            return "Сейчас ничего не играет"
+        track = " — ".join(p for p in (self.artist, self.title) if p)
+        return f"На паузе: {track}" if self.state == "pause" else f"Играет: {track}"
+
+
+class MediaBackend(ABC):
+    """
+    Абстрактный базовый класс управления плеером
+
+    Команды должны выполняться быстро и не ждать внешних процессов;
+    state() отдаёт кэш без обращения к плееру.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def play(self):
+        pass
+
+    @abstractmethod
+    def pause(self):
+        pass
+
+    @abstractmethod
+    def next(self):
+        pass
+
+    @abstractmethod
+    def previous(self):
+        pass
+
+    @abstractmethod
+    def set_volume(self, level: int):
+        """
+        Установить громкость
+
+        Args:
+            level: Уровень 0..100
+        """
+        pass
+
+    @abstractmethod
+    def state(self) -> PlayerState:
+        """Кэшированное состояние плеера"""
+        pass
+
+    def change_volume(self, delta: int):
+        """Изменить громкость относительно текущей"""
+        current = self.state().volume
+        self.set_volume(max(0, min(100, (current if current is not None else 50) + delta)))
+
+    def now_playing(self) -> str:
+        return self.state().describe()
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+
+def create_backend(kind: str = "auto", host: Optional[str] = None,
+                   port: Optional[int] = None) -> MediaBackend:
+    """
+    Создать бэкенд плеера
+
+    Args:
+        kind: "mpd", "playerctl" или "auto" (MPD, если он отвечает, иначе playerctl)
+        host: Адрес MPD (по умолчанию $MPD_HOST или localhost)
+        port: Порт MPD (по умолчанию $MPD_PORT или 6600)
+    """
+    host = host or os.environ.get("MPD_HOST", "localhost")
+    port = port or int(os.environ.get("MPD_PORT", "6600"))
+    if kind in ("auto", "mpd"):
+        from media.mpd import MPDBackend
+
+        try:
+            return MPDBackend(host, port)
+        except OSError as e:
+            if kind == "mpd":
+                raise
+            print(f"[Медиа] MPD на {host}:{port} недоступен ({e}), использую playerctl")
+    from media.playerctl import PlayerctlBackend
+
+    return PlayerctlBackend()
@@ -0,0 +1,197 @@
+"""
+Локальный фейковый сервер MPD для проверки бэкенда без настоящего плеера
+
+Понимает подмножество протокола: status, currentsong, play, pause,
+stop, next, previous, setvol, idle/noidle, ping, close.
+
+Пример (сервер + замер задержки команд):
+    python -m media.fake_mpd
+"""
+import select
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+DEFAULT_PLAYLIST = [
+    ("Кино", "Группа крови"),
+    ("Сплин", "Выхода нет"),
+    ("Земфира", "Хочешь?"),
+]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self):
+        fake = self.server.fake
+        with fake.changed:
+            fake.connections += 1
+            fake.clients.add(self.request)
+        try:
+            self._serve(fake)
+        finally:
+            with fake.changed:
+                fake.clients.discard(self.request)
+
+    def _serve(self, fake: "FakeMPDServer"):
+        self.wfile.write(b"OK MPD 0.23.5\n")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8").strip()
+            fake.received.append(line)
+            if fake.latency:
+                time.sleep(fake.latency)
+            name, _, arg = line.partition(" ")
+            if name == "close":
+                return
+            if name == "idle":
+                reply = self._idle(fake, arg.split())
+                if reply is None:
+                    return
+            else:
+                reply = fake.execute(name, arg)
+            self.wfile.write(reply.encode("utf-8"))
+
+    def _idle(self, fake: "FakeMPDServer", subsystems: List[str]) -> Optional[str]:
+        seen = fake.version
+        while True:
+            with fake.changed:
+                fake.changed.wait_for(lambda: fake.version != seen, timeout=0.05)
+                if fake.version != seen:
+                    changed = [s for s in fake.last_changed if not subsystems or s in subsystems]
+                    if changed:
+                        return "".join(f"changed: {s}\n" for s in changed) + "OK\n"
+                    seen = fake.version
+            ready, _, _ = select.select([self.rfile], [], [], 0)
+            if ready:
+                raw = self.rfile.readline()
+                if not raw:
+                    return None
+                if raw.strip() == b"noidle":
+                    return "OK\n"
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    fake: "FakeMPDServer"
+
+
+class FakeMPDServer:
+    """Фейковый MPD в фоновом потоке"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 playlist: Optional[List[Tuple[str, str]]] = None, latency: float = 0.0):
+        """
+        Args:
+            host: Адрес
+            port: Порт (0 — любой свободный)
+            playlist: Список (исполнитель, название)
+            latency: Искусственная задержка ответа на команду (с)
+        """
+        self.playlist = playlist or DEFAULT_PLAYLIST
+        self.latency = latency
+        self.state = "stop"
+        self.volume = 50
+        self.song = 0
+        self.received: List[str] = []
+        self.changed = threading.Condition()
+        self.version = 0
+        self.last_changed: List[str] = []
+        self.connections = 0  # Всего принятых соединений
+        self.clients: Set[socket.socket] = set()
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeMPDServer":
+        # Короткий опрос: stop() не ждёт полсекунды
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                                        daemon=True, name="fake-mpd")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def drop_clients(self):
+        """Оборвать все открытые соединения (как при перезапуске сервера)"""
+        with self.changed:
+            clients = list(self.clients)
+        for sock in clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _notify(self, *subsystems: str):
+        with self.changed:
+            self.version += 1
+            self.last_changed = list(subsystems)
+            self.changed.notify_all()
+
+    def execute(self, name: str, arg: str) -> str:
+        if name == "status":
+            return (f"volume: {self.volume}\nstate: {self.state}\nsong: {self.song}\n"
+                    f"playlistlength: {len(self.playlist)}\nOK\n")
+        if name == "currentsong":
+            if self.state == "stop":
+                return "OK\n"
+            artist, title = self.playlist[self.song]
+            return f"file: music/{self.song}.mp3\nArtist: {artist}\nTitle: {title}\nOK\n"
+        if name == "ping":
+            return "OK\n"
+        if name == "play":
+            self.state = "play"
+        elif name == "pause":
+            self.state = "pause" if arg != "0" else "play"
+        elif name == "stop":
+            self.state = "stop"
+        elif name == "next":
+            self.song = (self.song + 1) % len(self.playlist)
+        elif name == "previous":
+            self.song = (self.song - 1) % len(self.playlist)
+        elif name == "setvol":
+            try:
+                self.volume = max(0, min(100, int(arg)))
+            except ValueError:
+                return f"ACK [2@0] {{setvol}} Integer expected: {arg}\n"
+            self._notify("mixer")
+            return "OK\n"
+        else:
+            return f"ACK [5@0] {{{name}}} unknown command \"{name}\"\n"
+        self._notify("player")
+        return "OK\n"
+
+
+def _benchmark(rounds: int = 200) -> Dict[str, float]:
+    from media.mpd import MPDBackend
+
+    server = FakeMPDServer().start()
+    backend = MPDBackend(server.host, server.port)
+    try:
+        timings = {}
+        for name, action in (("pause", backend.pause), ("play", backend.play),
+                             ("next", backend.next), ("setvol", lambda: backend.set_volume(40)),
+                             ("now_playing", backend.now_playing)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                action()
+            timings[name] = (time.perf_counter() - start) / rounds * 1000
+        return timings
+    finally:
+        backend.close()
+        server.stop()
+
+
+if __name__ == "__main__":
+    for name, ms in _benchmark().items():
+        print(f"[Медиа] {name:<12} {ms:.3f} мс")
+    sys.exit(0)
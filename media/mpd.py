@@ -0,0 +1,207 @@
+"""
+Управление плеером по протоколу MPD через постоянное соединение
+
+Команды идут по одному заранее открытому сокету (TCP_NODELAY), так что
+«пауза» — это одна строка туда и «OK» обратно, без fork/exec и поиска
+плеера. Второе соединение висит в idle и обновляет локальный кэш
+состояния при каждом изменении в плеере, поэтому «что играет»
+отвечается из памяти.
+
+Подходит для MPD, Mopidy и других серверов с протоколом MPD.
+"""
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.logger import log
+from media.base import MediaBackend, PlayerState
+
+
+class MPDError(Exception):
+    """Ошибка, которую вернул сервер (ACK)"""
+
+
+class MPDConnection:
+    """Одно соединение с сервером MPD (без потокобезопасности)"""
+
+    def __init__(self, host: str = "localhost", port: int = 6600, timeout: float = 2.0):
+        if host.startswith("/"):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(host)
+        else:
+            self.sock = socket.create_connection((host, port), timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+        greeting = self.file.readline().decode("utf-8", "replace")
+        if not greeting.startswith("OK MPD"):
+            self.close()
+            raise ConnectionError(f"Не MPD-сервер: {greeting.strip()!r}")
+        self.version = greeting.split()[-1]
+
+    def command(self, line: str, timeout: Optional[float] = -1) -> List[Tuple[str, str]]:
+        """
+        Отправить команду и прочитать ответ
+
+        Args:
+            line: Команда без перевода строки
+            timeout: Таймаут чтения ответа (None — ждать бесконечно, -1 — как при подключении)
+
+        Returns:
+            Пары (ключ, значение) из ответа
+        """
+        if timeout != -1:
+            self.sock.settimeout(timeout)
+        self.sock.sendall(line.encode("utf-8") + b"\n")
+        pairs = []
+        while True:
+            raw = self.file.readline()
+            if not raw:
+                raise ConnectionError("MPD закрыл соединение")
+            text = raw.rstrip(b"\n").decode("utf-8", "replace")
+            if text == "OK":
+                return pairs
+            if text.startswith("ACK "):
+                raise MPDError(text)
+            key, _, value = text.partition(": ")
+            pairs.append((key, value))
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.file.close()
+        self.sock.close()
+
+
+def _parse_state(status: Dict[str, str], song: Dict[str, str]) -> PlayerState:
+    volume = status.get("volume")
+    title = song.get("Title") or (os.path.basename(song["file"]) if song.get("file") else "")
+    return PlayerState(
+        state=status.get("state", "stop"),
+        title=title,
+        artist=song.get("Artist", ""),
+        volume=int(volume) if volume not in (None, "-1") else None,
+    )
+
+
+class MPDBackend(MediaBackend):
+    """Плеер по протоколу MPD с постоянным соединением и кэшем состояния"""
+
+    name = "mpd"
+
+    def __init__(self, host: str = "localhost", port: int = 6600, timeout: float = 2.0,
+                 watch: bool = True):
+        """
+        Args:
+            host: Адрес сервера или путь к Unix-сокету
+            port: Порт
+            timeout: Таймаут подключения и ответа на команду. Команды
+                выполняются синхронно в вызывающем потоке (в диалоге), так
+                что зависший сервер задерживает его до ~2×timeout: ответ
+                плюс переподключение с повтором
+            watch: Следить за изменениями (idle) и обновлять кэш
+
+        Raises:
+            OSError: сервер недоступен
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._closed = False
+        self._cmd = MPDConnection(host, port, timeout)
+        self._state = self._fetch_state(self._cmd)
+        self._idle_conn: Optional[MPDConnection] = None
+        self._watcher: Optional[threading.Thread] = None
+        if watch:
+            self._watcher = threading.Thread(target=self._watch, daemon=True, name="mpd-idle")
+            self._watcher.start()
+
+    @staticmethod
+    def _fetch_state(conn: MPDConnection) -> PlayerState:
+        return _parse_state(dict(conn.command("status")), dict(conn.command("currentsong")))
+
+    def _command(self, line: str) -> List[Tuple[str, str]]:
+        """
+        Выполнить команду в вызывающем потоке
+
+        При обрыве — одно переподключение и повтор, поэтому в худшем случае
+        вызов длится около 2×timeout.
+
+        Raises:
+            OSError: сервер недоступен и после переподключения
+            MPDError: сервер отклонил команду
+        """
+        with self._lock:
+            try:
+                return self._cmd.command(line)
+            except (OSError, ConnectionError):
+                # Сервер перезапускался или закрыл простаивающее соединение — одна попытка заново
+                self._cmd.close()
+                self._cmd = MPDConnection(self.host, self.port, self.timeout)
+                return self._cmd.command(line)
+
+    def _update(self, **changes):
+        """Оптимистично обновить кэш, не дожидаясь idle"""
+        state = self._state
+        self._state = PlayerState(**{**state.__dict__, **changes, "updated_at": time.monotonic()})
+
+    def play(self):
+        self._command("play")
+        self._update(state="play")
+
+    def pause(self):
+        self._command("pause 1")
+        self._update(state="pause")
+
+    def next(self):
+        self._command("next")
+
+    def previous(self):
+        self._command("previous")
+
+    def set_volume(self, level: int):
+        level = max(0, min(100, int(level)))
+        self._command(f"setvol {level}")
+        self._update(volume=level)
+
+    def state(self) -> PlayerState:
+        return self._state
+
+    def refresh(self) -> PlayerState:
+        """Перечитать состояние с сервера (обычно не нужно: его обновляет idle)"""
+        with self._lock:
+            self._state = self._fetch_state(self._cmd)
+        return self._state
+
+    def _watch(self):
+        delay = 0.5
+        while not self._closed:
+            try:
+                conn = MPDConnection(self.host, self.port, self.timeout)
+                self._idle_conn = conn
+                self._state = self._fetch_state(conn)
+                delay = 0.5
+                while not self._closed:
+                    conn.command("idle player mixer", timeout=None)
+                    self._state = self._fetch_state(conn)
+            except (OSError, ConnectionError, MPDError, ValueError) as e:
+                if self._closed:
+                    break
+                log.warning("media", "mpd idle connection lost", error=str(e))
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def close(self):
+        self._closed = True
+        if self._idle_conn is not None:
+            self._idle_conn.close()
+        with self._lock:
+            self._cmd.close()
+
+    def __repr__(self):
+        return f"MPDBackend({self.host}:{self.port})"
@@ -0,0 +1,69 @@
+"""
+Управление плеером через playerctl (MPRIS) и громкостью через amixer
+
+Запасной бэкенд, когда сервера MPD нет. Каждая команда — отдельный
+процесс, поэтому они запускаются через core.executor и не ждутся;
+состояние обновляется в фоне после каждой команды.
+"""
+import time
+
+from core.executor import ActionResult, executor
+from media.base import MediaBackend, PlayerState
+
+
+class PlayerctlBackend(MediaBackend):
+    """Плеер через playerctl, громкость через amixer"""
+
+    name = "playerctl"
+
+    def __init__(self):
+        self._state = PlayerState()
+        self.refresh()
+
+    def _player(self, *args: str):
+        executor.run(["playerctl", *args], name=f"playerctl_{args[0]}",
+                     on_done=lambda result: self.refresh())
+
+    def play(self):
+        self._player("play")
+        self._state.state = "play"
+
+    def pause(self):
+        self._player("pause")
+        self._state.state = "pause"
+
+    def next(self):
+        self._player("next")
+
+    def previous(self):
+        self._player("previous")
+
+    def set_volume(self, level: int):
+        level = max(0, min(100, int(level)))
+        executor.run(["amixer", "set", "Master", f"{level}%"], name="volume_set")
+        self._state.volume = level
+
+    def change_volume(self, delta: int):
+        sign = "+" if delta >= 0 else "-"
+        executor.run(["amixer", "set", "Master", f"{abs(delta)}%{sign}"],
+                     name="volume_up" if delta >= 0 else "volume_down")
+        if self._state.volume is not None:
+            self._state.volume = max(0, min(100, self._state.volume + delta))
+
+    def state(self) -> PlayerState:
+        return self._state
+
+    def refresh(self):
+        """Запросить состояние у playerctl в фоне"""
+        executor.run(["playerctl", "metadata", "--format",
+                      "{{status}}\t{{artist}}\t{{title}}"],
+                     name="playerctl_metadata", on_done=self._on_metadata)
+
+    def _on_metadata(self, result: ActionResult):
+        if not result.ok:
+            return
+        status, _, rest = result.stdout.partition("\t")
+        artist, _, title = rest.partition("\t")
+        states = {"Playing": "play", "Paused": "pause"}
+        self._state = PlayerState(state=states.get(status, "stop"), title=title, artist=artist,
+                                  volume=self._state.volume, updated_at=time.monotonic())
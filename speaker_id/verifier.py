@@ -1,3 +1,10 @@
+import queue
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
 class SpeakerVerifier:
     """
     Простая заглушка для теста.
@@ -17,3 +24,209 @@ class SpeakerVerifier:
                 if kw in text:
                     return user
         return "unknown"
+
+
+class StreamingSpeakerID:
+    """
+    Потоковая идентификация диктора параллельно с STT.
+
+    Получает те же блоки PCM, что и распознаватель, в отдельном потоке
+    накапливает эмбеддинг (средний лог-спектр речевых кадров) и публикует
+    решение, как только речи набралось достаточно и один из профилей
+    уверенно лидирует. feed() никогда не блокирует поток захвата.
+    """
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 n_bands: int = 24,
+                 min_speech_sec: float = 0.8,
+                 threshold: float = 0.75,
+                 margin: float = 0.05,
+                 max_pending: int = 64,
+                 on_decision: Optional[Callable[[str, float], None]] = None):
+        """
+        Args:
+            sample_rate: Частота дискретизации входного PCM
+            n_bands: Количество частотных полос в эмбеддинге
+            min_speech_sec: Минимум речи до принятия решения
+            threshold: Минимальное косинусное сходство с профилем
+            margin: Отрыв лучшего профиля от второго
+            max_pending: Размер очереди блоков (при переполнении блоки отбрасываются)
+            on_decision: callback(user, score), вызывается один раз за реплику
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * 0.025)
+        self.hop = int(sample_rate * 0.010)
+        self.min_speech_frames = int(min_speech_sec * sample_rate / self.hop)
+        self.threshold = threshold
+        self.margin = margin
+        self.on_decision = on_decision
+
+        self.profiles: Dict[str, np.ndarray] = {}
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+        n_fft = self.frame_len // 2 + 1
+        edges = np.unique(np.geomspace(2, n_fft, n_bands + 1).astype(int))
+        self._band_edges = edges
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._decided = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.dropped_blocks = 0
+        self._reset_state()
+
+    def _reset_state(self):
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._sum = np.zeros(len(self._band_edges) - 1, dtype=np.float64)
+        self._speech_frames = 0
+        self._noise_floor = None
+        self._decision: Optional[Tuple[str, float]] = None
+        self._generation = getattr(self, '_generation', 0) + 1
+
+    # ---- профили ----
+
+    def embed(self, pcm: np.ndarray) -> Optional[np.ndarray]:
+        """Эмбеддинг для целого фрагмента (для записи профиля)"""
+        feats = self._frame_features(np.asarray(pcm).reshape(-1).astype(np.float32))
+        if len(feats) == 0:
+            return None
+        energy = feats.mean(axis=1)
+        speech = energy > np.percentile(energy, 10) + 3.0
+        if not speech.any():
+            return None
+        return self._normalize(feats[speech].mean(axis=0))
+
+    def enroll(self, user: str, pcm: np.ndarray):
+        """Зарегистрировать голос пользователя по образцу речи"""
+        emb = self.embed(pcm)
+        if emb is None:
+            raise ValueError(f"В образце для {user} не найдено речи")
+        self.profiles[user] = emb
+
+    def load_profiles(self, directory: str) -> int:
+        """Загрузить образцы голосов из <directory>/<пользователь>.wav"""
+        import wave
+        from pathlib import Path
+
+        count = 0
+        for path in sorted(Path(directory).glob("*.wav")):
+            with wave.open(str(path), "rb") as wf:
+                pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            self.enroll(path.stem, pcm)
+            count += 1
+        return count
+
+    # ---- поток ----
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="speaker-id", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def reset(self):
+        """Начать новую реплику (вызывается при срабатывании wake word)"""
+        with self._lock:
+            self._reset_state()
+            self._decided.clear()
+
+    def feed(self, block: np.ndarray):
+        """Передать блок PCM int16. Безопасно вызывать из аудио-callback."""
+        if self._decided.is_set():
+            return
+        try:
+            self._queue.put_nowait((self._generation, block))
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    @property
+    def decision(self) -> Optional[Tuple[str, float]]:
+        """(пользователь, сходство) или None, если решение ещё не принято"""
+        return self._decision
+
+    def wait(self, timeout: float = 0.0) -> Optional[Tuple[str, float]]:
+        """Дождаться решения не дольше timeout секунд"""
+        self._decided.wait(timeout)
+        return self._decision
+
+    def _worker(self):
+        while self._running:
+            item = self._queue.get()
+            if item is None:
+                break
+            generation, block = item
+            with self._lock:
+                if generation != self._generation or self._decided.is_set():
+                    continue
+                self._accept(np.asarray(block).reshape(-1).astype(np.float32))
+
+    def _accept(self, samples: np.ndarray):
+        data = np.concatenate((self._tail, samples))
+        n_frames = 1 + (len(data) - self.frame_len) // self.hop if len(data) >= self.frame_len else 0
+        if n_frames == 0:
+            self._tail = data
+            return
+        self._tail = data[n_frames * self.hop:]
+
+        feats = self._frame_features(data[:(n_frames - 1) * self.hop + self.frame_len])
+        speech = self._speech_mask(feats)
+        if speech.any():
+            self._sum += feats[speech].sum(axis=0)
+            self._speech_frames += int(speech.sum())
+
+        if self.profiles and self._speech_frames >= self.min_speech_frames:
+            self._try_decide()
+
+    def _try_decide(self):
+        emb = self._normalize(self._sum / self._speech_frames)
+        scores = sorted(((float(np.dot(emb, p)), user) for user, p in self.profiles.items()),
+                        reverse=True)
+        best_score, best_user = scores[0]
+        second = scores[1][0] if len(scores) > 1 else -1.0
+        if best_score >= self.threshold and best_score - second >= self.margin:
+            self._decision = (best_user, best_score)
+            self._decided.set()
+            if self.on_decision:
+                self.on_decision(best_user, best_score)
+
+    # ---- признаки ----
+
+    def _frame_features(self, samples: np.ndarray) -> np.ndarray:
+        """Лог-энергии полос для всех кадров фрагмента (векторизовано)"""
+        if len(samples) < self.frame_len:
+            return np.zeros((0, len(self._band_edges) - 1), dtype=np.float32)
+        n_frames = 1 + (len(samples) - self.frame_len) // self.hop
+        idx = np.arange(self.frame_len)[None, :] + self.hop * np.arange(n_frames)[:, None]
+        frames = samples[idx] * self._window
+        power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+        bands = np.add.reduceat(power, self._band_edges[:-1], axis=1)
+        return np.log(bands + 1e-6).astype(np.float32)
+
+    def _speech_mask(self, feats: np.ndarray) -> np.ndarray:
+        """Отбор речевых кадров по энергии относительно минимального уровня шума"""
+        if len(feats) == 0:
+            return np.zeros(0, dtype=bool)
+        energy = feats.mean(axis=1)
+        frame_floor = float(np.percentile(energy, 10))
+        if self._noise_floor is None:
+            self._noise_floor = frame_floor
+        else:
+            self._noise_floor = min(self._noise_floor, frame_floor)
+        return energy > self._noise_floor + 3.0
+
+    @staticmethod
+    def _normalize(vec: np.ndarray) -> np.ndarray:
+        vec = vec - vec.mean()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
@@ -0,0 +1,191 @@
+"""
+Пакетное распознавание архива записей
+
+Файлы распределяются по пулу процессов, в каждом процессе своя модель
+Vosk. Результаты пишутся в JSONL по мере готовности, поэтому прерванный
+запуск можно продолжить с --resume: файл результатов переписывается с
+одной успешной записью на путь, файлы с ошибками распознаются заново.
+
+Пример:
+    python -m stt.batch recordings/ -o transcripts.jsonl -j 8 --resume
+    python -m stt.batch manifest.txt -o transcripts.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+DEFAULT_MODEL = "models/stt/vosk-model-small-ru-0.22"
+
+# Модель рабочего процесса (загружается один раз в initializer)
+_worker_stt = None
+
+
+def _init_worker(model_path: str):
+    global _worker_stt
+    from vosk import SetLogLevel
+    from stt.vosk_stt import VoskSTT
+
+    SetLogLevel(-1)
+    _worker_stt = VoskSTT(model_path)
+
+
+def _transcribe_one(path: str) -> Dict:
+    """Распознать один файл в рабочем процессе"""
+    result = {"path": path}
+    start = time.perf_counter()
+    try:
+        with wave.open(path, "rb") as wf:
+            result["duration_s"] = round(wf.getnframes() / wf.getframerate(), 3)
+        result["text"] = _worker_stt.transcribe(path)
+    except Exception as e:
+        result["error"] = str(e)
+    result["decode_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def collect_inputs(source: str) -> List[str]:
+    """
+    Список WAV-файлов из каталога (рекурсивно) или манифеста
+
+    Манифест — текстовый файл с путём на строку либо JSONL с полем "path".
+    Относительные пути в манифесте считаются от его каталога.
+    """
+    src = Path(source)
+    if src.is_dir():
+        return sorted(str(p) for p in src.rglob("*.wav"))
+
+    paths = []
+    with open(src, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                line = json.loads(line)["path"]
+            path = Path(line)
+            if not path.is_absolute():
+                path = src.parent / path
+            paths.append(str(path))
+    return paths
+
+
+def load_done(output: str) -> Dict[str, Dict]:
+    """
+    Записи, уже успешно распознанные в предыдущих запусках
+
+    Returns:
+        Путь -> последняя успешная запись (ошибки и недописанные строки пропускаются)
+    """
+    done = {}
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # недописанная строка после прерывания
+            if "error" not in record:
+                done[record["path"]] = record
+    return done
+
+
+def _rewrite(output: str, records: Iterable[Dict]):
+    """Переписать файл результатов (через временный файл — прерывание его не портит)"""
+    tmp = output + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, output)
+
+
+def run_batch(paths: Iterable[str], output: str, model_path: str = DEFAULT_MODEL,
+              workers: int = 0, resume: bool = False) -> Dict:
+    """
+    Распознать файлы параллельно и дописать результаты в JSONL
+
+    Args:
+        paths: Пути к WAV
+        output: Файл результатов JSONL
+        model_path: Путь к модели Vosk
+        workers: Количество процессов (0 — по числу ядер)
+        resume: Пропустить файлы, уже успешно распознанные в output;
+            записи с ошибками и повторы из output удаляются
+
+    Returns:
+        Сводка: файлов, ошибок, секунд аудио, секунд работы, аудио-часов в час
+    """
+    paths = list(paths)
+    if resume:
+        done = load_done(output)
+        if os.path.exists(output):
+            # Ошибки перезапускаются: без чистки их строки остались бы рядом с новыми
+            _rewrite(output, done.values())
+        skipped = len(paths)
+        paths = [p for p in paths if p not in done]
+        skipped -= len(paths)
+        if skipped:
+            print(f"[Batch] Пропускаю уже распознанные: {skipped}")
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    summary = {"files": 0, "errors": 0, "audio_s": 0.0, "wall_s": 0.0, "workers": workers}
+    if not paths:
+        return summary
+
+    # Длинные файлы первыми — меньше простоя в конце
+    paths.sort(key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0, reverse=True)
+
+    print(f"[Batch] {len(paths)} файлов, процессов: {workers}")
+    start = time.perf_counter()
+    mode = "a" if resume else "w"
+    with open(output, mode, encoding="utf-8") as out, \
+            multiprocessing.Pool(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        for result in pool.imap_unordered(_transcribe_one, paths, chunksize=1):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+
+            summary["files"] += 1
+            if "error" in result:
+                summary["errors"] += 1
+            summary["audio_s"] += result.get("duration_s", 0.0)
+
+            wall = time.perf_counter() - start
+            speed = summary["audio_s"] / wall if wall > 0 else 0.0
+            print(f"\r[Batch] {summary['files']}/{len(paths)}  "
+                  f"{speed:.1f} ч аудио/ч", end="", flush=True)
+
+    summary["wall_s"] = time.perf_counter() - start
+    summary["audio_hours_per_hour"] = summary["audio_s"] / summary["wall_s"] if summary["wall_s"] else 0.0
+    print()
+    return summary
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Пакетное распознавание WAV-файлов")
+    parser.add_argument("source", help="Каталог с WAV или файл-манифест")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl", help="Результаты JSONL")
+    parser.add_argument("-m", "--model", default=DEFAULT_MODEL, help="Путь к модели Vosk")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="Процессов (0 — все ядра)")
+    parser.add_argument("--resume", action="store_true", help="Продолжить прерванный запуск")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(collect_inputs(args.source), args.output, args.model,
+                        args.workers, args.resume)
+
+    print(f"[Batch] Файлов: {summary['files']}, ошибок: {summary['errors']}")
+    if summary["files"]:
+        print(f"[Batch] Аудио: {summary['audio_s'] / 3600:.2f} ч за {summary['wall_s']:.1f} с "
+              f"({summary['audio_hours_per_hour']:.1f} ч аудио в час, процессов: {summary['workers']})")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
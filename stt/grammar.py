@@ -0,0 +1,231 @@
+"""
+Распознавание команд по грамматике из каталога commands.json
+
+В режиме диалога распознанный текст всё равно сопоставляется только с
+фразами каталога (плюс числа для громкости), поэтому декодер с
+открытым словарём делает лишнюю работу. Здесь каталог собирается в
+список фраз для Vosk (KaldiRecognizer(model, rate, grammar)): граф
+поиска во много раз меньше, декодирование быстрее и точнее.
+
+Грамматика пересобирается, когда меняется файл каталога (проверка
+времени изменения — раз на фразу). Если фраза не уложилась в
+грамматику (Vosk вернул «[unk]» или ничего), её звук повторно
+распознаётся открытым распознавателем — команда вне каталога всё равно
+дойдёт до нечёткого поиска и ответа «не поняла».
+"""
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.logger import log
+
+UNKNOWN = "[unk]"
+
+_UNITS = ["ноль", "один", "два", "три", "четыре", "пять", "шесть", "семь", "восемь", "девять"]
+_TEENS = ["десять", "одиннадцать", "двенадцать", "тринадцать", "четырнадцать", "пятнадцать",
+          "шестнадцать", "семнадцать", "восемнадцать", "девятнадцать"]
+_TENS = ["двадцать", "тридцать", "сорок", "пятьдесят", "шестьдесят", "семьдесят",
+         "восемьдесят", "девяносто", "сто"]
+
+
+_NUMBER_VALUES = {**{word: i for i, word in enumerate(_UNITS)},
+                  **{word: 10 + i for i, word in enumerate(_TEENS)},
+                  **{word: 20 + 10 * i for i, word in enumerate(_TENS)}}
+
+
+def number_words() -> List[str]:
+    """Слова, из которых складываются числа от 0 до 100 (грамматика Vosk — цикл по фразам)"""
+    return _UNITS + _TEENS + _TENS + ["процентов", "процента", "процент"]
+
+
+def parse_number(text: str) -> Optional[int]:
+    """
+    Первое число, записанное словами («пятьдесят пять» -> 55)
+
+    Грамматика команд выдаёт числа словами, а не цифрами.
+
+    Returns:
+        Число от 0 до 100 или None, если чисел в тексте нет
+    """
+    value = None
+    for word in text.lower().split():
+        n = _NUMBER_VALUES.get(word)
+        if n is None:
+            if value is not None:
+                break
+            continue
+        if value is None:
+            value = n
+        elif 20 <= value < 100 and value % 10 == 0 and 0 < n < 10:
+            value += n  # «двадцать пять»
+            break
+        else:
+            break
+    return value
+
+
+class CommandGrammar:
+    """Список фраз для Vosk, собранный из каталога команд"""
+
+    def __init__(self, path: str = "commands.json", extra: Iterable[str] = (),
+                 numbers: bool = True):
+        """
+        Args:
+            path: Каталог команд (JSON: действие -> {"patterns": [...]})
+            extra: Дополнительные фразы (ключевое слово, прощания)
+            numbers: Добавить слова чисел для громкости
+        """
+        self.path = path
+        self.extra = list(extra)
+        self.numbers = numbers
+        self.version = 0
+        self._mtime: Optional[float] = None
+        self._phrases: List[str] = []
+        self._json = "[]"
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Пересобрать грамматику, если каталог изменился
+
+        Returns:
+            True, если грамматика пересобрана
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime and self.version:
+            return False
+        phrases: List[str] = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for info in json.load(f).values():
+                    phrases.extend(info.get("patterns", []))
+        except (OSError, ValueError, AttributeError) as e:
+            log.error("grammar", "catalog load failed", path=self.path, error=str(e))
+            if self.version:
+                return False
+        phrases.extend(self.extra)
+        if self.numbers:
+            phrases.extend(number_words())
+        self._phrases = list(dict.fromkeys(p.lower().strip() for p in phrases if p.strip()))
+        self._json = json.dumps(self._phrases + [UNKNOWN], ensure_ascii=False)
+        self._mtime = mtime
+        self.version += 1
+        log.info("grammar", "grammar built", phrases=len(self._phrases), version=self.version)
+        return True
+
+    @property
+    def phrases(self) -> List[str]:
+        return self._phrases
+
+    def to_json(self) -> str:
+        """Грамматика в формате третьего аргумента KaldiRecognizer"""
+        return self._json
+
+
+class GrammarRecognizer:
+    """
+    Распознаватель команд по грамматике с откатом на открытый словарь
+
+    Повторяет интерфейс KaldiRecognizer (AcceptWaveform, Result,
+    PartialResult, FinalResult, Reset), поэтому подставляется вместо
+    основного распознавателя на время прослушивания команды.
+    """
+
+    def __init__(self, factory: Callable[[str], object], fallback, grammar: CommandGrammar,
+                 sample_rate: int = 16000, max_seconds: float = 15.0):
+        """
+        Args:
+            factory: Создаёт распознаватель по JSON грамматики
+                (например, lambda g: KaldiRecognizer(model, 16000, g))
+            fallback: Отдельный распознаватель с открытым словарём для фраз
+                вне грамматики. Не основной распознаватель ключевого слова:
+                его Reset/FinalResult здесь считались бы границами фраз
+            grammar: Источник грамматики
+            sample_rate: Частота подаваемого PCM16
+            max_seconds: Сколько звука фразы держать для повторного распознавания
+        """
+        self.factory = factory
+        self.fallback = fallback
+        self.grammar = grammar
+        self.max_bytes = int(max_seconds * sample_rate) * 2
+        self.rec = factory(grammar.to_json())
+        self._version = grammar.version
+        self._chunks: List[bytes] = []
+        self._buffered = 0
+        self.utterances = 0
+        self.fallbacks = 0
+        self.rebuilds = 0
+        self.decode_seconds = 0.0
+        self.fallback_seconds = 0.0
+
+    def _rebuild_if_changed(self):
+        """Новую грамматику можно ставить только между фразами"""
+        self.grammar.refresh()
+        if self.grammar.version != self._version:
+            self.rec = self.factory(self.grammar.to_json())
+            self._version = self.grammar.version
+            self.rebuilds += 1
+
+    def AcceptWaveform(self, data: bytes) -> bool:
+        if self._buffered < self.max_bytes:
+            self._chunks.append(bytes(data))
+            self._buffered += len(data)
+        start = time.perf_counter()
+        done = self.rec.AcceptWaveform(data)
+        self.decode_seconds += time.perf_counter() - start
+        return done
+
+    def _finish(self, raw: str) -> str:
+        result = json.loads(raw)
+        text = result.get("text", "").strip()
+        # Пустой результат — тишина, повторно распознавать нечего
+        used_fallback = UNKNOWN in text.split()
+        if used_fallback and self._chunks:
+            start = time.perf_counter()
+            self.fallback.Reset()
+            for chunk in self._chunks:
+                self.fallback.AcceptWaveform(chunk)
+            result = json.loads(self.fallback.FinalResult())
+            text = result.get("text", "").strip()
+            self.fallback_seconds += time.perf_counter() - start
+            self.fallbacks += 1
+        elif used_fallback:
+            text = ""
+        self.utterances += 1
+        self._chunks = []
+        self._buffered = 0
+        self._rebuild_if_changed()
+        out = {"text": text, "grammar": not used_fallback}
+        if "result" in result:
+            out["result"] = result["result"]
+        return json.dumps(out, ensure_ascii=False)
+
+    def Result(self) -> str:
+        return self._finish(self.rec.Result())
+
+    def FinalResult(self) -> str:
+        return self._finish(self.rec.FinalResult())
+
+    def PartialResult(self) -> str:
+        return self.rec.PartialResult()
+
+    def Reset(self):
+        self.rec.Reset()
+        self._chunks = []
+        self._buffered = 0
+        self._rebuild_if_changed()
+
+    def stats(self) -> Dict:
+        return {
+            "utterances": self.utterances,
+            "fallbacks": self.fallbacks,
+            "grammar_rate": round(1 - self.fallbacks / self.utterances, 3) if self.utterances else None,
+            "rebuilds": self.rebuilds,
+            "phrases": len(self.grammar.phrases),
+            "decode_s": round(self.decode_seconds, 3),
+            "fallback_s": round(self.fallback_seconds, 3),
+        }
@@ -0,0 +1,345 @@
+"""
+Управляемый жизненный цикл распознавателя
+
+KaldiRecognizer, который живёт весь срок процесса и слушает круглые
+сутки, копит состояние декодера: растёт RSS и время на блок.
+ManagedRecognizer повторяет интерфейс KaldiRecognizer, но на границах
+фраз сбрасывает распознаватель, а после max_seconds звука (или
+max_utterances фраз) подменяет его заранее прогретым запасным — без
+паузы в распознавании. Старый экземпляр освобождается в фоне.
+
+Пример (суточная нагрузка за минуты, с проверкой памяти и задержки):
+    python -m stt.lifecycle --hours 4 --model models/stt/vosk-model-small-ru-0.22
+    python -m stt.lifecycle --hours 4 --fake
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.logger import log
+
+
+class ManagedRecognizer:
+    """Обёртка KaldiRecognizer со сбросом, переработкой и запасным экземпляром"""
+
+    def __init__(self,
+                 factory: Callable[[], object],
+                 sample_rate: int = 16000,
+                 max_seconds: float = 900.0,
+                 max_utterances: Optional[int] = None,
+                 hard_limit_factor: float = 2.0,
+                 spare: bool = True,
+                 latency_window: int = 2048):
+        """
+        Args:
+            factory: Создаёт новый распознаватель (например,
+                lambda: KaldiRecognizer(model, 16000))
+            sample_rate: Частота подаваемого PCM16
+            max_seconds: После стольких секунд звука экземпляр заменяется
+                на ближайшей границе фразы
+            max_utterances: То же по числу фраз (None — не ограничивать)
+            hard_limit_factor: Если границы фразы так и не было, замена
+                делается принудительно после max_seconds * hard_limit_factor
+            spare: Держать прогретый запасной экземпляр
+            latency_window: Сколько последних задержек блоков хранить
+        """
+        self.factory = factory
+        self.sample_rate = sample_rate
+        self.max_seconds = max_seconds
+        self.max_utterances = max_utterances
+        self.hard_limit_seconds = max_seconds * hard_limit_factor
+        self.use_spare = spare
+
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recognizer-spare")
+        self._lock = threading.Lock()
+        self.rec = factory()
+        self._spare: Optional[Future] = None
+        self._prepare_spare()
+
+        self.generation = 0
+        self.recycles = 0
+        self.resets = 0
+        self.total_seconds = 0.0
+        self.decode_seconds = 0.0
+        self._fed_samples = 0
+        self._utterances = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    @property
+    def fed_seconds(self) -> float:
+        """Сколько звука получил текущий экземпляр"""
+        return self._fed_samples / self.sample_rate
+
+    def _prepare_spare(self):
+        if self.use_spare and self._spare is None:
+            self._spare = self._pool.submit(self._build_warm)
+
+    def _build_warm(self):
+        rec = self.factory()
+        # Первый блок инициализирует конвейер признаков — делаем это заранее
+        rec.AcceptWaveform(bytes(self.sample_rate // 10 * 2))
+        if hasattr(rec, "Reset"):
+            rec.Reset()
+        return rec
+
+    # --- интерфейс KaldiRecognizer ---
+
+    def AcceptWaveform(self, data) -> bool:
+        if self._fed_samples >= self.hard_limit_seconds * self.sample_rate:
+            log.warning("recognizer", "forced recycle without utterance boundary",
+                        fed_seconds=round(self.fed_seconds, 1))
+            self.recycle()
+        start = time.perf_counter()
+        result = self.rec.AcceptWaveform(data)
+        elapsed = time.perf_counter() - start
+        self._latencies.append(elapsed)
+        self.decode_seconds += elapsed
+        n = len(data) // 2
+        self._fed_samples += n
+        self.total_seconds += n / self.sample_rate
+        return result
+
+    def Result(self) -> str:
+        text = self.rec.Result()
+        self._boundary()
+        return text
+
+    def PartialResult(self) -> str:
+        return self.rec.PartialResult()
+
+    def FinalResult(self) -> str:
+        text = self.rec.FinalResult()
+        self._boundary()
+        return text
+
+    def Reset(self):
+        self._reset_current()
+
+    def SetWords(self, enable: bool):
+        self.rec.SetWords(enable)
+
+    # --- управление ---
+
+    def _boundary(self):
+        """Граница фразы: сбросить или заменить экземпляр"""
+        self._utterances += 1
+        due = self.fed_seconds >= self.max_seconds or (
+            self.max_utterances is not None and self._utterances >= self.max_utterances)
+        if due:
+            self.recycle()
+        else:
+            self._reset_current()
+
+    def _reset_current(self):
+        if hasattr(self.rec, "Reset"):
+            self.rec.Reset()
+        self.resets += 1
+
+    def recycle(self):
+        """Подменить экземпляр свежим (запасным, если он готов)"""
+        with self._lock:
+            old = self.rec
+            if self._spare is not None and self._spare.done() and self._spare.exception() is None:
+                self.rec = self._spare.result()
+            else:
+                # Запасного нет или он не успел — создаём синхронно, это редкий путь
+                if self._spare is not None and self._spare.done():
+                    log.error("recognizer", "spare build failed", error=str(self._spare.exception()))
+                self.rec = self.factory()
+            self._spare = None
+            self.generation += 1
+            self.recycles += 1
+            self._fed_samples = 0
+            self._utterances = 0
+        # Освобождение старого декодера тоже не должно задерживать аудио
+        self._pool.submit(_release, old)
+        self._prepare_spare()
+
+    def latency_ms(self) -> Dict[str, float]:
+        if not self._latencies:
+            return {"p50": 0.0, "p99": 0.0}
+        lat = np.array(self._latencies) * 1000
+        return {"p50": round(float(np.percentile(lat, 50)), 3),
+                "p99": round(float(np.percentile(lat, 99)), 3)}
+
+    def stats(self) -> Dict:
+        return {
+            "generation": self.generation,
+            "recycles": self.recycles,
+            "resets": self.resets,
+            "fed_seconds": round(self.fed_seconds, 1),
+            "total_hours": round(self.total_seconds / 3600, 3),
+            "spare_ready": bool(self._spare is not None and self._spare.done()),
+            "latency_ms": self.latency_ms(),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+def _release(rec):
+    """Последняя ссылка на старый декодер отпускается в фоновом потоке"""
+    del rec
+
+
+def current_rss_mb() -> float:
+    """Текущий RSS процесса (Linux: /proc; иначе пиковый из getrusage)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+class AccumulatingRecognizer:
+    """
+    Имитация KaldiRecognizer для прогона без модели
+
+    Копит состояние на каждый блок, и стоимость блока растёт с ним;
+    Reset() очищает его, как решётку декодера. Небольшое «адаптационное»
+    состояние копится всегда и уходит только с экземпляром.
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self._state: List[np.ndarray] = []
+        self._adaptation: List[np.ndarray] = []
+        self._since_endpoint = 0
+
+    def AcceptWaveform(self, data) -> bool:
+        x = np.frombuffer(data, dtype="<i2").astype(np.float32)
+        self._state.append(x[::8].copy())
+        self._adaptation.append(x[::64].copy())
+        # Стоимость растёт с накопленным состоянием
+        for chunk in self._state[-min(len(self._state), 200):]:
+            float(chunk.dot(chunk))
+        self._since_endpoint += len(x)
+        if self._since_endpoint >= self.sample_rate * 5 and float(np.abs(x).mean()) < 50:
+            self._since_endpoint = 0
+            return True
+        return False
+
+    def Result(self) -> str:
+        return json.dumps({"text": ""})
+
+    def PartialResult(self) -> str:
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self) -> str:
+        return self.Result()
+
+    def Reset(self):
+        self._state = []
+
+
+def _soak_audio(path: Optional[str], sample_rate: int) -> np.ndarray:
+    """Звук для прогона: WAV по кругу или синтетические «фразы» с паузами"""
+    if path:
+        with wave.open(path, "rb") as wf:
+            return np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    rng = np.random.default_rng(0)
+    speech = (rng.normal(0, 3000, sample_rate * 4)).astype("<i2")
+    pause = rng.normal(0, 10, sample_rate * 3).astype("<i2")
+    return np.concatenate([speech, pause])
+
+
+def soak(recognizer, hours: float, sample_rate: int = 16000, block_ms: int = 500,
+         audio_path: Optional[str] = None, windows: int = 8) -> List[Dict]:
+    """
+    Прогнать hours часов звука с максимальной скоростью
+
+    Returns:
+        По окнам прогона: RSS, медиана и p99 задержки блока
+    """
+    audio = _soak_audio(audio_path, sample_rate)
+    block = sample_rate * block_ms // 1000
+    total_blocks = int(hours * 3600 * 1000 / block_ms)
+    per_window = max(1, total_blocks // windows)
+
+    report = []
+    latencies = []
+    pos = 0
+    for i in range(total_blocks):
+        if pos + block > len(audio):
+            pos = 0
+        data = audio[pos:pos + block].tobytes()
+        pos += block
+        start = time.perf_counter()
+        if recognizer.AcceptWaveform(data):
+            recognizer.Result()
+        latencies.append(time.perf_counter() - start)
+        if (i + 1) % per_window == 0:
+            lat = np.array(latencies) * 1000
+            report.append({
+                "audio_hours": round((i + 1) * block_ms / 3.6e6, 2),
+                "rss_mb": round(current_rss_mb(), 1),
+                "p50_ms": round(float(np.percentile(lat, 50)), 3),
+                "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            })
+            latencies = []
+    return report
+
+
+def check_flat(report: List[Dict], rss_growth_mb: float = 20.0, latency_growth: float = 1.5) -> List[str]:
+    """Проверить, что память и задержка не растут после первого окна"""
+    if len(report) < 2:
+        return []
+    base, last = report[1] if len(report) > 2 else report[0], report[-1]
+    problems = []
+    if last["rss_mb"] - base["rss_mb"] > rss_growth_mb:
+        problems.append(f"RSS вырос на {last['rss_mb'] - base['rss_mb']:.1f} МБ")
+    if last["p50_ms"] > base["p50_ms"] * latency_growth:
+        problems.append(f"Медиана задержки выросла с {base['p50_ms']} до {last['p50_ms']} мс")
+    return problems
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Длительный прогон распознавателя")
+    parser.add_argument("--hours", type=float, default=4.0, help="Часов звука")
+    parser.add_argument("--model", help="Модель Vosk")
+    parser.add_argument("--fake", action="store_true", help="Имитация распознавателя без модели")
+    parser.add_argument("--wav", help="WAV PCM16 mono 16 кГц для прогона по кругу")
+    parser.add_argument("--max-seconds", type=float, default=900.0, help="Переработка после N секунд звука")
+    parser.add_argument("--unmanaged", action="store_true", help="Без управления (для сравнения)")
+    args = parser.parse_args(argv)
+
+    if args.fake or not args.model:
+        factory = AccumulatingRecognizer
+    else:
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+
+        SetLogLevel(-1)
+        model = Model(args.model)
+        factory = lambda: KaldiRecognizer(model, 16000)
+
+    recognizer = factory() if args.unmanaged else ManagedRecognizer(factory, max_seconds=args.max_seconds)
+    started = time.perf_counter()
+    report = soak(recognizer, args.hours, audio_path=args.wav)
+    for row in report:
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"[Прогон] {args.hours} ч звука за {time.perf_counter() - started:.0f} с")
+    if isinstance(recognizer, ManagedRecognizer):
+        print(f"[Прогон] {recognizer.stats()}")
+
+    problems = check_flat(report)
+    for p in problems:
+        print(f"[Прогон] ПРОВАЛ: {p}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
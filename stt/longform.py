@@ -0,0 +1,224 @@
+"""
+Параллельное распознавание длинных записей
+
+WAV отображается в память, по векторизованному расчёту энергии кадров
+находятся паузы, файл режется по ним на независимые сегменты, которые
+распознаются в пуле процессов. Процессы получают только границы
+сегмента и сами отображают файл, так что аудио между процессами не
+копируется. Результаты склеиваются по порядку с абсолютными временами.
+
+Пример:
+    python -m stt.longform meeting.wav -j 8 -o meeting.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from stt import batch
+
+FRAME_MS = 30
+
+
+def open_wav_memmap(path: str) -> Tuple[np.memmap, int]:
+    """
+    Отобразить PCM16 mono WAV в память без чтения
+
+    Returns:
+        (отсчёты int16, частота дискретизации)
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"Не WAV файл: {path}")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"В файле нет блока data: {path}")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    if fmt is None:
+        raise ValueError(f"В файле нет блока fmt: {path}")
+    audio_format, channels, rate, _, _, bits = fmt
+    if audio_format != 1 or channels != 1 or bits != 16:
+        raise ValueError("Нужен WAV PCM16 mono")
+
+    # Размер data в заголовке может быть неверным у недописанных файлов
+    size = min(size, os.path.getsize(path) - offset)
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(size // 2,)), rate
+
+
+def frame_energy(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS,
+                 chunk_frames: int = 100_000) -> np.ndarray:
+    """Средняя энергия кадров (считается кусками, чтобы не копировать весь файл во float)"""
+    frame = rate * frame_ms // 1000
+    n_frames = len(samples) // frame
+    energy = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, chunk_frames):
+        last = min(first + chunk_frames, n_frames)
+        block = np.asarray(samples[first * frame:last * frame], dtype=np.float32).reshape(-1, frame)
+        energy[first:last] = np.einsum("ij,ij->i", block, block) / frame
+    return energy
+
+
+def find_cuts(energy: np.ndarray, frame_ms: int = FRAME_MS,
+              target_s: float = 30.0, max_s: float = 60.0,
+              min_silence_ms: int = 300) -> List[int]:
+    """
+    Точки разреза (в кадрах) в серединах пауз
+
+    Сегменты стремятся к target_s секунд и не длиннее max_s
+    (если пауз нет — режем жёстко).
+    """
+    n = len(energy)
+    if n == 0:
+        return [0, 0]
+
+    # Порог — среднее геометрическое уровня пауз и уровня речи
+    quiet, loud = np.percentile(energy, [2, 90])
+    threshold = max(float(np.sqrt(max(quiet, 1.0) * max(loud, 1.0))), 1e3)
+    silent = np.concatenate(([False], energy < threshold, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    min_len = max(1, min_silence_ms // frame_ms)
+    keep = (ends - starts) >= min_len
+    candidates = (starts[keep] + ends[keep]) // 2
+
+    target = int(target_s * 1000 / frame_ms)
+    longest = int(max_s * 1000 / frame_ms)
+    cuts = [0]
+    while n - cuts[-1] > longest:
+        last = cuts[-1]
+        lo = np.searchsorted(candidates, last + target // 2, side="left")
+        hi = np.searchsorted(candidates, last + longest, side="right")
+        window = candidates[lo:hi]
+        if len(window):
+            cut = int(window[np.argmin(np.abs(window - (last + target)))])
+        else:
+            cut = last + longest
+        cuts.append(cut)
+    cuts.append(n)
+    return cuts
+
+
+def segment_bounds(samples: np.ndarray, rate: int, target_s: float = 30.0,
+                   max_s: float = 60.0) -> List[Tuple[int, int]]:
+    """
+    Границы сегментов в отсчётах: подряд, без пропусков, от 0 до конца файла
+
+    Returns:
+        [(start, end), ...] — непустые полуинтервалы
+    """
+    frame = rate * FRAME_MS // 1000
+    cuts = find_cuts(frame_energy(samples, rate), target_s=target_s, max_s=max_s)
+    bounds = [c * frame for c in cuts]
+    bounds[-1] = len(samples)  # хвост короче кадра
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)
+            if bounds[i + 1] > bounds[i]]
+
+
+def _decode_segment(task: Tuple[str, int, int, int]) -> Dict:
+    """Распознать сегмент [start, end) в рабочем процессе"""
+    from vosk import KaldiRecognizer
+
+    path, start, end, index = task
+    samples, rate = open_wav_memmap(path)
+    offset = start / rate
+
+    rec = KaldiRecognizer(batch._worker_stt.model, rate)
+    rec.SetWords(True)
+    words = []
+    step = 8000
+    for pos in range(start, end, step):
+        if rec.AcceptWaveform(samples[pos:min(pos + step, end)].tobytes()):
+            words.extend(json.loads(rec.Result()).get("result", []))
+    words.extend(json.loads(rec.FinalResult()).get("result", []))
+
+    for w in words:
+        w["start"] = round(w["start"] + offset, 3)
+        w["end"] = round(w["end"] + offset, 3)
+    return {
+        "index": index,
+        "start": round(offset, 3),
+        "end": round(end / rate, 3),
+        "text": " ".join(w["word"] for w in words),
+        "words": words,
+    }
+
+
+def transcribe_long(path: str, model_path: str = batch.DEFAULT_MODEL, workers: int = 0,
+                    target_s: float = 30.0, max_s: float = 60.0) -> Dict:
+    """
+    Распознать длинный WAV параллельно по сегментам
+
+    Returns:
+        {"text", "segments": [...], "duration_s", "wall_s", "workers"}
+    """
+    start_time = time.perf_counter()
+    samples, rate = open_wav_memmap(path)
+    total = len(samples)
+    tasks = [(path, start, end, i) for i, (start, end)
+             in enumerate(segment_bounds(samples, rate, target_s, max_s))]
+    del samples
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    print(f"[Longform] {len(tasks)} сегментов, процессов: {workers}")
+
+    segments = []
+    with multiprocessing.Pool(workers, initializer=batch._init_worker, initargs=(model_path,)) as pool:
+        # imap сохраняет порядок сегментов, крупные куски обрабатываются параллельно
+        for segment in pool.imap(_decode_segment, tasks, chunksize=1):
+            segments.append(segment)
+
+    duration = total / rate
+    wall = time.perf_counter() - start_time
+    return {
+        "path": path,
+        "text": " ".join(s["text"] for s in segments if s["text"]),
+        "segments": segments,
+        "duration_s": round(duration, 3),
+        "wall_s": round(wall, 3),
+        "workers": workers,
+    }
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Параллельное распознавание длинного WAV")
+    parser.add_argument("path", help="WAV PCM16 mono")
+    parser.add_argument("-o", "--output", help="Сохранить результат в JSON")
+    parser.add_argument("-m", "--model", default=batch.DEFAULT_MODEL, help="Путь к модели Vosk")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="Процессов (0 — все ядра)")
+    parser.add_argument("--target", type=float, default=30.0, help="Желаемая длина сегмента, с")
+    parser.add_argument("--max", type=float, default=60.0, help="Максимальная длина сегмента, с")
+    args = parser.parse_args(argv)
+
+    result = transcribe_long(args.path, args.model, args.workers, args.target, args.max)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        print(result["text"])
+    print(f"[Longform] {result['duration_s']:.0f} с аудио за {result['wall_s']:.1f} с "
+          f"(x{result['duration_s'] / max(result['wall_s'], 1e-9):.1f}, процессов: {result['workers']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Двухуровневое распознавание команд: малая модель, большая — по требованию
+
+Малая модель слушает ключевое слово и делает первый проход по команде.
+Если уверенность первого прохода низкая или команда не сопоставилась
+с интентом, звук команды (он хранится в буфере) распознаётся заново
+большой моделью — но только когда есть свободный процессор и оценка
+времени (RTF большой модели × длительность звука) укладывается в
+допустимую добавку к задержке. Под нагрузкой ассистент просто
+остаётся на малой модели.
+
+Доля эскалаций, пропуски по нагрузке и добавленная задержка доступны
+через stats().
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.logger import log
+
+
+class LoadMonitor:
+    """Оценка свободной доли процессора"""
+
+    def __init__(self, min_interval: float = 0.5):
+        """
+        Args:
+            min_interval: Не чаще, чем раз во столько секунд, опрашивать систему
+        """
+        self.min_interval = min_interval
+        self._cpus = os.cpu_count() or 1
+        self._last = 0.0
+        self._headroom: Optional[float] = None
+        try:
+            import psutil
+
+            self._psutil = psutil
+            psutil.cpu_percent(interval=None)  # первый вызов задаёт точку отсчёта
+        except ImportError:
+            self._psutil = None
+
+    def headroom(self) -> Optional[float]:
+        """
+        Свободная доля процессора от 0 до 1
+
+        Returns:
+            None, если оценить нельзя (нет psutil и getloadavg)
+        """
+        now = time.monotonic()
+        if now - self._last < self.min_interval:
+            return self._headroom
+        self._last = now
+        if self._psutil is not None:
+            self._headroom = 1.0 - self._psutil.cpu_percent(interval=None) / 100.0
+        elif hasattr(os, "getloadavg"):
+            self._headroom = max(0.0, 1.0 - os.getloadavg()[0] / self._cpus)
+        else:
+            self._headroom = None
+        return self._headroom
+
+
+def result_confidence(result: Dict) -> Optional[float]:
+    """Средняя уверенность по словам результата Vosk (нужен SetWords(True))"""
+    words = result.get("result")
+    if not words:
+        return None
+    return float(np.mean([w.get("conf", 1.0) for w in words]))
+
+
+class TieredRecognizer:
+    """Повторное распознавание команды большой моделью при сомнениях"""
+
+    def __init__(self, factory: Optional[Callable[[], object]] = None,
+                 sample_rate: int = 16000,
+                 min_confidence: float = 0.7,
+                 max_added_latency: float = 1.5,
+                 min_headroom: float = 0.3,
+                 initial_rtf: float = 0.5,
+                 rtf_recovery: float = 0.2,
+                 monitor: Optional[LoadMonitor] = None):
+        """
+        Args:
+            factory: Создаёт распознаватель большой модели; может быть задан
+                позже через set_factory (когда модель догрузится)
+            sample_rate: Частота PCM16 в буфере команды
+            min_confidence: Ниже этой уверенности первый проход перепроверяется
+            max_added_latency: Допустимая добавка к ответу (с)
+            min_headroom: Минимальная свободная доля процессора
+            initial_rtf: Оценка RTF большой модели до первого замера
+            rtf_recovery: Доля, на которую оценка RTF возвращается к
+                initial_rtf при каждом пропуске по задержке
+            monitor: Источник загрузки процессора
+        """
+        self.sample_rate = sample_rate
+        self.min_confidence = min_confidence
+        self.max_added_latency = max_added_latency
+        self.min_headroom = min_headroom
+        self.monitor = monitor or LoadMonitor()
+        self.initial_rtf = initial_rtf
+        self.rtf_recovery = rtf_recovery
+        self.rtf = initial_rtf
+        self._rec = None
+        self._lock = threading.Lock()
+        self._added = deque(maxlen=512)
+        self.counts = {"first_pass": 0, "candidates": 0, "escalations": 0, "changed": 0,
+                       "skipped_not_ready": 0, "skipped_load": 0, "skipped_latency": 0}
+        if factory is not None:
+            self.set_factory(factory)
+
+    @property
+    def ready(self) -> bool:
+        return self._rec is not None
+
+    def set_factory(self, factory: Callable[[], object]):
+        """Подключить большую модель (распознаватель создаётся сразу)"""
+        rec = factory()
+        with self._lock:
+            self._rec = rec
+
+    def needs_second_pass(self, confidence: Optional[float], matched: bool) -> bool:
+        """Стоит ли перепроверять первый проход"""
+        self.counts["first_pass"] += 1
+        low = confidence is not None and confidence < self.min_confidence
+        if matched and not low:
+            return False
+        self.counts["candidates"] += 1
+        return True
+
+    def allowed(self, audio_seconds: float) -> bool:
+        """Хватает ли ресурсов на повторное распознавание прямо сейчас"""
+        if not self.ready:
+            self.counts["skipped_not_ready"] += 1
+            return False
+        headroom = self.monitor.headroom()
+        if headroom is not None and headroom < self.min_headroom:
+            self.counts["skipped_load"] += 1
+            log.info("tiering", "second pass skipped: cpu busy", headroom=round(headroom, 2))
+            return False
+        if self.rtf * audio_seconds > self.max_added_latency:
+            self.counts["skipped_latency"] += 1
+            log.info("tiering", "second pass skipped: too slow", rtf=round(self.rtf, 2),
+                     audio_seconds=round(audio_seconds, 2))
+            # Оценка без новых замеров остывает к начальной; если модель и
+            # правда медленная, следующий замер снова её поднимет
+            if self.rtf > self.initial_rtf:
+                self.rtf += (self.initial_rtf - self.rtf) * self.rtf_recovery
+            return False
+        return True
+
+    def redecode(self, chunks: List[bytes], first_text: str = "") -> Optional[str]:
+        """
+        Распознать звук команды большой моделью, если это сейчас допустимо
+
+        Args:
+            chunks: PCM16 команды
+            first_text: Результат первого прохода (для статистики)
+
+        Returns:
+            Текст второго прохода или None, если он не выполнялся
+        """
+        audio_seconds = sum(len(c) for c in chunks) / 2 / self.sample_rate
+        if not audio_seconds or not self.allowed(audio_seconds):
+            return None
+        start = time.perf_counter()
+        with self._lock:
+            rec = self._rec
+            for chunk in chunks:
+                rec.AcceptWaveform(chunk)
+            text = json.loads(rec.FinalResult()).get("text", "").strip()
+            if hasattr(rec, "Reset"):
+                rec.Reset()
+        elapsed = time.perf_counter() - start
+        # Скользящая оценка RTF: последние замеры весят больше
+        self.rtf = 0.7 * self.rtf + 0.3 * (elapsed / audio_seconds)
+        self._added.append(elapsed)
+        self.counts["escalations"] += 1
+        if text and text != first_text:
+            self.counts["changed"] += 1
+        log.info("tiering", "second pass", first=first_text, second=text,
+                 seconds=round(elapsed, 3), rtf=round(self.rtf, 2))
+        return text or None
+
+    def stats(self) -> Dict:
+        counts = dict(self.counts)
+        first = counts["first_pass"]
+        counts["escalation_rate"] = round(counts["escalations"] / first, 3) if first else 0.0
+        counts["rtf"] = round(self.rtf, 3)
+        if self._added:
+            ms = np.array(self._added) * 1000
+            counts["added_ms_p50"] = round(float(np.percentile(ms, 50)), 1)
+            counts["added_ms_p95"] = round(float(np.percentile(ms, 95)), 1)
+        return counts
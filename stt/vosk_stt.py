@@ -1,15 +1,18 @@
 import wave
 import json
-from vosk import Model, KaldiRecognizer
 from stt.base import STT
 
 class VoskSTT(STT):
     def __init__(self, model_path: str):
+        from vosk import Model
+
         print(f"Loading Vosk model from {model_path}...")
         self.model = Model(model_path)
         print("Model loaded.")
 
     def transcribe(self, filename: str) -> str:
+        from vosk import KaldiRecognizer
+
         wf = wave.open(filename, "rb")
         if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() not in [8000, 16000, 32000, 44100, 48000]:
             raise ValueError("Vosk требует WAV PCM16 mono с частотой 8/16/32/44/48kHz")
@@ -29,3 +32,21 @@ class VoskSTT(STT):
         res = json.loads(rec.FinalResult())
         result_text += res.get("text", "")
         return result_text.strip()
+
+    def transcribe_pcm(self, data: bytes, sample_rate: int = 16000) -> str:
+        """Распознать сырой PCM16 mono, уже находящийся в памяти"""
+        from vosk import KaldiRecognizer
+
+        rec = KaldiRecognizer(self.model, sample_rate)
+        result_text = ""
+        view = memoryview(data)
+        chunk = 4000 * 2
+
+        for offset in range(0, len(view), chunk):
+            if rec.AcceptWaveform(bytes(view[offset:offset + chunk])):
+                res = json.loads(rec.Result())
+                result_text += res.get("text", "") + " "
+
+        res = json.loads(rec.FinalResult())
+        result_text += res.get("text", "")
+        return result_text.strip()
@@ -0,0 +1,370 @@
+"""
+Распознавание в отдельном процессе
+
+Захват пишет PCM в SharedAudioRing (audio.ring), процесс-распознаватель
+читает его без копирования и возвращает тексты по Pipe. Сборка мусора,
+GIL и тяжёлые обработчики основного процесса больше не задерживают
+декодирование, а декодирование — аудио-callback. Если рабочий процесс
+падает, он перезапускается и продолжает с той же позиции кольца.
+
+Пример (нагрузочная проверка захвата, в процессе и вне его):
+    python -m stt.worker --load 0.8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from audio.ring import SharedAudioRing
+from core.logger import log
+
+DEFAULT_MODEL = "models/stt/vosk-model-small-ru-0.22"
+
+
+class VoskRecognizerFactory:
+    """Создаёт распознаватель Vosk в рабочем процессе (передаётся туда pickle'ом)"""
+
+    def __init__(self, model_path: str = DEFAULT_MODEL):
+        self.model_path = model_path
+
+    def __call__(self, sample_rate: int):
+        from vosk import Model, SetLogLevel
+        from transport.server import VoskStreamRecognizer
+
+        SetLogLevel(-1)
+        return VoskStreamRecognizer(Model(self.model_path), sample_rate)
+
+
+def _worker_main(ring_name: str, factory: Callable, sample_rate: int, conn,
+                 block_samples: int, poll_interval: float):
+    """Цикл рабочего процесса: кольцо -> распознаватель -> Pipe"""
+    ring = SharedAudioRing(name=ring_name)
+    try:
+        recognizer = factory(sample_rate)
+        conn.send({"type": "ready", "pid": os.getpid()})
+        while True:
+            while conn.poll():
+                command, seq = conn.recv()
+                if command == "stop":
+                    return
+                if command == "reset":
+                    ring.skip_to_end()
+                    recognizer.finish()
+                elif command == "finish":
+                    # Дочитать всё записанное до команды и закрыть фразу
+                    while True:
+                        block = ring.read(block_samples)
+                        if not len(block):
+                            break
+                        text = recognizer.accept(block.tobytes())
+                        if text:
+                            conn.send({"type": "text", "text": text})
+                    conn.send({"type": "final", "seq": seq, "text": recognizer.finish()})
+
+            block = ring.read(block_samples)
+            if not len(block):
+                time.sleep(poll_interval)
+                continue
+            # Vosk принимает только bytes — единственная копия на пути
+            text = recognizer.accept(block.tobytes())
+            if text:
+                conn.send({"type": "text", "text": text})
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        ring.close()
+
+
+class RecognizerProcess:
+    """Распознаватель в отдельном процессе с автоматическим перезапуском"""
+
+    def __init__(self,
+                 model_path: str = DEFAULT_MODEL,
+                 sample_rate: int = 16000,
+                 ring_seconds: float = 30.0,
+                 factory: Optional[Callable] = None,
+                 block_ms: int = 100,
+                 poll_interval: float = 0.01,
+                 max_restarts: int = 10):
+        """
+        Args:
+            model_path: Путь к модели Vosk (если factory не задана)
+            sample_rate: Частота PCM в кольце
+            ring_seconds: Ёмкость кольца в секундах
+            factory: factory(sample_rate) -> объект с accept(pcm) и finish();
+                вызывается в рабочем процессе, должна сериализоваться pickle
+            block_ms: Размер порции, которую рабочий процесс берёт из кольца
+            poll_interval: Пауза рабочего процесса, когда кольцо пусто (с)
+            max_restarts: Сколько раз подряд перезапускать упавший процесс
+        """
+        self.sample_rate = sample_rate
+        self.factory = factory or VoskRecognizerFactory(model_path)
+        self.ring_samples = int(ring_seconds * sample_rate)
+        self.block_samples = sample_rate * block_ms // 1000
+        self.poll_interval = poll_interval
+        self.max_restarts = max_restarts
+
+        # spawn: не наследуем потоки PortAudio и состояние основного процесса
+        self._ctx = multiprocessing.get_context("spawn")
+        self.ring: Optional[SharedAudioRing] = None
+        self.process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._texts: "queue.Queue[str]" = queue.Queue()
+        # (номер запроса finish, текст): ответ на запрос, по которому уже
+        # истёк таймаут, не должен достаться следующему
+        self._finals: "queue.Queue[Tuple[int, str]]" = queue.Queue()
+        self._finish_seq = 0
+        self._ready = threading.Event()
+        self._stopping = False
+        self._supervisor: Optional[threading.Thread] = None
+        self.restarts = 0
+
+    def start(self):
+        self.ring = SharedAudioRing(self.ring_samples)
+        self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True,
+                                            name="stt-supervisor")
+        self._supervisor.start()
+
+    def _spawn(self):
+        self._ready.clear()
+        parent_conn, child_conn = self._ctx.Pipe()
+        self.process = self._ctx.Process(
+            target=_worker_main, name="stt-worker", daemon=True,
+            args=(self.ring.name, self.factory, self.sample_rate, child_conn,
+                  self.block_samples, self.poll_interval))
+        self.process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def _supervise(self):
+        failures = 0
+        while not self._stopping:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                if self._stopping:
+                    break
+                self.process.join(timeout=1)
+                failures += 1
+                if failures > self.max_restarts:
+                    log.error("stt-worker", "restart limit reached", restarts=self.restarts)
+                    break
+                log.warning("stt-worker", "worker died, restarting",
+                            exitcode=self.process.exitcode, restarts=self.restarts + 1)
+                time.sleep(min(0.1 * 2 ** (failures - 1), 5.0))
+                self.restarts += 1
+                self._spawn()
+                continue
+
+            kind = message.get("type")
+            if kind == "ready":
+                failures = 0
+                self._ready.set()
+            elif kind == "text":
+                self._texts.put(message["text"])
+            elif kind == "final":
+                self._finals.put((message["seq"], message["text"]))
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться загрузки модели в рабочем процессе"""
+        return self._ready.wait(timeout)
+
+    def feed(self, samples: np.ndarray):
+        """Передать блок PCM16 (из аудио-callback, не блокируется)"""
+        self.ring.write(samples)
+
+    def get_text(self, timeout: Optional[float] = None) -> str:
+        """
+        Следующая распознанная фраза
+
+        Raises:
+            queue.Empty: за timeout ничего не распознано
+        """
+        return self._texts.get(timeout=timeout)
+
+    def finish(self, timeout: float = 5.0) -> str:
+        """Дораспознать накопленное и закрыть фразу"""
+        self._finish_seq += 1
+        seq = self._finish_seq
+        self._send("finish", seq)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                answered, text = self._finals.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return ""
+            # Запоздавший ответ на прошлый finish отбрасывается: его фраза уже
+            # была отдана как пустая
+            if answered == seq:
+                return text
+
+    def reset(self):
+        """Отбросить непрочитанный звук и незаконченную фразу"""
+        self._send("reset")
+        while not self._texts.empty():
+            self._texts.get_nowait()
+
+    def pending(self) -> int:
+        """Сколько отсчётов ещё не прочитано рабочим процессом"""
+        return self.ring.available() if self.ring is not None else 0
+
+    def _send(self, command: str, seq: Optional[int] = None):
+        with self._send_lock:
+            try:
+                self._conn.send((command, seq))
+            except (BrokenPipeError, OSError):
+                pass  # процесс перезапускается, команда неактуальна
+
+    def stop(self):
+        self._stopping = True
+        if self.process is not None:
+            self._send("stop")
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self._conn is not None:
+            self._conn.close()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def stats(self) -> Dict:
+        return {
+            "pid": self.process.pid if self.process is not None else None,
+            "restarts": self.restarts,
+            "pending_samples": self.pending(),
+            "lost_samples": self.ring.lost_samples if self.ring is not None else 0,
+        }
+
+
+class BusyRecognizer:
+    """
+    Заглушка распознавателя для нагрузочной проверки
+
+    Занимает CPU долями по ~30 мс, не отпуская GIL (сортировка списка —
+    один вызов C-кода), как расширения и сборщик мусора в реальном процессе.
+    """
+
+    def __init__(self, load: float, sample_rate: int):
+        self.load = load
+        self.sample_rate = sample_rate
+        self._work = [((i * 7919) % 100003) / 7.0 for i in range(150_000)]
+
+    def accept(self, pcm: bytes) -> Optional[str]:
+        deadline = time.perf_counter() + self.load * len(pcm) / 2 / self.sample_rate
+        while time.perf_counter() < deadline:
+            sorted(self._work)
+        return None
+
+    def finish(self) -> str:
+        return ""
+
+
+class BusyFactory:
+    def __init__(self, load: float):
+        self.load = load
+
+    def __call__(self, sample_rate: int):
+        return BusyRecognizer(self.load, sample_rate)
+
+
+def _capture_jitter(sink: Callable[[np.ndarray], None], seconds: float, sample_rate: int,
+                    block_ms: int, background: Callable[[], None]) -> Dict:
+    """
+    Имитировать аудио-callback: каждые block_ms отдавать блок в sink и
+    мерить опоздание. Опоздание больше длительности блока — это overrun
+    буфера PortAudio при двойной буферизации.
+    """
+    block = np.zeros(sample_rate * block_ms // 1000, dtype=np.int16)
+    period = block_ms / 1000
+    lateness = []
+
+    def capture():
+        next_at = time.perf_counter()
+        end = next_at + seconds
+        while next_at < end:
+            next_at += period
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lateness.append(time.perf_counter() - next_at)
+            sink(block)
+
+    thread = threading.Thread(target=capture, name="capture")
+    thread.start()
+    threading.Thread(target=background, daemon=True).start()
+    thread.join()
+    late = np.array(lateness) * 1000
+    return {
+        "blocks": len(late),
+        "p99_late_ms": round(float(np.percentile(late, 99)), 2),
+        "max_late_ms": round(float(late.max()), 2),
+        "overruns": int(np.sum(late > block_ms)),
+    }
+
+
+def benchmark(load: float = 0.8, seconds: float = 10.0, sample_rate: int = 16000,
+              block_ms: int = 20) -> Dict[str, Dict]:
+    """
+    Сравнить опоздания захвата при распознавании в процессе и вне его
+
+    Args:
+        load: Доля реального времени, которую «распознаватель» занимает CPU
+        seconds: Длительность прогона
+        sample_rate: Частота
+        block_ms: Период имитируемого callback
+    """
+    results = {}
+
+    # В процессе: распознаватель в соседнем потоке делит GIL с захватом
+    rec = BusyRecognizer(load, sample_rate)
+    blocks: "queue.Queue[np.ndarray]" = queue.Queue()
+    deadline = time.perf_counter() + seconds
+
+    def decode_inline():
+        while time.perf_counter() < deadline:
+            try:
+                rec.accept(blocks.get(timeout=0.1).tobytes())
+            except queue.Empty:
+                pass
+
+    results["in_process"] = _capture_jitter(blocks.put, seconds, sample_rate, block_ms,
+                                            decode_inline)
+
+    worker = RecognizerProcess(sample_rate=sample_rate, factory=BusyFactory(load))
+    worker.start()
+    worker.wait_ready(timeout=30)
+    try:
+        results["worker_process"] = _capture_jitter(worker.feed, seconds, sample_rate,
+                                                    block_ms, lambda: None)
+        results["worker_process"].update(worker.stats())
+    finally:
+        worker.stop()
+    return results
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Нагрузочная проверка захвата с распознаванием")
+    parser.add_argument("--load", type=float, default=0.8,
+                        help="Нагрузка распознавателя (доля реального времени)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--block-ms", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    for mode, r in benchmark(args.load, args.seconds, block_ms=args.block_ms).items():
+        print(f"[{mode}] {json.dumps(r, ensure_ascii=False)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def handler():
+    """Обработчик команд на каталоге репозитория (без TTS и плеера)"""
+    from commands import CommandHandler
+
+    return CommandHandler(os.path.join(ROOT, "commands.json"))
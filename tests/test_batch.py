@@ -0,0 +1,72 @@
+import json
+
+from stt import batch
+
+
+class FakeSTT:
+    def __init__(self, failing):
+        self.failing = failing
+
+    def transcribe(self, path):
+        if path in self.failing:
+            raise RuntimeError("decode failed")
+        return "текст"
+
+
+class InlinePool:
+    """Пул без процессов: задачи выполняются в тесте"""
+
+    def __init__(self, workers, initializer=None, initargs=()):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def imap_unordered(self, func, items, chunksize=1):
+        return map(func, items)
+
+
+def _wav(path):
+    import wave
+
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\0\0" * 1600)
+    return str(path)
+
+
+def _read(output):
+    with open(output, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_retries_errors_without_duplicates(tmp_path, monkeypatch):
+    paths = [_wav(tmp_path / f"{i}.wav") for i in range(3)]
+    output = str(tmp_path / "out.jsonl")
+    failing = {paths[1]}
+    monkeypatch.setattr(batch.multiprocessing, "Pool", InlinePool)
+    monkeypatch.setattr(batch, "_init_worker", lambda model: setattr(batch, "_worker_stt", FakeSTT(failing)))
+
+    summary = batch.run_batch(paths, output)
+    assert summary["errors"] == 1
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"path": "обрыв')  # недописанная строка после прерывания
+
+    # Файл всё ещё не распознаётся: в результатах одна запись об ошибке, а не две
+    summary = batch.run_batch(paths, output, resume=True)
+    assert summary["files"] == 1
+    records = _read(output)
+    assert sorted(r["path"] for r in records) == sorted(paths)
+    assert [r["path"] for r in records if "error" in r] == [paths[1]]
+
+    failing.clear()
+    summary = batch.run_batch(paths, output, resume=True)
+    assert (summary["files"], summary["errors"]) == (1, 0)
+    records = _read(output)
+    assert sorted(r["path"] for r in records) == sorted(paths)
+    assert all(r["text"] == "текст" for r in records)
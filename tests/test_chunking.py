@@ -0,0 +1,46 @@
+import threading
+
+import numpy as np
+
+from audio.chunking import Rechunker
+
+
+def test_push_yields_fixed_chunks():
+    rechunker = Rechunker(160)
+    samples = np.arange(400, dtype=np.int16)
+    chunks = rechunker.push(samples[:100]) + rechunker.push(samples[100:])
+    assert [len(c) for c in chunks] == [320, 320]
+    assert b"".join(chunks) == samples[:320].tobytes()
+    assert rechunker.pending == 80
+
+
+def test_clear_is_applied_by_next_push():
+    rechunker = Rechunker(160)
+    rechunker.push(np.full(100, 1, dtype=np.int16))
+    rechunker.clear()
+    chunks = rechunker.push(np.full(160, 2, dtype=np.int16))
+    assert chunks == [np.full(160, 2, dtype=np.int16).tobytes()]
+    assert rechunker.pending == 0
+
+
+def test_clear_from_another_thread_never_mixes_blocks():
+    rechunker = Rechunker(160)
+    stop = threading.Event()
+
+    def clear_loop():
+        while not stop.is_set():
+            rechunker.clear()
+
+    clearer = threading.Thread(target=clear_loop)
+    clearer.start()
+    try:
+        for value in range(1, 2000):
+            # Отсчёты порции идут по порядку блоков: сброс посреди копирования
+            # оставил бы в конце буфера хвост старых данных
+            for chunk in rechunker.push(np.full(100, value, dtype=np.int16)):
+                got = np.frombuffer(chunk, dtype=np.int16)
+                assert len(got) == 160
+                assert np.all(np.diff(got) >= 0)
+    finally:
+        stop.set()
+        clearer.join()
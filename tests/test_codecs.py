@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from transport import codecs
+
+
+def _speech(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 16000
+    x = np.sin(2 * np.pi * 220 * t) * 6000 + rng.normal(0, 300, n)
+    return np.clip(x, -32768, 32767).astype("<i2")
+
+
+@pytest.mark.parametrize("name", list(codecs.CODECS))
+@pytest.mark.parametrize("n", [1, 2, 441, 1000, 1001])
+def test_round_trip_length(name, n):
+    pcm = _speech(n)
+    enc, dec = codecs.get_codec(name).encoder(), codecs.get_codec(name).decoder()
+    restored = np.frombuffer(dec.decode(enc.encode(pcm.tobytes())), dtype="<i2")
+    assert len(restored) == n
+
+
+@pytest.mark.parametrize("n, size", [(1000, 504), (1001, 505), (441, 225)])
+def test_adpcm_frame_size(n, size):
+    encoded = codecs.get_codec("ima_adpcm").encoder().encode(_speech(n).tobytes())
+    assert len(encoded) == size
+
+
+def test_adpcm_odd_frames_stream():
+    """Поток нечётных кадров (20 мс на 22.05 кГц) декодируется без сдвига"""
+    pcm = _speech(441 * 20)
+    enc, dec = codecs.get_codec("ima_adpcm").encoder(), codecs.get_codec("ima_adpcm").decoder()
+    frames = [enc.encode(pcm[i:i + 441].tobytes()) for i in range(0, len(pcm), 441)]
+    restored = np.frombuffer(b"".join(dec.decode(f) for f in frames), dtype="<i2")
+    assert len(restored) == len(pcm)
+    noise = np.mean((restored.astype(np.float64) - pcm) ** 2)
+    assert 10 * np.log10(np.mean(pcm.astype(np.float64) ** 2) / noise) > 25
+
+
+def test_default_preference_is_g711():
+    assert codecs.negotiate(["ima_adpcm", "ulaw", "pcm16"]) == "ulaw"
+    assert codecs.negotiate(["ima_adpcm", "pcm16"]) == "ima_adpcm"
+    assert codecs.negotiate(["opus"]) == "pcm16"
+
+
+@pytest.mark.parametrize("payload", [b"", b"\x01", b"\x01\x02", b"\x01\x02\x03",
+                                     b"\0\0\x63\0\0\0", b"\0\0\0\x01"])
+def test_adpcm_rejects_malformed_frames(payload):
+    from transport.protocol import ProtocolError
+
+    with pytest.raises(ProtocolError):
+        codecs.get_codec("ima_adpcm").decoder().decode(payload)
+
+
+def test_pcm16_rejects_odd_length():
+    from transport.protocol import ProtocolError
+
+    with pytest.raises(ProtocolError):
+        codecs.get_codec("pcm16").decoder().decode(b"\0\0\0")
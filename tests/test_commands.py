@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from core.normalize import normalizer, stem
+
+
+@pytest.mark.parametrize("text", ["покажи погоду", "пока не надо", "выходные", "выходи гулять"])
+def test_farewell_not_matched_inside_speech(handler, text):
+    assert handler.match(text) != "farewell"
+
+
+@pytest.mark.parametrize("text", ["пока", "пока пока", "до свидания", "Выход!"])
+def test_farewell_standalone(handler, text):
+    assert handler.match(text) == "farewell"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("включите музыку", "music_play"),
+    ("что сейчас играет", "now_playing"),
+    ("который час", "get_time"),
+])
+def test_word_forms(handler, text, intent):
+    assert handler.match(text) == intent
+
+
+def test_stems_match_whole_words():
+    assert stem("покажи") != stem("пока")
+    assert normalizer.text("Включите свет") == normalizer.text("включи свет")
+    assert normalizer.text("зажги лампу") == normalizer.text("включи свет")
+
+
+def test_startup_imports_skip_numpy():
+    code = "import sys, main, commands, daemon; print('numpy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "False"
+
+
+def test_intent_published_before_handler_events(handler):
+    from transport.events import ErrorEvent, IntentMatched, TTSStarted, bus
+
+    seen = []
+    subs = [bus.subscribe(t, lambda e: seen.append(type(e).__name__), inline=True)
+            for t in (IntentMatched, TTSStarted, ErrorEvent)]
+    original = handler.speak
+    try:
+        handler.speak = lambda text: bus.publish(TTSStarted(source="test", text=text))
+        assert handler.dispatch("который час") == "get_time"
+        assert seen == ["IntentMatched", "TTSStarted"]
+
+        seen.clear()
+        handler.speak = lambda text: 1 / 0
+        assert handler.dispatch("который час") is None
+        assert seen == ["IntentMatched", "ErrorEvent"]
+    finally:
+        handler.speak = original
+        for sub in subs:
+            bus.unsubscribe(sub)
+    assert not bus.wants(TTSStarted)
+
+
+class FakeMedia:
+    def __init__(self):
+        self.calls = []
+
+    def pause(self):
+        self.calls.append("pause")
+
+
+@pytest.fixture
+def assistant(monkeypatch):
+    """VoiceAssistant без модели и звука: только execute_command на каталоге"""
+    from commands import CommandHandler
+    from main import VoiceAssistant
+
+    handler = CommandHandler(os.path.join(ROOT, "commands.json"))
+    handler._media = FakeMedia()
+    handler.spoken = []
+    monkeypatch.setattr(handler, "speak", handler.spoken.append)
+    assistant = VoiceAssistant.__new__(VoiceAssistant)
+    assistant.command_handler = handler
+    assistant.tiering = None
+    assistant.flight = None
+    assistant.stop_requested = False
+    return assistant
+
+
+@pytest.mark.parametrize("text", ["покажи погоду", "пока не надо", "всё равно который час"])
+def test_dialogue_continues_on_speech_with_goodbye_words(assistant, text):
+    assert assistant.execute_command(text) is True
+    assert not assistant.stop_requested
+
+
+@pytest.mark.parametrize("text", ["пока", "до свидания"])
+def test_dialogue_ends_on_farewell(assistant, text):
+    assert assistant.execute_command(text) is False
+    assert assistant.stop_requested
+
+
+def test_stop_pauses_music_instead_of_ending_dialogue(assistant):
+    assert assistant.execute_command("стоп") is True
+    assert assistant.command_handler.media.calls == ["pause"]
+    assert not assistant.stop_requested
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from conftest import ROOT
+from daemon import AssistantDaemon
+
+
+async def _request(socket_path, cmd, **fields):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write((json.dumps({"cmd": cmd, **fields}) + "\n").encode())
+    await writer.drain()
+    response = json.loads(await asyncio.wait_for(reader.readline(), 5))
+    writer.close()
+    return response
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    from commands import CommandHandler
+
+    daemon = AssistantDaemon(socket_path=str(tmp_path / "assistant.sock"))
+    daemon.command_handler = CommandHandler(os.path.join(ROOT, "commands.json"))
+    daemon.command_handler.speak = lambda text: None
+    return daemon
+
+
+def test_farewell_does_not_stop_daemon(daemon):
+    async def scenario():
+        server = asyncio.create_task(daemon.serve())
+        while not os.path.exists(daemon.socket_path):
+            await asyncio.sleep(0.01)
+        response = await _request(daemon.socket_path, "execute", text="до свидания")
+        alive = await _request(daemon.socket_path, "ping")
+        await _request(daemon.socket_path, "shutdown")
+        await asyncio.wait_for(server, 5)
+        return response, alive
+
+    response, alive = asyncio.run(scenario())
+    assert (response["matched"], response["intent"]) == (True, "farewell")
+    assert alive["ok"]
+    assert not os.path.exists(daemon.socket_path)
+
+
+def test_live_socket_is_not_stolen(daemon, tmp_path):
+    async def scenario():
+        server = asyncio.create_task(daemon.serve())
+        while not os.path.exists(daemon.socket_path):
+            await asyncio.sleep(0.01)
+        second = AssistantDaemon(socket_path=daemon.socket_path)
+        with pytest.raises(RuntimeError):
+            await second.serve()
+        alive = await _request(daemon.socket_path, "ping")
+        await _request(daemon.socket_path, "shutdown")
+        await asyncio.wait_for(server, 5)
+        return alive
+
+    assert asyncio.run(scenario())["ok"]
+
+
+def test_stale_socket_is_replaced(daemon):
+    import socket
+
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(daemon.socket_path)
+    stale.close()  # Файл остался, слушателя нет
+
+    async def scenario():
+        server = asyncio.create_task(daemon.serve())
+        await asyncio.sleep(0.05)
+        alive = await _request(daemon.socket_path, "ping")
+        await _request(daemon.socket_path, "shutdown")
+        await asyncio.wait_for(server, 5)
+        return alive
+
+    assert asyncio.run(scenario())["ok"]
+
+
+def test_socket_is_owner_only(daemon):
+    import stat
+
+    async def scenario():
+        server = asyncio.create_task(daemon.serve())
+        while not os.path.exists(daemon.socket_path):
+            await asyncio.sleep(0.01)
+        mode = stat.S_IMODE(os.stat(daemon.socket_path).st_mode)
+        await _request(daemon.socket_path, "shutdown")
+        await asyncio.wait_for(server, 5)
+        return mode
+
+    assert asyncio.run(scenario()) == 0o600
+
+
+def test_default_socket_in_runtime_dir(monkeypatch, tmp_path):
+    from daemonctl import default_socket_path
+
+    monkeypatch.delenv("VOICE_ASSISTANT_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_socket_path() == str(tmp_path / "voice-assistant.sock")
+    monkeypatch.setenv("VOICE_ASSISTANT_SOCKET", "/run/custom.sock")
+    assert default_socket_path() == "/run/custom.sock"
+    monkeypatch.delenv("VOICE_ASSISTANT_SOCKET")
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert default_socket_path() == "/tmp/voice-assistant.sock"
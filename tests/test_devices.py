@@ -0,0 +1,77 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from audio import devices
+from audio.devices import PolyphaseResampler
+
+
+def signal(seconds, rate, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(rate * seconds)) / rate
+    x = 8000 * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 1000, len(t))
+    return x.astype(np.int16)
+
+
+def uneven(x, seed=1):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(0, 2000, len(x) // 500)  # в том числе пустые и одноотсчётные блоки
+    sizes[::7] = 1
+    sizes[::11] = 0
+    bounds = np.minimum(np.cumsum(sizes), len(x))
+    parts = np.split(x, bounds)
+    assert sum(len(p) for p in parts) == len(x)
+    return parts
+
+
+@pytest.mark.parametrize("in_rate", [48000, 44100, 22050, 8000])
+def test_block_boundaries_do_not_change_output(in_rate):
+    x = signal(1.5, in_rate)
+    whole = PolyphaseResampler(in_rate, 16000).process(x)
+    streaming = PolyphaseResampler(in_rate, 16000)
+    pieces = np.concatenate([streaming.process(block) for block in uneven(x)])
+    assert pieces.dtype == np.int16
+    np.testing.assert_array_equal(pieces, whole)
+    assert abs(len(whole) - len(x) * 16000 / in_rate) <= 1
+
+
+def test_reset_starts_a_new_stream():
+    x = signal(0.5, 48000)
+    resampler = PolyphaseResampler(48000, 16000)
+    first = resampler.process(x)
+    resampler.reset()
+    np.testing.assert_array_equal(resampler.process(x), first)
+
+
+@pytest.fixture
+def fake_sd(monkeypatch):
+    sd = types.SimpleNamespace(native=48000, supported=set())
+
+    def query_devices(device, kind):
+        return {"name": "fake", "default_samplerate": float(sd.native)}
+
+    def check_input_settings(device=None, channels=1, dtype="int16", samplerate=None):
+        if samplerate not in sd.supported:
+            raise ValueError(f"Invalid sample rate {samplerate}")
+
+    sd.query_devices = query_devices
+    sd.check_input_settings = check_input_settings
+    monkeypatch.setitem(sys.modules, "sounddevice", sd)
+    return sd
+
+
+@pytest.mark.parametrize("supported, expected", [
+    ({48000, 16000, 44100}, 48000),  # родная частота
+    ({16000, 44100}, 16000),  # родная не открывается — целевая
+    ({44100, 22050}, 44100),  # первая из COMMON_RATES
+])
+def test_negotiate_input_rate_fallback(fake_sd, supported, expected):
+    fake_sd.supported = supported
+    assert devices.negotiate_input_rate(target=16000) == expected
+
+
+def test_negotiate_input_rate_nothing_supported(fake_sd):
+    with pytest.raises(RuntimeError):
+        devices.negotiate_input_rate()
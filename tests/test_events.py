@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from transport.events import (DROP_NEWEST, DROP_OLDEST, ErrorEvent, Event, EventBus,
+                              FinalTranscript, IntentMatched, WakeDetected)
+
+
+@pytest.fixture
+def bus():
+    bus = EventBus()
+    yield bus
+    bus.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def blocked_subscriber(bus, policy):
+    """Подписчик, занятый первым событием, пока тест не откроет gate"""
+    gate, busy, received = threading.Event(), threading.Event(), []
+
+    def handler(event):
+        busy.set()
+        gate.wait(2)
+        received.append(event.text)
+
+    sub = bus.subscribe(FinalTranscript, handler, maxsize=3, policy=policy)
+    bus.publish(FinalTranscript(text="0"))
+    assert busy.wait(2)
+    for i in range(1, 7):
+        bus.publish(FinalTranscript(text=str(i)))
+    gate.set()
+    assert wait_for(lambda: sub.delivered == 4)
+    return sub, received
+
+
+def test_drop_oldest_keeps_fresh_events(bus):
+    sub, received = blocked_subscriber(bus, DROP_OLDEST)
+    assert received == ["0", "4", "5", "6"]
+    assert sub.dropped == 3
+
+
+def test_drop_newest_keeps_queued_events(bus):
+    sub, received = blocked_subscriber(bus, DROP_NEWEST)
+    assert received == ["0", "1", "2", "3"]
+    assert sub.dropped == 3
+
+
+def test_unknown_policy(bus):
+    with pytest.raises(ValueError):
+        bus.subscribe(Event, print, policy="drop_all")
+
+
+def test_inline_runs_in_publisher_thread(bus):
+    threads = []
+    bus.subscribe(WakeDetected, lambda e: threads.append(threading.get_ident()), inline=True)
+    bus.publish(WakeDetected(keyword="джарвис"))
+    assert threads == [threading.get_ident()]
+
+
+def test_queued_runs_in_own_thread(bus):
+    threads = []
+    sub = bus.subscribe(WakeDetected, lambda e: threads.append(threading.get_ident()))
+    bus.publish(WakeDetected(keyword="джарвис"))
+    assert wait_for(lambda: sub.delivered == 1)
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_coroutine_handler_runs_in_its_loop(bus):
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        seen = []
+
+        async def handler(event):
+            seen.append((event.intent, asyncio.get_running_loop() is loop))
+
+        sub = bus.subscribe(IntentMatched, handler)
+        # Публикация из чужого потока
+        threading.Thread(target=bus.publish, args=(IntentMatched(intent="time"),)).start()
+        for _ in range(200):
+            if sub.delivered:
+                break
+            await asyncio.sleep(0.01)
+        bus.unsubscribe(sub)
+        await asyncio.sleep(0)
+        return seen
+
+    assert asyncio.run(scenario()) == [("time", True)]
+
+
+def test_coroutine_cannot_be_inline(bus):
+    async def handler(event):
+        pass
+
+    with pytest.raises(ValueError):
+        bus.subscribe(Event, handler, inline=True)
+
+
+def test_wants_follows_subscriptions(bus):
+    assert not bus.wants(FinalTranscript)
+    sub = bus.subscribe(Event, lambda e: None, inline=True)
+    assert bus.wants(FinalTranscript)  # подписка на базовый тип получает подтипы
+    bus.unsubscribe(sub)
+    assert not bus.wants(FinalTranscript)  # кэш маршрутов сброшен
+    bus.publish(FinalTranscript(text="никому"))
+    assert bus.published == 0
+
+
+def test_unsubscribe_stops_delivery(bus):
+    received = []
+    sub = bus.subscribe(FinalTranscript, lambda e: received.append(e.text))
+    bus.publish(FinalTranscript(text="первое"))
+    assert wait_for(lambda: sub.delivered == 1)
+    bus.unsubscribe(sub)
+    bus.publish(FinalTranscript(text="второе"))
+    sub._thread.join(1)
+    assert not sub._thread.is_alive()
+    assert received == ["первое"]
+    assert bus.stats() == []
+
+
+def test_handler_error_becomes_error_event(bus):
+    errors = []
+    bus.subscribe(ErrorEvent, lambda e: errors.append(e.message), inline=True)
+
+    def broken(event):
+        raise RuntimeError("сломался")
+
+    sub = bus.subscribe(WakeDetected, broken, inline=True)
+    bus.publish(WakeDetected())
+    assert errors == ["сломался"] and sub.errors == 1
+
+    # Сбой подписчика ErrorEvent не публикуется повторно
+    bus.subscribe(ErrorEvent, broken, inline=True)
+    bus.publish(WakeDetected())
+    assert errors == ["сломался", "сломался"]
@@ -0,0 +1,59 @@
+import shutil
+import time
+
+import pytest
+
+from core.executor import CommandExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = CommandExecutor(max_concurrency=2, default_timeout=5.0)
+    yield executor
+    executor.shutdown(wait=0.5)
+
+
+needs_sleep = pytest.mark.skipif(shutil.which("sleep") is None, reason="нет sleep")
+
+
+@needs_sleep
+def test_timeout_kills_process(executor):
+    start = time.perf_counter()
+    result = executor.run(["sleep", "10"], name="hang", timeout=0.2).result(5)
+    assert time.perf_counter() - start < 2
+    assert result.timed_out and not result.ok
+    assert result.returncode is not None and result.returncode < 0  # убит сигналом
+    assert executor.stats()[0]["timeouts"] == 1
+
+
+@needs_sleep
+def test_concurrency_cap(executor):
+    start = time.perf_counter()
+    futures = [executor.run(["sleep", "0.3"], name="sleep") for _ in range(4)]
+    results = [f.result(5) for f in futures]
+    elapsed = time.perf_counter() - start
+    assert all(r.ok for r in results)
+    # Не больше двух одновременно: две волны по 0.3 с, но не четыре
+    assert 0.55 < elapsed < 1.1
+
+
+def test_missing_binary_is_a_result_not_an_exception(executor):
+    done = []
+    result = executor.run(["no-such-binary-voice-assistant"], on_done=done.append).result(5)
+    assert not result.ok
+    assert result.returncode is None and result.error
+    assert done == [result]
+    assert executor.stats()[0]["failures"] == 1
+
+
+def test_latency_table(executor):
+    assert "пока нет" in executor.latency_table()
+    executor.record("handler:time", 0.004)
+    executor.record("handler:time", 0.006)
+    executor.record("handler:weather", 0.2, ok=False)
+    lines = executor.latency_table().splitlines()
+    assert lines[0].split()[:4] == ["действие", "запусков", "ошибок", "таймаутов"]
+    rows = {line.split()[0]: line.split()[1:] for line in lines[1:]}
+    assert rows["handler:time"][:3] == ["2", "0", "0"]
+    assert rows["handler:time"][3] == "5.0"  # p50, мс
+    assert rows["handler:weather"][:3] == ["1", "1", "0"]
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+
+from core.flight import FlightRecorder
+
+PERIOD = 30000
+
+
+def test_snapshot_orders_wrapped_ring():
+    recorder = FlightRecorder(sample_rate=100, seconds=1.0)
+    recorder.write(np.arange(250, dtype=np.int16))
+    audio, start, _ = recorder.snapshot()
+    assert start == 150
+    assert audio.tolist() == list(range(150, 250))
+
+
+def test_snapshot_is_consistent_while_writing():
+    recorder = FlightRecorder(sample_rate=1000, seconds=1.0)
+    stop = threading.Event()
+
+    def write_loop():
+        # Отсчёт хранит свой номер (по модулю PERIOD): по копии видно, цельная ли она
+        position = 0
+        while not stop.is_set():
+            block = (np.arange(position, position + 160) % PERIOD).astype(np.int16)
+            recorder.write(block)
+            position += 160
+
+    writer = threading.Thread(target=write_loop)
+    writer.start()
+    try:
+        for _ in range(300):
+            audio, start, _ = recorder.snapshot()
+            if not len(audio):
+                continue
+            assert int(audio[0]) == start % PERIOD
+            assert np.all(np.diff(audio.astype(np.int64)) % PERIOD == 1)
+    finally:
+        stop.set()
+        writer.join()
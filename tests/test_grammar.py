@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from conftest import ROOT
+from stt.grammar import CommandGrammar, GrammarRecognizer, UNKNOWN, number_words, parse_number
+
+
+@pytest.mark.parametrize("text, value", [
+    ("громкость пятьдесят", 50),
+    ("громкость пятьдесят пять процентов", 55),
+    ("сделай громкость двадцать", 20),
+    ("громкость семнадцать", 17),
+    ("громкость ноль", 0),
+    ("громкость сто", 100),
+    ("громкость девяносто девять", 99),
+    ("пять два", 5),
+    ("сделай громче", None),
+])
+def test_parse_number(text, value):
+    assert parse_number(text) == value
+
+
+def test_every_number_word_parses():
+    assert all(parse_number(word) is not None for word in number_words()
+               if not word.startswith("процент"))
+
+
+class FakeMedia:
+    def __init__(self):
+        self.volume = None
+        self.changes = []
+
+    def set_volume(self, level):
+        self.volume = level
+
+    def change_volume(self, delta):
+        self.changes.append(delta)
+
+
+@pytest.fixture
+def volume_handler():
+    import os
+
+    from commands import CommandHandler
+
+    handler = CommandHandler(os.path.join(ROOT, "commands.json"))
+    handler.speak = lambda text: None
+    handler._media = FakeMedia()
+    return handler
+
+
+@pytest.mark.parametrize("text, level", [
+    ("громкость пятьдесят", 50),
+    ("громкость 30", 30),
+    ("громкость сорок пять процентов", 45),
+])
+def test_volume_from_number_words(volume_handler, text, level):
+    assert volume_handler.dispatch(text) == "music_volume"
+    assert volume_handler.media.volume == level
+
+
+class FakeRecognizer:
+    """Распознаватель с заранее заданным результатом фразы"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.accepted = []
+        self.resets = 0
+        self.finals = 0
+
+    def AcceptWaveform(self, data):
+        self.accepted.append(data)
+        return False
+
+    def FinalResult(self):
+        self.finals += 1
+        return json.dumps({"text": self.text})
+
+    def Result(self):
+        return self.FinalResult()
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def Reset(self):
+        self.resets += 1
+        self.accepted = []
+
+
+def test_out_of_grammar_phrase_goes_to_fallback():
+    grammar = CommandGrammar(f"{ROOT}/commands.json")
+    fallback = FakeRecognizer("какая завтра погода")
+    rec = GrammarRecognizer(lambda g: FakeRecognizer(UNKNOWN), fallback, grammar)
+    for _ in range(3):
+        rec.AcceptWaveform(b"\0" * 3200)
+    result = json.loads(rec.FinalResult())
+    assert result == {"text": "какая завтра погода", "grammar": False}
+    assert (fallback.resets, fallback.finals, len(fallback.accepted)) == (1, 1, 3)
+
+    in_grammar = GrammarRecognizer(lambda g: FakeRecognizer("включи музыку"), fallback, grammar)
+    in_grammar.AcceptWaveform(b"\0" * 3200)
+    assert json.loads(in_grammar.FinalResult())["grammar"] is True
+    assert fallback.finals == 1
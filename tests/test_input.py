@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from audio.input import ChannelSelector
+
+BLOCK = 1600
+
+
+def noise(frames, channels, std, seed):
+    return np.random.default_rng(seed).normal(0, std, (frames, channels))
+
+
+def test_best_channel_follows_snr_with_hysteresis():
+    selector = ChannelSelector(3, mode="best")
+    quiet = noise(BLOCK, 3, 30, seed=0).astype(np.int16)
+    selector.process(quiet)  # уровень шума по каналам
+
+    t = np.arange(BLOCK) / 16000
+    speech = noise(BLOCK, 3, 30, seed=1)
+    speech[:, 2] += 5000 * np.sin(2 * np.pi * 300 * t)
+    block = speech.astype(np.int16)
+    out = selector.process(block)
+    assert selector.current == 2
+    np.testing.assert_array_equal(out, block[:, 2])
+
+    # Канал 1 чуть громче — в пределах switch_ratio переключения нет
+    close = noise(BLOCK, 3, 30, seed=2)
+    close[:, 1] += 5500 * np.sin(2 * np.pi * 300 * t)
+    close[:, 2] += 5000 * np.sin(2 * np.pi * 300 * t)
+    selector.process(close.astype(np.int16))
+    assert selector.current == 2
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ChannelSelector(2, mode="loudest")
+
+
+def delayed_channels(source, delays):
+    frames = len(source)
+    channels = np.zeros((frames, len(delays)))
+    for ch, d in enumerate(delays):
+        channels[d:, ch] = source[:frames - d]
+    return channels
+
+
+def test_beam_aligns_delayed_channels():
+    selector = ChannelSelector(3, mode="beam", max_lag=16)
+    source = np.random.default_rng(3).normal(0, 3000, BLOCK * 6).round()
+    mic = delayed_channels(source, [0, 3, 7]).astype(np.int16)
+    out = np.concatenate([selector.process(mic[i:i + BLOCK])
+                          for i in range(0, len(mic), BLOCK)])
+    # Каналы сведены к опорному; выход запаздывает на max_lag отсчётов
+    lag = selector.max_lag
+    np.testing.assert_array_equal(out[BLOCK + lag:], source[BLOCK:len(out) - lag].astype(np.int16))
+
+
+def test_beam_beats_single_microphone_in_noise():
+    selector = ChannelSelector(4, mode="beam", max_lag=16)
+    source = np.random.default_rng(4).normal(0, 3000, BLOCK * 4)
+    mic = delayed_channels(source, [0, 5, 2, 11]) + noise(len(source), 4, 1500, seed=5)
+    mic = mic.astype(np.int16)
+    out = np.concatenate([selector.process(mic[i:i + BLOCK])
+                          for i in range(0, len(mic), BLOCK)]).astype(np.float64)
+    lag = selector.max_lag
+    beam_error = np.std(out[BLOCK + lag:] - source[BLOCK:len(out) - lag])
+    single_error = np.std(mic[BLOCK:, 0] - source[BLOCK:])
+    # Некоррелированный шум четырёх микрофонов складывается в ~1/2 по амплитуде
+    assert beam_error < 0.6 * single_error
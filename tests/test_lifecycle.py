@@ -0,0 +1,110 @@
+import threading
+import time
+
+from stt.lifecycle import AccumulatingRecognizer, ManagedRecognizer, check_flat, soak
+
+
+class FakeRecognizer:
+    """Распознаватель-заглушка, который помнит, кто и как его использовал"""
+
+    created = []
+
+    def __init__(self, build_seconds: float = 0.0):
+        time.sleep(build_seconds)
+        self.thread = threading.current_thread()
+        self.fed = 0
+        self.resets = 0
+        FakeRecognizer.created.append(self)
+
+    def AcceptWaveform(self, data) -> bool:
+        self.fed += len(data) // 2
+        return False
+
+    def Result(self) -> str:
+        return '{"text": ""}'
+
+    def FinalResult(self) -> str:
+        return self.Result()
+
+    def Reset(self):
+        self.resets += 1
+
+
+def second(rate=16000):
+    return bytes(rate * 2)
+
+
+def wait_spare(managed):
+    deadline = time.monotonic() + 5
+    while not (managed._spare is not None and managed._spare.done()):
+        assert time.monotonic() < deadline, "запасной не прогрелся"
+        time.sleep(0.01)
+
+
+def test_reset_at_utterance_boundary():
+    managed = ManagedRecognizer(FakeRecognizer, max_seconds=60, spare=False)
+    try:
+        first = managed.rec
+        for _ in range(3):
+            managed.AcceptWaveform(second())
+            managed.Result()
+        assert managed.rec is first
+        assert (managed.resets, first.resets, managed.generation) == (3, 3, 0)
+    finally:
+        managed.close()
+
+
+def test_recycle_after_max_seconds_uses_warm_spare_without_gap():
+    FakeRecognizer.created.clear()
+    factory = lambda: FakeRecognizer(build_seconds=0.2)
+    managed = ManagedRecognizer(factory, max_seconds=2)
+    try:
+        first = managed.rec
+        wait_spare(managed)
+        spare = managed._spare.result()
+        managed.AcceptWaveform(second())
+        managed.Result()
+        assert managed.generation == 0  # 1 с из 2: только сброс
+
+        managed.AcceptWaveform(second())
+        start = time.perf_counter()
+        managed.Result()  # Граница после 2 с звука: подмена
+        swap = time.perf_counter() - start
+        assert managed.rec is spare and managed.rec is not first
+        assert (managed.generation, managed.recycles, managed.fed_seconds) == (1, 1, 0.0)
+        # Запасной собран и прогрет в фоне: на пути звука нет 0.2 с сборки
+        assert swap < 0.1
+        assert spare.thread is not threading.current_thread()
+        assert spare.fed == 1600 and spare.resets == 1
+        wait_spare(managed)  # Следующий запасной готовится сразу
+    finally:
+        managed.close()
+
+
+def test_forced_recycle_without_boundary():
+    managed = ManagedRecognizer(FakeRecognizer, max_seconds=1, hard_limit_factor=2, spare=False)
+    try:
+        for _ in range(3):
+            managed.AcceptWaveform(second())
+        assert managed.generation == 1
+        assert managed.fed_seconds == 1.0
+    finally:
+        managed.close()
+
+
+def test_soak_stays_flat():
+    managed = ManagedRecognizer(AccumulatingRecognizer, max_seconds=60)
+    try:
+        report = soak(managed, hours=0.2, windows=4)
+    finally:
+        managed.close()
+    assert len(report) == 4
+    assert check_flat(report) == []
+    assert managed.recycles >= 10 and managed.resets > managed.recycles
+
+
+def test_check_flat_reports_growth():
+    report = [{"rss_mb": 100.0, "p50_ms": 1.0}, {"rss_mb": 101.0, "p50_ms": 1.0},
+              {"rss_mb": 150.0, "p50_ms": 3.0}]
+    problems = check_flat(report)
+    assert len(problems) == 2
@@ -0,0 +1,52 @@
+import io
+import json
+import threading
+
+from core.logger import StructuredLogger
+
+
+def test_writer_starts_with_logger():
+    logger = StructuredLogger(stream=io.StringIO())
+    try:
+        assert logger._thread is not None and logger._thread.is_alive()
+    finally:
+        logger.close()
+
+
+def test_concurrent_log_and_flush_write_every_record_once():
+    threads, per_thread = 8, 500
+    out = io.StringIO()
+    logger = StructuredLogger(stream=out, capacity=100_000, flush_interval=0.001,
+                              rate_burst=per_thread, rate_window=60.0)
+
+    def produce(t):
+        for i in range(per_thread):
+            logger.info(f"thread{t}", "record", i=i)  # Свой ключ у потока: не подавляются
+            logger.info("test", "repeated")  # Общий ключ: проходят только rate_burst
+            if i % 50 == 0:
+                logger.flush()
+
+    workers = [threading.Thread(target=produce, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    logger.flush()
+    lines = out.getvalue().splitlines()
+    logger.close()
+
+    records = [json.loads(line) for line in lines]
+    unique = [(r["component"], r["i"]) for r in records if r["msg"] == "record"]
+    assert len(unique) == len(set(unique)) == threads * per_thread
+    assert sum(r["msg"] == "repeated" for r in records) == per_thread
+    assert logger.suppressed == threads * per_thread - per_thread
+    assert logger.dropped == 0
+
+
+def test_flush_returns_after_records_are_written():
+    out = io.StringIO()
+    logger = StructuredLogger(stream=out, flush_interval=60.0)
+    logger.info("test", "before flush")
+    logger.flush()
+    assert "before flush" in out.getvalue()
+    logger.close()
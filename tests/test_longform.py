@@ -0,0 +1,71 @@
+import wave
+
+import numpy as np
+
+from stt import longform
+
+RATE = 16000
+FRAME = RATE * longform.FRAME_MS // 1000
+
+
+def tone(seconds, amplitude=6000):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.random.default_rng(0).normal(0, 3, int(RATE * seconds)).astype(np.int16)
+
+
+def speech_with_pauses(pairs=10, speech_s=5.0, pause_s=1.0):
+    """pairs раз «речь speech_s + пауза pause_s»; возвращает и интервалы пауз"""
+    parts, pauses, pos = [], [], 0
+    for _ in range(pairs):
+        parts += [tone(speech_s), silence(pause_s)]
+        pos += int(RATE * speech_s)
+        pauses.append((pos, pos + int(RATE * pause_s)))
+        pos += int(RATE * pause_s)
+    return np.concatenate(parts), pauses
+
+
+def test_frame_energy_chunked_matches_direct():
+    samples = np.concatenate((tone(1.0), silence(0.5)))
+    energy = longform.frame_energy(samples, RATE, chunk_frames=7)
+    frames = samples[:len(energy) * FRAME].astype(np.float64).reshape(-1, FRAME)
+    np.testing.assert_allclose(energy, (frames ** 2).mean(axis=1), rtol=1e-5)
+
+
+def test_cuts_fall_inside_pauses():
+    samples, pauses = speech_with_pauses()
+    energy = longform.frame_energy(samples, RATE)
+    cuts = longform.find_cuts(energy, target_s=12, max_s=20)
+    assert cuts[0] == 0 and cuts[-1] == len(energy)
+    assert len(cuts) > 2
+    for cut in cuts[1:-1]:
+        assert any(start <= cut * FRAME < end for start, end in pauses), cut
+    assert max(np.diff(cuts)) * longform.FRAME_MS / 1000 <= 20
+
+
+def test_hard_cuts_without_pauses():
+    energy = longform.frame_energy(tone(25.0), RATE)
+    cuts = longform.find_cuts(energy, target_s=6, max_s=10)
+    longest = 10 * 1000 // longform.FRAME_MS
+    assert cuts == [0, longest, 2 * longest, len(energy)]
+
+
+def test_segments_cover_whole_file(tmp_path):
+    samples, _ = speech_with_pauses(pairs=7)
+    samples = np.concatenate((samples, tone(0.01)))  # хвост короче кадра
+    path = tmp_path / "long.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(samples.tobytes())
+
+    mapped, rate = longform.open_wav_memmap(str(path))
+    assert rate == RATE and len(mapped) == len(samples)
+    bounds = longform.segment_bounds(mapped, rate, target_s=12, max_s=20)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(samples)
+    assert all(prev[1] == cur[0] for prev, cur in zip(bounds, bounds[1:]))
+    assert all(end > start for start, end in bounds)
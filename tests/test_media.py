@@ -0,0 +1,75 @@
+import socket
+import time
+
+import pytest
+
+from media.base import create_backend
+from media.fake_mpd import FakeMPDServer
+from media.mpd import MPDBackend
+from media.playerctl import PlayerctlBackend
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def server():
+    server = FakeMPDServer().start()
+    yield server
+    server.stop()
+
+
+def test_commands_share_one_connection(server):
+    backend = MPDBackend(server.host, server.port, watch=False)
+    try:
+        backend.play()
+        backend.pause()
+        backend.set_volume(30)
+        assert server.connections == 1
+        assert [line for line in server.received if line not in ("status", "currentsong")] == \
+            ["play", "pause 1", "setvol 30"]
+        assert (server.state, server.volume) == ("pause", 30)
+        assert (backend.state().state, backend.state().volume) == ("pause", 30)
+    finally:
+        backend.close()
+
+
+def test_idle_watcher_refreshes_cache_after_external_change(server):
+    backend = MPDBackend(server.host, server.port)
+    try:
+        assert wait_for(lambda: any(line.startswith("idle") for line in server.received))
+        # Другой клиент включил музыку и сменил громкость
+        server.execute("play", "")
+        server.execute("setvol", "75")
+        assert wait_for(lambda: backend.state().state == "play" and backend.state().volume == 75)
+        assert backend.now_playing() == "Играет: Кино — Группа крови"
+    finally:
+        backend.close()
+
+
+def test_command_reconnects_after_server_drops_socket(server):
+    backend = MPDBackend(server.host, server.port, watch=False)
+    try:
+        server.drop_clients()
+        backend.play()
+        assert server.state == "play"
+        assert server.connections == 2
+    finally:
+        backend.close()
+
+
+def test_auto_falls_back_to_playerctl():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    # Порт свободен: подключение к MPD отклоняется
+    backend = create_backend("auto", host="127.0.0.1", port=port)
+    assert isinstance(backend, PlayerctlBackend)
+    with pytest.raises(OSError):
+        create_backend("mpd", host="127.0.0.1", port=port)
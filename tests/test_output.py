@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+import pytest
+
+from audio.output import EchoGate, PlaybackMonitor
+
+RATE = 16000
+
+
+def envelope_signal(seconds, phase=0.0, seed=0):
+    """Шум с огибающей 1 ± sin(2π·5t): эхо повторяет огибающую, голос — нет"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    noise = np.random.default_rng(seed).normal(0, 1, len(t))
+    return (noise * 5000 * (1.2 + np.sin(2 * np.pi * 5 * t + phase))).astype(np.float32)
+
+
+@pytest.fixture
+def monitor():
+    return PlaybackMonitor()
+
+
+def block_at(signal, seconds):
+    """Блок захвата 100 мс, который заканчивается на seconds"""
+    end = int(seconds * RATE)
+    return np.clip(signal[end - RATE // 10:end], -32768, 32767).astype(np.int16)
+
+
+def playing_for(monitor, reference, seconds):
+    """Начать воспроизведение эталона seconds секунд назад"""
+    monitor.begin(reference, RATE)
+    monitor.started_at = time.monotonic() - seconds
+
+
+def test_gate_passes_when_idle(monitor):
+    gate = EchoGate(monitor, RATE, tail=0.3)
+    monitor.ended_at = time.monotonic() - 1.0
+    assert not gate.should_drop(np.zeros(1600, dtype=np.int16))
+    assert gate.gated_blocks == 0
+
+
+def test_gate_drops_during_playback_and_tail(monitor):
+    gate = EchoGate(monitor, RATE, tail=0.3)
+    loud = block_at(envelope_signal(1.0), 1.0)
+    with monitor.playing():
+        # Без эталона перебить нельзя: гасится даже громкий блок
+        assert gate.should_drop(loud)
+    assert gate.should_drop(loud)  # хвост реверберации
+    monitor.ended_at = time.monotonic() - 0.31
+    assert not gate.should_drop(loud)
+    assert gate.gated_blocks == 2
+    assert gate.gated_seconds == pytest.approx(0.2)
+
+
+def test_echo_dropped_and_barge_in_passed(monitor):
+    gate = EchoGate(monitor, RATE)
+    reference = envelope_signal(2.0)
+    playing_for(monitor, reference, 1.0)
+    try:
+        assert gate.should_drop(block_at(reference * 0.5, 1.0))
+        # Голос с другой огибающей и громче порога
+        assert not gate.should_drop(block_at(envelope_signal(2.0, phase=np.pi, seed=1), 1.0))
+        assert gate.passed_during_playback == 1
+    finally:
+        monitor.end()
+
+
+def test_nested_playback_keeps_outer_reference(monitor):
+    gate = EchoGate(monitor, RATE)
+    reference = envelope_signal(2.0)
+    playing_for(monitor, reference, 1.0)
+    voice = block_at(envelope_signal(2.0, phase=np.pi, seed=1), 1.0)
+    with monitor.playing():
+        assert monitor.reference is not None
+        assert not gate.should_drop(voice)
+    assert monitor.active and monitor.reference is not None
+    assert not gate.should_drop(voice)
+    monitor.end()
+    assert not monitor.active and monitor.reference is None
@@ -0,0 +1,70 @@
+import json
+import os
+import random
+
+import pytest
+
+from core.router import IntentRouter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _levenshtein(a: str, b: str) -> int:
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+    return row[-1]
+
+
+@pytest.fixture(scope="module")
+def raw_router():
+    """Роутер по фразам commands.json без нормализации слов"""
+    with open(os.path.join(ROOT, "commands.json"), encoding="utf-8") as f:
+        catalog = json.load(f)
+    return IntentRouter({k: v["patterns"] for k, v in catalog.items()},
+                        standalone=[k for k, v in catalog.items() if v.get("standalone")])
+
+
+@pytest.mark.parametrize("text", ["клей", "вход", "сколько стоит", "что на столе",
+                                  "давай поиграем", "выходные", "вход в систему"])
+def test_raw_router_rejects_near_words(raw_router, text):
+    assert raw_router.match(text) is None
+
+
+@pytest.mark.parametrize("text", ["что на столе", "давай поиграем", "сколько стоит", "клей"])
+def test_handler_rejects_near_words(handler, text):
+    assert handler.match(text) is None
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("включи музыкк", "music_play"),
+    ("следущий трек", "music_next"),
+    ("громкасть", "music_volume"),
+])
+def test_typos_in_long_phrases(handler, text, intent):
+    assert handler.match(text) == intent
+
+
+def test_short_phrases_exact_only():
+    router = IntentRouter({"pause": ["стоп"], "next": ["следующий"]})
+    assert router.match("стол") is None
+    assert router.match("стоп").intent == "pause"
+    assert router.match("следущий").intent == "next"
+
+
+def test_fuzzy_match_respects_word_boundaries():
+    # «выключа» внутри «выключатель» — одна правка до фразы, но не целое слово
+    router = IntentRouter({"off": ["выключи"], "play": ["играй музыку"]})
+    assert router.match("где выключатель") is None
+    assert router.match("выключт").intent == "off"
+    assert router.match("играй музыкку").intent == "play"
+
+
+def test_distance_matches_levenshtein():
+    rng = random.Random(0)
+    for _ in range(500):
+        a = "".join(rng.choice("абв ") for _ in range(rng.randint(1, 10)))
+        b = "".join(rng.choice("абв ") for _ in range(rng.randint(0, 12)))
+        assert IntentRouter._distance(IntentRouter._pattern_masks(a), len(a), b) == _levenshtein(a, b)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from audio.chunking import EnergyRecognizer
+from audio.session import Session, SessionRecorder, bench
+
+RATE = 16000
+
+
+def _speech(seconds: float, bursts: int, rng) -> np.ndarray:
+    """Тишина с bursts отрезками громкого шума по 0.4 с, разделёнными паузами"""
+    audio = rng.normal(0, 50, int(seconds * RATE))
+    slot = len(audio) // bursts
+    for i in range(bursts):
+        start = i * slot + slot // 4
+        audio[start:start + int(0.4 * RATE)] += rng.normal(0, 4000, int(0.4 * RATE))
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    rng = np.random.default_rng(0)
+    audio = _speech(6.0, 3, rng)
+    # Блоки неровные, запас файла меньше записи — файл растёт в потоке записи
+    recorder = SessionRecorder(str(tmp_path / "session"), RATE, grow_seconds=1.0)
+    sizes, pos, moment = [], 0, 0.0
+    while pos < len(audio):
+        n = int(rng.integers(800, 2400))
+        recorder.write(audio[pos:pos + n], timestamp=recorder._start + moment)
+        recorder.note("Marker", position_hint=pos)
+        sizes.append(len(audio[pos:pos + n]))
+        pos += n
+        moment += n / RATE
+    recorder.close()
+    return recorder.path, audio, sizes
+
+
+def test_record_open_roundtrip(recorded):
+    path, audio, sizes = recorded
+    session = Session.open(path)
+    assert session.sample_rate == RATE
+    np.testing.assert_array_equal(np.asarray(session.audio), audio)
+    assert session.blocks["samples"].tolist() == sizes
+    assert session.blocks["start"].tolist() == np.concatenate(([0], np.cumsum(sizes)[:-1])).tolist()
+    assert np.all(np.diff(session.blocks["time"]) > 0)
+    assert len(session.events) == len(sizes)
+    assert [e["position"] for e in session.events] == np.cumsum(sizes).tolist()
+    np.testing.assert_array_equal(session.block(1), audio[sizes[0]:sizes[0] + sizes[1]])
+
+
+def test_bench_with_energy_recognizer(recorded):
+    path, _, _ = recorded
+    result = bench(Session.open(path), EnergyRecognizer(RATE), speed=0)
+    assert result["audio_s"] == 6.0
+    assert result["utterances"] == 3
+    assert result["texts"] == ["слово0"] * 3
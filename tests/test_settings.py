@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from conftest import ROOT
+from core.settings import SettingsError, load_settings
+
+SETTINGS = os.path.join(ROOT, "config", "settings.yaml")
+DEVICES = os.path.join(ROOT, "config", "devices.yaml")
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    monkeypatch.delenv("VOICE_ASSISTANT_PROFILE", raising=False)
+    monkeypatch.delenv("VOICE_ASSISTANT_DEVICE", raising=False)
+
+
+def _load(**kwargs):
+    kwargs.setdefault("path", SETTINGS)
+    kwargs.setdefault("devices_path", DEVICES)
+    return load_settings(**kwargs)
+
+
+def _write(tmp_path, text: str) -> str:
+    path = tmp_path / "settings.yaml"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_profile_merges_over_defaults():
+    settings = _load(profile="server-multiroom", device="unknown-host")
+    assert settings.profile == "server-multiroom"
+    assert settings.device == ""
+    assert (settings.audio.channels, settings.audio.mix) == (4, "beam")
+    assert settings.audio.block_ms == 50.0
+    # Не переопределённое профилем остаётся из defaults
+    assert settings.audio.sample_rate == 16000
+    assert settings.vad.silence_seconds == 1.5
+    assert settings.stt.process is True
+
+
+def test_device_selects_profile_and_overrides():
+    settings = _load(device="kitchen-pi")
+    assert (settings.profile, settings.device) == ("low-power", "kitchen-pi")
+    assert settings.audio.device == 1
+    assert settings.audio.block_ms == 200.0
+
+    settings = _load(device="home-server")
+    assert settings.profile == "server-multiroom"
+    assert settings.stt.model_path == "/srv/models/vosk-model-small-ru-0.22"
+
+
+def test_explicit_profile_wins_over_device(monkeypatch):
+    assert _load(profile="low-latency", device="kitchen-pi").profile == "low-latency"
+    monkeypatch.setenv("VOICE_ASSISTANT_PROFILE", "low-latency")
+    settings = _load(device="kitchen-pi")
+    assert settings.profile == "low-latency"
+    assert settings.audio.device == 1  # Переопределения устройства остаются
+
+
+def test_unknown_profile():
+    with pytest.raises(SettingsError, match="не найден"):
+        _load(profile="turbo", device="unknown-host")
+
+
+def test_unknown_keys_are_reported(tmp_path):
+    path = _write(tmp_path, "defaults:\n  audio:\n    chanels: 2\n  colour: red\n")
+    with pytest.raises(SettingsError) as e:
+        _load(path=path, devices_path=str(tmp_path / "devices.yaml"), device="unknown-host")
+    assert "audio.chanels: неизвестный параметр" in e.value.errors
+    assert "colour: неизвестный параметр" in e.value.errors
+
+
+def test_wrong_types_are_reported(tmp_path):
+    path = _write(tmp_path, "defaults:\n  audio:\n    channels: two\n    block_ms: 20\n"
+                            "  stt:\n    process: 1\n  vad: 5\n")
+    with pytest.raises(SettingsError) as e:
+        _load(path=path, devices_path=str(tmp_path / "devices.yaml"), device="unknown-host")
+    errors = e.value.errors
+    assert any(err.startswith("audio.channels: неверный тип str") for err in errors)
+    assert any(err.startswith("stt.process: неверный тип int") for err in errors)
+    assert any(err.startswith("vad.: ожидается словарь") for err in errors)
+    assert not any(err.startswith("audio.block_ms") for err in errors)  # int годится для float
+
+
+def test_range_errors_are_collected(tmp_path):
+    path = _write(tmp_path, "defaults:\n  audio:\n    sample_rate: 12345\n    channels: 0\n"
+                            "    mix: stereo\n  tts:\n    volume: 1.5\n  flight:\n    seconds: 0\n")
+    with pytest.raises(SettingsError) as e:
+        _load(path=path, devices_path=str(tmp_path / "devices.yaml"), device="unknown-host")
+    prefixes = [err.split(":")[0] for err in e.value.errors]
+    assert prefixes == ["audio.sample_rate", "audio.channels", "audio.mix", "tts.volume",
+                        "flight.seconds"]
+
+
+def test_missing_files_give_defaults(tmp_path):
+    settings = _load(path=str(tmp_path / "none.yaml"), devices_path=str(tmp_path / "none.yaml"),
+                     device="unknown-host")
+    assert settings.profile == "default"
+    assert settings.audio.channels == 1
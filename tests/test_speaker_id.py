@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from speaker_id.verifier import StreamingSpeakerID
+
+RATE = 16000
+
+
+def voice(low, high, seconds, seed):
+    """Синтетический «голос»: сумма тонов в полосе low–high Гц после паузы"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(RATE * seconds)) / RATE
+    tones = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 2 * np.pi))
+                for f in np.linspace(low, high, 12))
+    speech = 8000 * tones / 12
+    pause = np.zeros(int(RATE * 0.3))
+    signal = np.concatenate((pause, speech)) + rng.normal(0, 5, len(pause) + len(speech))
+    return signal.astype(np.int16)
+
+
+def blocks(pcm, size=1600):
+    return [pcm[i:i + size] for i in range(0, len(pcm), size)]
+
+
+@pytest.fixture
+def sid():
+    decisions = []
+    sid = StreamingSpeakerID(sample_rate=RATE, on_decision=lambda u, s: decisions.append(u))
+    sid.decisions = decisions
+    sid.enroll("low", voice(200, 900, 2.0, seed=1))
+    sid.enroll("high", voice(2000, 4500, 2.0, seed=2))
+    yield sid
+    sid.stop()
+
+
+def test_early_decision(sid):
+    sid.start()
+    for block in blocks(voice(250, 850, 3.0, seed=3)):
+        sid.feed(block)
+    user, score = sid.wait(timeout=5)
+    assert user == "low" and score >= sid.threshold
+    assert sid.decisions == ["low"]
+    # Решение принято после ~min_speech_sec речи, остальные блоки не разбирались
+    assert sid._speech_frames < 2 * sid.min_speech_frames
+
+
+def test_reset_discards_stale_blocks(sid):
+    # Блоки прошлой реплики ждут в очереди, пока поток не запущен
+    for block in blocks(voice(2000, 4500, 3.0, seed=4)):
+        sid.feed(block)
+    sid.reset()
+    sid.start()
+    for block in blocks(voice(250, 850, 3.0, seed=5)):
+        sid.feed(block)
+    user, _ = sid.wait(timeout=5)
+    assert user == "low"
+    assert sid.decisions == ["low"]
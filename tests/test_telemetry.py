@@ -0,0 +1,84 @@
+import json
+import os
+import time
+import urllib.request
+
+from core.telemetry import PREFIX, Telemetry
+
+
+def make_telemetry():
+    t = Telemetry(interval=0.05)
+    state = {"frames": 0, "seconds": 0.0}
+    t.gauge("queue_depth", lambda: 3, "Blocks waiting")
+    t.counter("blocks_total", lambda: 42)
+    t.ratio("rtf", lambda: state["seconds"], lambda: state["frames"] / 16000, "Real-time factor")
+    t.gauge("subscriber_queue", lambda: {'plain': 1, 'with "quotes"': 2, "back\\slash\nline": 0.5},
+            "Per subscriber", label="subscriber")
+    t.gauge("missing", lambda: None)
+
+    def broken():
+        raise RuntimeError("нет данных")
+
+    t.gauge("broken", broken)
+    return t, state
+
+
+def test_sample_and_prometheus_text():
+    t, state = make_telemetry()
+    t.sample()
+    state["frames"], state["seconds"] = 16000, 0.25  # 1 с звука за 0.25 с
+    snapshot = t.sample()
+    metrics = snapshot["metrics"]
+    assert set(metrics) == {"queue_depth", "blocks_total", "rtf", "subscriber_queue"}
+    assert metrics["rtf"]["value"] == 0.25
+
+    lines = t.prometheus().splitlines()
+    assert f"# HELP {PREFIX}queue_depth Blocks waiting" in lines
+    assert f"# TYPE {PREFIX}queue_depth gauge" in lines
+    assert f"{PREFIX}queue_depth 3" in lines
+    assert f"# TYPE {PREFIX}blocks_total counter" in lines
+    assert not any(line.startswith(f"# HELP {PREFIX}blocks_total") for line in lines)
+    assert f"{PREFIX}rtf 0.25" in lines
+    assert f'{PREFIX}subscriber_queue{{subscriber="plain"}} 1' in lines
+    assert f'{PREFIX}subscriber_queue{{subscriber="with \\"quotes\\""}} 2' in lines
+    assert f'{PREFIX}subscriber_queue{{subscriber="back\\\\slash\\nline"}} 0.5' in lines
+    # TYPE идёт перед отсчётами своей метрики
+    assert lines.index(f"# TYPE {PREFIX}rtf gauge") == lines.index(f"{PREFIX}rtf 0.25") - 1
+
+
+def test_ratio_keeps_value_without_new_audio():
+    t, state = make_telemetry()
+    t.sample()
+    state["frames"], state["seconds"] = 32000, 1.0
+    assert t.sample()["metrics"]["rtf"]["value"] == 0.5
+    state["seconds"] = 1.5  # звук не прибавился — прежнее значение
+    assert t.sample()["metrics"]["rtf"]["value"] == 0.5
+
+
+def test_snapshot_file_and_http(tmp_path):
+    t, _ = make_telemetry()
+    path = tmp_path / "snapshot.json"
+    path.write_text("старый снимок")
+    t.start(port=0, snapshot_path=str(path))
+    try:
+        deadline = time.monotonic() + 2
+        snapshot = None
+        while time.monotonic() < deadline:
+            try:
+                snapshot = json.loads(path.read_text(encoding="utf-8"))
+                break
+            except ValueError:
+                time.sleep(0.01)
+        assert snapshot is not None and snapshot["pid"] == os.getpid()
+        assert snapshot["metrics"]["queue_depth"]["value"] == 3
+        # Запись через временный файл и os.replace: временных файлов не остаётся
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["snapshot.json"]
+
+        base = f"http://127.0.0.1:{t.port}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=2) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert f"{PREFIX}blocks_total 42" in response.read().decode("utf-8")
+        with urllib.request.urlopen(f"{base}/snapshot.json", timeout=2) as response:
+            assert "queue_depth" in json.loads(response.read())["metrics"]
+    finally:
+        t.stop()
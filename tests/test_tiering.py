@@ -0,0 +1,100 @@
+import json
+import time
+
+import pytest
+
+from stt.tiering import TieredRecognizer
+
+
+class StubMonitor:
+    def __init__(self, headroom=1.0):
+        self.value = headroom
+
+    def headroom(self):
+        return self.value
+
+
+class FakeLargeRecognizer:
+    """«Большая модель»: заданный текст, rtf секунд работы на секунду звука"""
+
+    def __init__(self, text="включи музыку", rtf=0.0):
+        self.text = text
+        self.rtf = rtf
+        self.resets = 0
+
+    def AcceptWaveform(self, data):
+        time.sleep(len(data) / 32000 * self.rtf)
+        return False
+
+    def FinalResult(self):
+        return json.dumps({"text": self.text})
+
+    def Reset(self):
+        self.resets += 1
+
+
+def seconds_of_audio(seconds, rate=16000):
+    return [bytes(int(rate * seconds) * 2)]
+
+
+@pytest.fixture
+def tiering():
+    return TieredRecognizer(lambda: FakeLargeRecognizer(), monitor=StubMonitor(),
+                            max_added_latency=1.5, initial_rtf=0.5)
+
+
+@pytest.mark.parametrize("confidence, matched, expected", [
+    (0.95, True, False),
+    (None, True, False),
+    (0.4, True, True),
+    (0.95, False, True),
+    (None, False, True),
+])
+def test_needs_second_pass(tiering, confidence, matched, expected):
+    assert tiering.needs_second_pass(confidence, matched) is expected
+    assert tiering.counts["candidates"] == int(expected)
+
+
+def test_skip_not_ready():
+    tiering = TieredRecognizer(monitor=StubMonitor())
+    assert tiering.redecode(seconds_of_audio(1)) is None
+    assert tiering.counts["skipped_not_ready"] == 1
+
+
+def test_skip_under_load(tiering):
+    tiering.monitor.value = 0.1
+    assert tiering.redecode(seconds_of_audio(1)) is None
+    assert tiering.counts["skipped_load"] == 1
+
+
+def test_skip_too_slow(tiering):
+    # 0.5 × 4 с = 2 с > 1.5 с допустимой добавки
+    assert tiering.redecode(seconds_of_audio(4)) is None
+    assert tiering.counts["skipped_latency"] == 1
+    assert tiering.redecode(seconds_of_audio(1)) == "включи музыку"
+    assert tiering.counts["escalations"] == 1
+
+
+def test_slow_decode_does_not_block_escalation_forever(tiering):
+    tiering.set_factory(lambda: FakeLargeRecognizer(rtf=2.0))
+    assert tiering.redecode(seconds_of_audio(0.25)) == "включи музыку"
+    assert tiering.rtf > 0.75  # Один медленный замер: 2 с команды уже не проходят
+    tiering.set_factory(lambda: FakeLargeRecognizer())
+
+    attempts = 0
+    while tiering.redecode(seconds_of_audio(2)) is None:
+        attempts += 1
+        assert attempts < 20, "оценка RTF не восстанавливается"
+    assert tiering.counts["skipped_latency"] == attempts > 0
+    assert tiering.counts["escalations"] == 2
+
+
+def test_stats_escalation_rate(tiering):
+    for confidence, matched in ((0.9, True), (0.3, True), (0.9, False), (0.95, True)):
+        if tiering.needs_second_pass(confidence, matched):
+            tiering.redecode(seconds_of_audio(0.5), first_text="включи музыка")
+    stats = tiering.stats()
+    assert (stats["first_pass"], stats["candidates"], stats["escalations"]) == (4, 2, 2)
+    assert stats["escalation_rate"] == 0.5
+    assert stats["changed"] == 2
+    assert "added_ms_p50" in stats
@@ -0,0 +1,132 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from transport import codecs
+from transport.client import SatelliteClient
+from transport.server import IngestServer
+
+
+class CountingRecognizer:
+    """Распознаватель-заглушка: фраза — число принятых отсчётов"""
+
+    def __init__(self, sample_rate: int):
+        self.samples = 0
+
+    def accept(self, pcm: bytes):
+        self.samples += len(pcm) // 2
+        return None
+
+    def finish(self) -> str:
+        return f"отсчётов {self.samples}"
+
+
+def _run(scenario):
+    return asyncio.run(asyncio.wait_for(scenario(), 10))
+
+
+@pytest.mark.parametrize("codec", ["pcm16", "ulaw", "ima_adpcm"])
+def test_final_transcript_arrives_before_utterance_end(codec):
+    pcm = (np.sin(np.arange(16000) / 10) * 8000).astype("<i2").tobytes()
+    heard = []
+
+    async def on_transcript(session, text):
+        await asyncio.sleep(0.05)  # Медленный обработчик не должен обгоняться utterance_end
+        heard.append((session.satellite_id, text))
+
+    async def scenario():
+        server = IngestServer(CountingRecognizer, on_transcript, host="127.0.0.1", port=0)
+        await server.start()
+        client = SatelliteClient(codecs_offered=[codec])
+        try:
+            await client.connect("127.0.0.1", server.port)
+            for _ in range(2):
+                await client.send_audio(pcm)
+                await client.end_utterance()
+                # К моменту utterance_end итоговый текст уже получен
+                assert client.transcripts[-1] == {"text": "отсчётов 16000", "final": True}
+        finally:
+            await client.close()
+            await server.close()
+        return client
+
+    client = _run(scenario)
+    assert client.codec == codec
+    assert len(client.transcripts) == 2
+    assert heard == [("fake-satellite", "отсчётов 16000")] * 2
+
+
+def test_close_awaits_sessions():
+    async def scenario():
+        server = IngestServer(CountingRecognizer, host="127.0.0.1", port=0, max_queue_blocks=2)
+        await server.start()
+        clients = [SatelliteClient(satellite_id=f"sat-{i}") for i in range(3)]
+        for client in clients:
+            await client.connect("127.0.0.1", server.port)
+        await clients[0].send_audio(b"\0" * 3200)
+        while len(server.sessions) < 3:
+            await asyncio.sleep(0.01)
+        handlers = list(server._handlers)
+        await server.close()
+        assert all(task.done() for task in handlers)
+        assert server.sessions == {}
+        for client in clients:
+            await client.close()
+
+    _run(scenario)
+
+
+def test_sequence_gaps_and_reordered_frames():
+    from transport import protocol
+
+    frame = b"\0" * 640  # 320 отсчётов PCM16
+
+    async def scenario():
+        server = IngestServer(CountingRecognizer, host="127.0.0.1", port=0)
+        await server.start()
+        client = SatelliteClient(codecs_offered=["pcm16"])
+        try:
+            await client.connect("127.0.0.1", server.port)
+            # 0, 1, повтор 1, пропуск 2, 3, опоздавший 2
+            for seq in (0, 1, 1, 3, 2):
+                client.writer.write(protocol.encode_frame(protocol.AUDIO, seq, frame))
+            client._seq = 4
+            await client.end_utterance()
+            stats = server.stats()["sessions"][0]
+        finally:
+            await client.close()
+            await server.close()
+        return client, stats
+
+    client, stats = _run(scenario)
+    assert (stats["lost_frames"], stats["reordered_frames"]) == (1, 2)
+    assert client.transcripts == [{"text": "отсчётов 960", "final": True}]
+
+
+def test_malformed_frame_closes_only_its_session():
+    from transport import protocol
+
+    async def scenario():
+        server = IngestServer(CountingRecognizer, host="127.0.0.1", port=0)
+        await server.start()
+        bad = SatelliteClient(satellite_id="bad", codecs_offered=["ima_adpcm"])
+        good = SatelliteClient(satellite_id="good", codecs_offered=["ima_adpcm"])
+        try:
+            await bad.connect("127.0.0.1", server.port)
+            await good.connect("127.0.0.1", server.port)
+            # ADPCM-кадр короче 4-байтного заголовка
+            bad.writer.write(protocol.encode_frame(protocol.AUDIO, 0, b"\x01\x02"))
+            await asyncio.wait_for(bad._receiver, 5)  # Сервер закрыл соединение
+            while len(server.sessions) > 1:
+                await asyncio.sleep(0.01)
+            await good.send_audio(b"\0" * 3200)
+            await good.end_utterance()
+        finally:
+            await bad.close()
+            await good.close()
+            await server.close()
+        return good
+
+    good = _run(scenario)
+    assert good.transcripts == [{"text": "отсчётов 1600", "final": True}]
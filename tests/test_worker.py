@@ -0,0 +1,43 @@
+import time
+
+import numpy as np
+import pytest
+
+from stt.worker import RecognizerProcess
+
+
+class SlowFinishRecognizer:
+    """Первый finish() отвечает с опозданием; ответы пронумерованы"""
+
+    def __init__(self, sample_rate: int):
+        self.finishes = 0
+
+    def accept(self, pcm: bytes):
+        return None
+
+    def finish(self) -> str:
+        self.finishes += 1
+        if self.finishes == 1:
+            time.sleep(0.5)
+        return f"фраза {self.finishes}"
+
+
+class SlowFinishFactory:
+    def __call__(self, sample_rate: int):
+        return SlowFinishRecognizer(sample_rate)
+
+
+@pytest.fixture
+def worker():
+    worker = RecognizerProcess(factory=SlowFinishFactory(), ring_seconds=1.0)
+    worker.start()
+    assert worker.wait_ready(timeout=30)
+    yield worker
+    worker.stop()
+
+
+def test_late_final_is_not_returned_by_next_finish(worker):
+    worker.feed(np.zeros(1600, dtype=np.int16))
+    assert worker.finish(timeout=0.1) == ""  # Ответ «фраза 1» опоздает
+    assert worker.finish(timeout=5) == "фраза 2"
+    assert worker.finish(timeout=5) == "фраза 3"
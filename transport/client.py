@@ -0,0 +1,141 @@
+"""
+Клиент спутника (и тестовый «фейковый» спутник)
+
+Подключается к transport.server, отправляет HELLO и аудиокадры из WAV
+или массива (сжатые согласованным кодеком), собирает ответы сервера.
+
+Пример:
+    python -m transport.client command.wav --port 8765 --realtime
+"""
+import argparse
+import asyncio
+import sys
+import wave
+from typing import Dict, List, Optional
+
+from transport import codecs, protocol
+
+
+class SatelliteClient:
+    """Асинхронный клиент одного спутника"""
+
+    def __init__(self, satellite_id: str = "fake-satellite", sample_rate: int = 16000,
+                 frame_ms: int = 20, codecs_offered=codecs.PREFERENCE):
+        self.satellite_id = satellite_id
+        self.codecs_offered = list(codecs_offered)
+        self.codec = "pcm16"
+        self.encoder = codecs.get_codec("pcm16").encoder()
+        self.decoder = self.encoder
+        self.bytes_sent = 0
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.frame_ms = frame_ms
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._seq = 0
+        self.transcripts: List[Dict] = []
+        self.controls: List[Dict] = []
+        self.tts_audio: List[bytes] = []
+        self.welcome: Optional[Dict] = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._utterance_done = asyncio.Event()
+
+    async def connect(self, host: str = "127.0.0.1", port: int = 8765, **hello):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        hello.update(satellite_id=self.satellite_id, sample_rate=self.sample_rate,
+                     codecs=self.codecs_offered)
+        self.writer.write(protocol.encode_json(protocol.HELLO, 0, hello))
+        await self.writer.drain()
+
+        frame_type, _, payload = await protocol.read_frame(self.reader)
+        if frame_type != protocol.WELCOME:
+            raise protocol.ProtocolError(f"Ожидался WELCOME, получен {frame_type}")
+        self.welcome = protocol.decode_json(payload)
+        self.codec = self.welcome.get("codec", "pcm16")
+        self.encoder = codecs.get_codec(self.codec).encoder()
+        self.decoder = codecs.get_codec(self.codec).decoder()
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def send_audio(self, pcm: bytes, realtime: bool = False):
+        """Отправить PCM16 mono кадрами по frame_ms"""
+        view = memoryview(pcm)
+        for offset in range(0, len(view), self.frame_bytes):
+            encoded = self.encoder.encode(view[offset:offset + self.frame_bytes].tobytes())
+            self.bytes_sent += len(encoded)
+            self.writer.write(protocol.encode_frame(protocol.AUDIO, self._seq, encoded))
+            self._seq += 1
+            await self.writer.drain()
+            if realtime:
+                await asyncio.sleep(self.frame_ms / 1000)
+
+    async def end_utterance(self, timeout: float = 10.0):
+        """Сообщить о конце реплики и дождаться итоговой расшифровки"""
+        self._utterance_done.clear()
+        self.writer.write(protocol.encode_frame(protocol.END, self._seq))
+        await self.writer.drain()
+        await asyncio.wait_for(self._utterance_done.wait(), timeout)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self._receiver is not None:
+            self._receiver.cancel()
+            try:
+                await self._receiver
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _receive(self):
+        try:
+            while True:
+                frame_type, _, payload = await protocol.read_frame(self.reader)
+                if frame_type == protocol.TRANSCRIPT:
+                    self.transcripts.append(protocol.decode_json(payload))
+                elif frame_type == protocol.TTS_AUDIO:
+                    self.tts_audio.append(self.decoder.decode(payload))
+                elif frame_type == protocol.CONTROL:
+                    event = protocol.decode_json(payload)
+                    self.controls.append(event)
+                    if event.get("event") == "utterance_end":
+                        self._utterance_done.set()
+        except asyncio.IncompleteReadError:
+            pass
+
+
+async def stream_wav(path: str, host: str, port: int, realtime: bool,
+                     codecs_offered=codecs.PREFERENCE) -> SatelliteClient:
+    """Отправить WAV как одну реплику и вернуть клиента с ответами"""
+    with wave.open(path, "rb") as wf:
+        rate = wf.getframerate()
+        pcm = wf.readframes(wf.getnframes())
+
+    client = SatelliteClient(sample_rate=rate, codecs_offered=codecs_offered)
+    await client.connect(host, port)
+    try:
+        await client.send_audio(pcm, realtime=realtime)
+        await client.end_utterance()
+    finally:
+        await client.close()
+    return client
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Тестовый спутник: отправить WAV на сервер")
+    parser.add_argument("path", help="WAV PCM16 mono")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--realtime", action="store_true", help="Отправлять в реальном времени")
+    parser.add_argument("--codec", choices=list(codecs.CODECS), help="Предлагать только этот кодек")
+    args = parser.parse_args(argv)
+
+    offered = [args.codec] if args.codec else codecs.PREFERENCE
+    client = asyncio.run(stream_wav(args.path, args.host, args.port, args.realtime, offered))
+    print(f"[Спутник] Кодек: {client.codec}, отправлено {client.bytes_sent} байт")
+    for t in client.transcripts:
+        print(f"[Спутник] {t['text']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Кодеки аудио для канала спутник -> сервер
+
+Сырой PCM16 на 16 кГц — 256 кбит/с на спутник. G.711 μ-law/A-law дают
+128 кбит/с (2:1), IMA-ADPCM — 64 кбит/с (4:1). Кодек согласуется в
+HELLO/WELCOME: спутник перечисляет поддерживаемые, сервер выбирает
+первый из своего списка предпочтений.
+
+По умолчанию сервер предпочитает μ-law: он векторизован и почти не
+тратит процессор при многих спутниках. IMA-ADPCM последователен по
+природе (цикл Python, единицы МБ/с) — его стоит ставить первым в
+codec_preference, только если узкое место — канал, а не процессор.
+
+Пример (замер скорости и экономии канала):
+    python -m transport.codecs
+"""
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from transport.protocol import ProtocolError
+
+
+class Codec:
+    """Базовый кодек: PCM16 без сжатия"""
+
+    name = "pcm16"
+    bits_per_sample = 16
+
+    def encoder(self) -> "Codec":
+        """Экземпляр для одного потока (у ADPCM есть состояние)"""
+        return self
+
+    def decoder(self) -> "Codec":
+        return self
+
+    def encode(self, pcm: bytes) -> bytes:
+        return pcm
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Raises:
+            ProtocolError: нечётная длина (не целое число отсчётов)
+        """
+        if len(data) % 2:
+            raise ProtocolError(f"PCM16: кадр нечётной длины ({len(data)} байт)")
+        return data
+
+
+class MuLawCodec(Codec):
+    """G.711 μ-law, векторизованный"""
+
+    name = "ulaw"
+    bits_per_sample = 8
+    BIAS = 0x84
+    # Границы сегментов для 14-битного модуля со смещением
+    SEGMENT_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+    def __init__(self):
+        codes = np.arange(256, dtype=np.uint8)
+        self._table = self._decode_codes(codes)
+
+    def encode(self, pcm: bytes) -> bytes:
+        x = np.frombuffer(pcm, dtype="<i2").astype(np.int32) >> 2  # 14 бит
+        mask = np.where(x < 0, 0x7F, 0xFF)
+        mag = np.minimum(np.abs(x) + (self.BIAS >> 2), 0x1FFF)
+        segment = np.searchsorted(self.SEGMENT_END, mag)
+        code = (segment << 4) | ((mag >> (segment + 1)) & 0x0F)
+        return ((code ^ mask) & 0xFF).astype(np.uint8).tobytes()
+
+    def decode(self, data: bytes) -> bytes:
+        return self._table[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+    @classmethod
+    def _decode_codes(cls, codes: np.ndarray) -> np.ndarray:
+        u = (~codes).astype(np.int32) & 0xFF
+        exponent = (u >> 4) & 0x07
+        mantissa = u & 0x0F
+        mag = (((mantissa << 3) + cls.BIAS) << exponent) - cls.BIAS
+        return np.where(u & 0x80, -mag, mag).astype("<i2")
+
+
+class ALawCodec(Codec):
+    """G.711 A-law, векторизованный"""
+
+    name = "alaw"
+    bits_per_sample = 8
+
+    def __init__(self):
+        self._table = self._decode_codes(np.arange(256, dtype=np.uint8))
+
+    def encode(self, pcm: bytes) -> bytes:
+        x = np.frombuffer(pcm, dtype="<i2").astype(np.int32) >> 3  # 13 бит
+        sign = np.where(x >= 0, 0x80, 0)
+        mag = np.minimum(np.where(x >= 0, x, -x - 1), 0x0FFF)
+        exponent = np.where(mag >= 32, np.floor(np.log2(np.maximum(mag, 1))).astype(np.int32) - 4, 0)
+        mantissa = np.where(exponent > 0, (mag >> np.maximum(exponent, 1)) & 0x0F, (mag >> 1) & 0x0F)
+        code = sign | (exponent << 4) | mantissa
+        return ((code ^ 0x55) & 0xFF).astype(np.uint8).tobytes()
+
+    def decode(self, data: bytes) -> bytes:
+        return self._table[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+    @staticmethod
+    def _decode_codes(codes: np.ndarray) -> np.ndarray:
+        a = codes.astype(np.int32) ^ 0x55
+        exponent = (a >> 4) & 0x07
+        mantissa = a & 0x0F
+        mag = np.where(exponent > 0,
+                       ((mantissa << 1) + 33) << np.maximum(exponent - 1, 0),
+                       (mantissa << 1) + 1)
+        mag = mag << 3
+        return np.where(a & 0x80, mag, -mag).astype("<i2")
+
+
+_IMA_INDEX = [-1, -1, -1, -1, 2, 4, 6, 8, -1, -1, -1, -1, 2, 4, 6, 8]
+_IMA_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+]
+# Приращение предсказателя для каждого (шаг, код) — убирает ветвления из цикла
+_IMA_DIFF = [[((step >> 3) + (step if code & 4 else 0) + (step >> 1 if code & 2 else 0)
+               + (step >> 2 if code & 1 else 0)) * (-1 if code & 8 else 1) for code in range(16)]
+             for step in _IMA_STEPS]
+
+
+class ImaAdpcmCodec(Codec):
+    """
+    IMA-ADPCM, 4 бита на отсчёт
+
+    Каждый кадр начинается с 4-байтного заголовка (предсказатель int16,
+    индекс шага uint8, 1 — если последний полубайт дополняет нечётный
+    кадр), поэтому потерянный кадр не рассинхронизирует
+    декодер. Алгоритм по природе последовательный (состояние зависит от
+    предыдущего отсчёта), поэтому внутренний цикл — на списках Python с
+    таблицами приращений; упаковка полубайтов и преобразования — в NumPy.
+    """
+
+    name = "ima_adpcm"
+    bits_per_sample = 4
+
+    def __init__(self):
+        self.predictor = 0
+        self.index = 0
+
+    def encoder(self) -> "ImaAdpcmCodec":
+        return ImaAdpcmCodec()
+
+    def decoder(self) -> "ImaAdpcmCodec":
+        return ImaAdpcmCodec()
+
+    def encode(self, pcm: bytes) -> bytes:
+        samples = np.frombuffer(pcm, dtype="<i2").tolist()
+        padded = len(samples) & 1
+        header = np.array([self.predictor], dtype="<i2").tobytes() + bytes((self.index, padded))
+
+        predictor, index = self.predictor, self.index
+        codes = [0] * len(samples)
+        steps, index_table, diffs = _IMA_STEPS, _IMA_INDEX, _IMA_DIFF
+        for i, sample in enumerate(samples):
+            step = steps[index]
+            delta = sample - predictor
+            code = 0
+            if delta < 0:
+                code = 8
+                delta = -delta
+            if delta >= step:
+                code |= 4
+                delta -= step
+            if delta >= step >> 1:
+                code |= 2
+                delta -= step >> 1
+            if delta >= step >> 2:
+                code |= 1
+            predictor += diffs[index][code]
+            if predictor > 32767:
+                predictor = 32767
+            elif predictor < -32768:
+                predictor = -32768
+            index += index_table[code]
+            if index < 0:
+                index = 0
+            elif index > 88:
+                index = 88
+            codes[i] = code
+        self.predictor, self.index = predictor, index
+
+        packed = np.array(codes, dtype=np.uint8)
+        if padded:
+            packed = np.concatenate((packed, np.zeros(1, dtype=np.uint8)))
+        return header + (packed[0::2] | (packed[1::2] << 4)).tobytes()
+
+    def decode(self, data: bytes, n_samples: Optional[int] = None) -> bytes:
+        """
+        Raises:
+            ProtocolError: кадр короче заголовка или с неверным индексом шага
+        """
+        if len(data) < 4:
+            raise ProtocolError(f"IMA-ADPCM: кадр {len(data)} байт короче заголовка")
+        if data[2] >= len(_IMA_STEPS) or (data[3] & 1 and len(data) == 4):
+            raise ProtocolError(f"IMA-ADPCM: неверный заголовок кадра {data[:4].hex()}")
+        predictor = int(np.frombuffer(data[:2], dtype="<i2")[0])
+        index = data[2]
+        packed = np.frombuffer(data, dtype=np.uint8, offset=4)
+        codes = np.empty(len(packed) * 2, dtype=np.uint8)
+        codes[0::2] = packed & 0x0F
+        codes[1::2] = packed >> 4
+        if n_samples is None:
+            n_samples = len(codes) - (data[3] & 1)
+        codes = codes[:n_samples]
+
+        out = [0] * len(codes)
+        index_table, diffs = _IMA_INDEX, _IMA_DIFF
+        for i, code in enumerate(codes.tolist()):
+            predictor += diffs[index][code]
+            if predictor > 32767:
+                predictor = 32767
+            elif predictor < -32768:
+                predictor = -32768
+            index += index_table[code]
+            if index < 0:
+                index = 0
+            elif index > 88:
+                index = 88
+            out[i] = predictor
+        return np.array(out, dtype="<i2").tobytes()
+
+
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (
+    ImaAdpcmCodec(), MuLawCodec(), ALawCodec(), Codec(),
+)}
+
+# Порядок предпочтения сервера: сжатие 2:1 без заметной нагрузки, ADPCM —
+# только если спутник не умеет G.711
+PREFERENCE = ("ulaw", "alaw", "ima_adpcm", "pcm16")
+
+
+def negotiate(offered: Sequence[str], preference: Sequence[str] = PREFERENCE) -> str:
+    """Выбрать кодек из предложенных спутником (pcm16 поддерживается всегда)"""
+    for name in preference:
+        if name in offered and name in CODECS:
+            return name
+    return "pcm16"
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный кодек: {name}")
+
+
+def benchmark_codecs(seconds: float = 10.0, sample_rate: int = 16000,
+                     frame_ms: int = 20) -> List[Dict]:
+    """
+    Скорость кодирования/декодирования и экономия канала
+
+    Returns:
+        По кодеку: кбит/с, степень сжатия, МБ/с PCM на кодировании и
+        декодировании, отношение сигнал/шум (дБ)
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    speech_like = (np.sin(2 * np.pi * 220 * t) * 6000 * (1 + np.sin(2 * np.pi * 3 * t))
+                   + rng.normal(0, 300, len(t)))
+    pcm = np.clip(speech_like, -32768, 32767).astype("<i2")
+    frame = sample_rate * frame_ms // 1000
+    frames = [pcm[i:i + frame].tobytes() for i in range(0, len(pcm), frame)]
+
+    results = []
+    for name, codec in CODECS.items():
+        enc, dec = codec.encoder(), codec.decoder()
+        start = time.perf_counter()
+        encoded = [enc.encode(f) for f in frames]
+        enc_s = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded = b"".join(dec.decode(f) for f in encoded)
+        dec_s = time.perf_counter() - start
+
+        restored = np.frombuffer(decoded, dtype="<i2")[:len(pcm)].astype(np.float64)
+        noise = np.mean((restored - pcm) ** 2) + 1e-9
+        size = sum(len(f) for f in encoded)
+        results.append({
+            "codec": name,
+            "kbit_s": size * 8 / seconds / 1000,
+            "ratio": pcm.nbytes / size,
+            "encode_mb_s": pcm.nbytes / enc_s / 1e6,
+            "decode_mb_s": pcm.nbytes / dec_s / 1e6,
+            "snr_db": 10 * np.log10(np.mean(pcm.astype(np.float64) ** 2) / noise),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'кодек':<10} {'кбит/с':>8} {'сжатие':>7} {'код. МБ/с':>10} {'дек. МБ/с':>10} {'SNR дБ':>7}")
+    for r in benchmark_codecs():
+        print(f"{r['codec']:<10} {r['kbit_s']:8.1f} {r['ratio']:7.2f} "
+              f"{r['encode_mb_s']:10.1f} {r['decode_mb_s']:10.1f} {r['snr_db']:7.1f}")
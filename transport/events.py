@@ -0,0 +1,310 @@
+"""
+Внутрипроцессная шина событий
+
+Компоненты публикуют типизированные события (wake word, расшифровки,
+интент, начало/конец речи ассистента, ошибки), а логирование, метрики и
+интерфейс подписываются на них, не трогая горячий код.
+
+Публикация не блокируется: каждый подписчик (кроме inline) получает
+события через свою ограниченную очередь и обрабатывает их в своём потоке
+или в своём event loop. Медленный подписчик теряет события по своей
+политике, но не тормозит захват звука. Если на тип события никто не
+подписан, publish() — один поиск в словаре; а проверка wants() позволяет
+не создавать событие вовсе.
+
+Пример:
+    from transport.events import bus, FinalTranscript
+
+    bus.subscribe(FinalTranscript, lambda e: print(e.text))
+    bus.publish(FinalTranscript(text="который час"))
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Type
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+@dataclass
+class Event:
+    """Базовое событие; подписка на Event получает все события"""
+    source: str = ""
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class WakeDetected(Event):
+    keyword: str = ""
+
+
+@dataclass
+class PartialTranscript(Event):
+    text: str = ""
+
+
+@dataclass
+class FinalTranscript(Event):
+    text: str = ""
+    user: Optional[str] = None
+
+
+@dataclass
+class IntentMatched(Event):
+    """Публикуется до выполнения обработчика; его сбой — отдельный ErrorEvent"""
+    intent: str = ""
+    text: str = ""
+
+
+@dataclass
+class TTSStarted(Event):
+    text: str = ""
+
+
+@dataclass
+class TTSFinished(Event):
+    text: str = ""
+    duration: float = 0.0
+
+
+@dataclass
+class ErrorEvent(Event):
+    component: str = ""
+    message: str = ""
+
+
+class Subscription:
+    """Подписчик с собственной ограниченной очередью"""
+
+    def __init__(self, bus: "EventBus", event_type: Type[Event], handler: Callable,
+                 maxsize: int, policy: str, inline: bool,
+                 loop: Optional[asyncio.AbstractEventLoop]):
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Неизвестная политика: {policy}")
+        self.bus = bus
+        self.event_type = event_type
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.inline = inline
+        self.loop = loop
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue: Deque[Event] = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup_thread = threading.Event()
+        self._wakeup_async: Optional[asyncio.Event] = None
+
+    @property
+    def name(self) -> str:
+        return getattr(self.handler, "__qualname__", repr(self.handler))
+
+    def start(self):
+        if self.inline:
+            return
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._start_task)
+        else:
+            self._thread = threading.Thread(target=self._run_thread, daemon=True,
+                                            name=f"events-{self.event_type.__name__}")
+            self._thread.start()
+
+    def offer(self, event: Event):
+        """Положить событие в очередь (вызывается из publish, не блокируется)"""
+        if self.inline:
+            self._call(event)
+            return
+        with self._lock:
+            if self._closed:
+                return
+            was_empty = not self._queue
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self._queue.popleft()
+            self._queue.append(event)
+        # Будим обработчик только на переходе «пусто -> есть события»
+        if was_empty:
+            if self.loop is not None:
+                try:
+                    self.loop.call_soon_threadsafe(self._set_async_wakeup)
+                except RuntimeError:
+                    pass  # loop уже закрыт
+            else:
+                self._wakeup_thread.set()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._set_async_wakeup)
+            except RuntimeError:
+                pass
+        else:
+            self._wakeup_thread.set()
+
+    def _take_all(self) -> List[Event]:
+        with self._lock:
+            events = list(self._queue)
+            self._queue.clear()
+            return events
+
+    def _call(self, event: Event):
+        try:
+            self.handler(event)
+            self.delivered += 1
+        except Exception as e:
+            self.errors += 1
+            self.bus._report_handler_error(self, e)
+
+    def _run_thread(self):
+        while True:
+            self._wakeup_thread.wait()
+            self._wakeup_thread.clear()
+            if self._closed:
+                return
+            for event in self._take_all():
+                self._call(event)
+
+    def _start_task(self):
+        self._wakeup_async = asyncio.Event()
+        if self._queue:
+            self._wakeup_async.set()
+        self._task = asyncio.ensure_future(self._run_async())
+
+    def _set_async_wakeup(self):
+        if self._wakeup_async is not None:
+            self._wakeup_async.set()
+
+    async def _run_async(self):
+        while True:
+            await self._wakeup_async.wait()
+            self._wakeup_async.clear()
+            if self._closed:
+                return
+            for event in self._take_all():
+                try:
+                    result = self.handler(event)
+                    if asyncio.iscoroutine(result):
+                        await result
+                    self.delivered += 1
+                except Exception as e:
+                    self.errors += 1
+                    self.bus._report_handler_error(self, e)
+
+
+class EventBus:
+    """Шина публикации/подписки"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        # Кэш маршрутов: конкретный тип -> подписчики (с учётом наследования).
+        # Заменяется целиком при (от)писке, поэтому publish читает его без блокировки.
+        self._routes: Dict[type, Tuple[Subscription, ...]] = {}
+        self.published = 0
+
+    def subscribe(self, event_type: Type[Event], handler: Callable, *,
+                  maxsize: int = 64, policy: str = DROP_OLDEST, inline: bool = False,
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """
+        Подписаться на события типа event_type (и его подтипов)
+
+        Args:
+            event_type: Класс события
+            handler: Функция или корутина handler(event). Корутины
+                выполняются в event loop, из которого вызвана подписка
+            maxsize: Размер очереди подписчика
+            policy: DROP_OLDEST (важнее свежие события) или DROP_NEWEST
+            inline: Вызывать прямо в потоке публикации — только для очень
+                дешёвых обработчиков
+            loop: Event loop для обработчика (по умолчанию текущий, если
+                handler — корутина)
+
+        Returns:
+            Подписка (счётчики delivered/dropped/errors, для unsubscribe)
+        """
+        if asyncio.iscoroutinefunction(handler):
+            if inline:
+                raise ValueError("Корутина не может быть inline-подписчиком")
+            loop = loop or asyncio.get_running_loop()
+        sub = Subscription(self, event_type, handler, maxsize, policy, inline, loop)
+        with self._lock:
+            self._subscriptions.append(sub)
+            self._routes = {}
+        sub.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+            self._routes = {}
+        sub.close()
+
+    def wants(self, event_type: Type[Event]) -> bool:
+        """Есть ли подписчики — чтобы не собирать событие впустую"""
+        routes = self._routes.get(event_type)
+        if routes is None:
+            routes = self._resolve(event_type)
+        return bool(routes)
+
+    def publish(self, event: Event):
+        """Отправить событие всем подписчикам (не блокируется)"""
+        routes = self._routes.get(type(event))
+        if routes is None:
+            routes = self._resolve(type(event))
+        if not routes:
+            return
+        self.published += 1
+        for sub in routes:
+            sub.offer(event)
+
+    def _resolve(self, event_type: type) -> Tuple[Subscription, ...]:
+        with self._lock:
+            routes = tuple(s for s in self._subscriptions if issubclass(event_type, s.event_type))
+            new_routes = dict(self._routes)
+            new_routes[event_type] = routes
+            self._routes = new_routes
+        return routes
+
+    def _report_handler_error(self, sub: Subscription, error: Exception):
+        # Ошибка подписчика ErrorEvent не публикуется повторно, иначе можно зациклиться
+        if issubclass(ErrorEvent, sub.event_type):
+            print(f"[События] Ошибка в подписчике {sub.name}: {error}")
+            return
+        self.publish(ErrorEvent(source="events", component=sub.name, message=str(error)))
+
+    def close(self):
+        with self._lock:
+            subs, self._subscriptions = self._subscriptions, []
+            self._routes = {}
+        for sub in subs:
+            sub.close()
+
+    def stats(self) -> List[Dict]:
+        """Счётчики по подписчикам"""
+        with self._lock:
+            subs = list(self._subscriptions)
+        return [{
+            "event": s.event_type.__name__,
+            "handler": s.name,
+            "delivered": s.delivered,
+            "dropped": s.dropped,
+            "errors": s.errors,
+            "queued": len(s._queue),
+        } for s in subs]
+
+
+# Общая шина процесса
+bus = EventBus()
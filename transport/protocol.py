@@ -0,0 +1,73 @@
+"""
+Бинарный протокол спутниковых микрофонов
+
+Каждый кадр: заголовок 9 байт (<BII: тип, номер, длина) и полезная
+нагрузка. Соединение начинается с HELLO (JSON с параметрами сессии и
+списком кодеков), сервер отвечает WELCOME с выбранным кодеком (см.
+transport.codecs). Затем спутник шлёт AUDIO — PCM16 mono в этом кодеке —
+и END в конце реплики.
+Сервер отвечает по тому же соединению кадрами TRANSCRIPT, TTS_AUDIO и
+CONTROL.
+"""
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+HEADER = struct.Struct("<BII")
+MAX_PAYLOAD = 1 << 20
+
+# Спутник -> сервер
+HELLO = 1
+AUDIO = 2
+END = 3
+# Сервер -> спутник
+WELCOME = 16
+TRANSCRIPT = 17
+TTS_AUDIO = 18
+# В обе стороны
+CONTROL = 32
+
+FRAME_NAMES = {
+    HELLO: "HELLO", AUDIO: "AUDIO", END: "END",
+    WELCOME: "WELCOME", TRANSCRIPT: "TRANSCRIPT", TTS_AUDIO: "TTS_AUDIO",
+    CONTROL: "CONTROL",
+}
+
+
+class ProtocolError(Exception):
+    """Нарушение формата кадров"""
+
+
+def encode_frame(frame_type: int, seq: int, payload: bytes = b"") -> bytes:
+    return HEADER.pack(frame_type, seq & 0xFFFFFFFF, len(payload)) + payload
+
+
+def encode_json(frame_type: int, seq: int, data: Dict[str, Any]) -> bytes:
+    return encode_frame(frame_type, seq, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def decode_json(payload: bytes) -> Dict[str, Any]:
+    try:
+        return json.loads(payload)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ProtocolError(f"Некорректный JSON в кадре: {e}")
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+    """
+    Прочитать один кадр
+
+    Returns:
+        (тип, номер, полезная нагрузка)
+
+    Raises:
+        asyncio.IncompleteReadError: соединение закрыто
+        ProtocolError: слишком большой кадр
+    """
+    header = await reader.readexactly(HEADER.size)
+    frame_type, seq, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"Кадр {length} байт превышает лимит {MAX_PAYLOAD}")
+    payload = await reader.readexactly(length) if length else b""
+    return frame_type, seq, payload
@@ -0,0 +1,297 @@
+"""
+Сервер приёма аудио со спутниковых микрофонов
+
+Одно asyncio-соединение на спутник. Простаивающее соединение — это
+одна корутина, ждущая заголовок кадра, поэтому сотни подключённых
+спутников почти ничего не стоят. Декодирование идёт в пуле потоков;
+очередь блоков на соединение ограничена, и при её заполнении сервер
+перестаёт читать сокет — срабатывает TCP flow control, спутник
+притормаживает, а другие соединения не страдают.
+
+Пример:
+    python -m transport.server --port 8765
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from transport import codecs, protocol
+
+# Маркер конца реплики в очереди декодирования
+_END_OF_UTTERANCE = object()
+
+
+class VoskStreamRecognizer:
+    """Потоковый распознаватель одной сессии поверх общей модели Vosk"""
+
+    def __init__(self, model, sample_rate: int):
+        from vosk import KaldiRecognizer
+
+        self.rec = KaldiRecognizer(model, sample_rate)
+
+    def accept(self, pcm: bytes) -> Optional[str]:
+        """Передать блок; вернуть текст, если фраза завершилась"""
+        if self.rec.AcceptWaveform(pcm):
+            return json.loads(self.rec.Result()).get("text", "") or None
+        return None
+
+    def finish(self) -> str:
+        return json.loads(self.rec.FinalResult()).get("text", "")
+
+
+class SatelliteSession:
+    """Состояние одного подключения"""
+
+    def __init__(self, server: "IngestServer", reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, hello: Dict):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.satellite_id = str(hello.get("satellite_id", "unknown"))
+        self.sample_rate = int(hello.get("sample_rate", 16000))
+        self.hello = hello
+        # Кодек согласуется по списку из HELLO; без списка — PCM16
+        self.codec = codecs.negotiate(hello.get("codecs", ["pcm16"]), server.codec_preference)
+        self.decoder = codecs.get_codec(self.codec).decoder()
+        self.encoder = codecs.get_codec(self.codec).encoder()
+        self.peer = writer.get_extra_info("peername")
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=server.max_queue_blocks)
+        self.recognizer = None
+        self._out_seq = 0
+        self.expected_seq = 0
+        self.lost_frames = 0
+        self.reordered_frames = 0  # Повторы и кадры с номером позади ожидаемого
+        self.bytes_in = 0
+        self.pcm_bytes_in = 0
+        self.connected_at = time.time()
+
+    async def send(self, frame_type: int, payload: bytes = b""):
+        """Отправить кадр спутнику (ждёт, если спутник не успевает читать)"""
+        self.writer.write(protocol.encode_frame(frame_type, self._out_seq, payload))
+        self._out_seq += 1
+        await self.writer.drain()
+
+    async def send_json(self, frame_type: int, data: Dict):
+        await self.send(frame_type, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    async def send_transcript(self, text: str, final: bool = True):
+        await self.send_json(protocol.TRANSCRIPT, {"text": text, "final": final})
+
+    async def send_tts(self, pcm: bytes, sample_rate: int = 16000):
+        """Отправить синтезированную речь (PCM16 mono) для воспроизведения на спутнике"""
+        await self.send_json(protocol.CONTROL, {"event": "tts_start", "sample_rate": sample_rate})
+        await self.send(protocol.TTS_AUDIO, self.encoder.encode(pcm))
+        await self.send_json(protocol.CONTROL, {"event": "tts_end"})
+
+    async def send_control(self, event: str, **data):
+        data["event"] = event
+        await self.send_json(protocol.CONTROL, data)
+
+
+TranscriptHandler = Callable[[SatelliteSession, str], Awaitable[None]]
+
+
+class IngestServer:
+    """TCP-сервер приёма аудио"""
+
+    def __init__(self,
+                 recognizer_factory: Callable[[int], object],
+                 on_transcript: Optional[TranscriptHandler] = None,
+                 host: str = "0.0.0.0",
+                 port: int = 8765,
+                 max_queue_blocks: int = 32,
+                 decode_workers: int = 4,
+                 codec_preference=codecs.PREFERENCE):
+        """
+        Args:
+            recognizer_factory: factory(sample_rate) -> объект с accept(pcm) и finish()
+            on_transcript: Корутина (session, text), вызывается на каждую фразу;
+                может ответить через session.send_tts / send_control
+            host: Адрес прослушивания
+            port: Порт
+            max_queue_blocks: Очередь блоков на соединение до включения backpressure
+            decode_workers: Потоков декодирования на все соединения
+            codec_preference: Кодеки в порядке предпочтения
+        """
+        self.recognizer_factory = recognizer_factory
+        self.on_transcript = on_transcript
+        self.host = host
+        self.port = port
+        self.max_queue_blocks = max_queue_blocks
+        self.codec_preference = codec_preference
+        self._pool = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="ingest")
+        self.sessions: Dict[int, SatelliteSession] = {}
+        self._handlers: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        sock = self._server.sockets[0].getsockname()
+        self.port = sock[1]
+        print(f"[Ingest] Слушаю {sock[0]}:{sock[1]}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Остановить приём и дождаться завершения всех сессий"""
+        if self._server is not None:
+            self._server.close()
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        return {
+            "connections": len(self.sessions),
+            "sessions": [{
+                "satellite_id": s.satellite_id,
+                "codec": s.codec,
+                "queued_blocks": s.queue.qsize(),
+                "lost_frames": s.lost_frames,
+                "reordered_frames": s.reordered_frames,
+                "bytes_in": s.bytes_in,
+                "bandwidth_saved": round(1 - s.bytes_in / s.pcm_bytes_in, 3) if s.pcm_bytes_in else 0.0,
+            } for s in self.sessions.values()],
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = None
+        decoder = None
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            frame_type, _, payload = await protocol.read_frame(reader)
+            if frame_type != protocol.HELLO:
+                raise protocol.ProtocolError("Сессия должна начинаться с HELLO")
+            session = SatelliteSession(self, reader, writer, protocol.decode_json(payload))
+            self.sessions[id(session)] = session
+            await session.send_json(protocol.WELCOME, {"sample_rate": session.sample_rate,
+                                                       "codec": session.codec})
+
+            decoder = asyncio.create_task(self._decode_loop(session))
+            # Если декодер упал, очередь больше никто не разбирает — рвём соединение
+            decoder.add_done_callback(lambda task: writer.close())
+            await self._read_loop(session)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except protocol.ProtocolError as e:
+            print(f"[Ingest] Ошибка протокола от {writer.get_extra_info('peername')}: {e}")
+        except asyncio.CancelledError:
+            # Сервер закрывается: недоразобранная очередь не нужна
+            if decoder is not None:
+                decoder.cancel()
+                await asyncio.gather(decoder, return_exceptions=True)
+            raise
+        finally:
+            if session is not None:
+                if decoder is not None and not decoder.done():
+                    await session.queue.put(None)
+                if decoder is not None:
+                    try:
+                        await decoder
+                    except asyncio.CancelledError:
+                        pass
+                    except protocol.ProtocolError as e:
+                        print(f"[Ingest] Ошибка протокола от {session.peer}: {e}")
+                    except Exception as e:
+                        print(f"[Ingest] Ошибка декодирования ({session.satellite_id}): {e}")
+                self.sessions.pop(id(session), None)
+            writer.close()
+            self._handlers.discard(handler)
+
+    async def _read_loop(self, session: SatelliteSession):
+        while True:
+            frame_type, seq, payload = await protocol.read_frame(session.reader)
+            if frame_type == protocol.AUDIO:
+                gap = (seq - session.expected_seq) & 0xFFFFFFFF
+                if gap >= 1 << 31:
+                    # Номер позади ожидаемого (с учётом переполнения): повтор или
+                    # перестановка. В распознаватель не идёт, ожидаемый не откатывается
+                    session.reordered_frames += 1
+                    continue
+                session.lost_frames += gap
+                session.expected_seq = (seq + 1) & 0xFFFFFFFF
+                session.bytes_in += len(payload)
+                # Блокируется при полной очереди — чтение сокета приостанавливается
+                await session.queue.put(payload)
+            elif frame_type == protocol.END:
+                await session.queue.put(_END_OF_UTTERANCE)
+            elif frame_type == protocol.CONTROL:
+                event = protocol.decode_json(payload)
+                if event.get("event") == "ping":
+                    await session.send_control("pong")
+            else:
+                raise protocol.ProtocolError(f"Неожиданный кадр {frame_type}")
+
+    @staticmethod
+    def _accept(session: SatelliteSession, payload: bytes) -> Optional[str]:
+        pcm = session.decoder.decode(payload)
+        session.pcm_bytes_in += len(pcm)
+        return session.recognizer.accept(pcm)
+
+    async def _decode_loop(self, session: SatelliteSession):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await session.queue.get()
+            if item is None:
+                break
+            if session.recognizer is None:
+                session.recognizer = await loop.run_in_executor(
+                    self._pool, self.recognizer_factory, session.sample_rate)
+
+            if item is _END_OF_UTTERANCE:
+                text = await loop.run_in_executor(self._pool, session.recognizer.finish)
+                session.recognizer = None
+                # utterance_end — после итоговой расшифровки: по нему спутник
+                # считает реплику завершённой и перестаёт ждать текст
+                await self._deliver(session, text)
+                await session.send_control("utterance_end")
+            else:
+                text = await loop.run_in_executor(self._pool, self._accept, session, item)
+                await self._deliver(session, text)
+
+    async def _deliver(self, session: SatelliteSession, text: Optional[str]):
+        if text:
+            await session.send_transcript(text)
+            if self.on_transcript is not None:
+                await self.on_transcript(session, text)
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description="Сервер приёма аудио со спутников")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="models/stt/vosk-model-small-ru-0.22", help="Путь к модели Vosk")
+    parser.add_argument("--workers", type=int, default=4, help="Потоков декодирования")
+    args = parser.parse_args(argv)
+
+    from vosk import Model
+
+    model = Model(args.model)
+
+    async def on_transcript(session: SatelliteSession, text: str):
+        print(f"[Ingest] {session.satellite_id}: {text}")
+
+    server = IngestServer(lambda rate: VoskStreamRecognizer(model, rate), on_transcript,
+                          host=args.host, port=args.port, decode_workers=args.workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
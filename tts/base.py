@@ -63,10 +63,13 @@ class TTS(ABC):
         try:
             import sounddevice as sd
             import soundfile as sf
+            from audio.output import playback
             
             data, samplerate = sf.read(audio_path)
-            sd.play(data, samplerate)
-            sd.wait()
+            # Эталон воспроизведения нужен EchoGate в пути захвата
+            with playback.playing(data, samplerate):
+                sd.play(data, samplerate)
+                sd.wait()
         except Exception as e:
             print(f"[TTS] Ошибка воспроизведения: {e}")
             # Попытка использовать альтернативный метод
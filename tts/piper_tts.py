@@ -1,7 +1,6 @@
 import os
 import subprocess
 from pathlib import Path
-from piper.download_voices import download_voice
 
 class PiperTTS:
     def __init__(self, voice="ru_RU-ruslan-medium"):
@@ -14,6 +13,7 @@ class PiperTTS:
         model_files = list(self.model_dir.glob("*.onnx"))
         if not model_files:
             print(f"[PiperTTS] Модель {voice} не найдена. Скачиваем...")
+            from piper.download_voices import download_voice
             download_voice(voice, download_dir=self.model_dir)
             print(f"[PiperTTS] Модель {voice} скачана в {self.model_dir}")
 
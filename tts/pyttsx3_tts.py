@@ -95,9 +95,12 @@ class Pyttsx3TTS(TTS):
         Args:
             text: Текст для озвучивания
         """
+        from audio.output import playback
+
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
+            with playback.playing():
+                self.engine.say(text)
+                self.engine.runAndWait()
         except Exception as e:
             print(f"[TTS] Ошибка озвучивания: {e}")
     
@@ -0,0 +1,87 @@
+"""
+Замер времени запуска компонентов и фоновая инициализация
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class StartupTimer:
+    """
+    Собирает время инициализации по компонентам.
+
+    Компоненты можно загружать последовательно через measure()
+    или параллельно в фоне через start_background().
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        # (компонент, начало относительно t0, длительность, ошибка)
+        self.records: List[Tuple[str, float, float, Optional[str]]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @contextmanager
+    def measure(self, name: str):
+        """Замерить блок кода как компонент name"""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._add(name, start, error)
+
+    def start_background(self, name: str, func: Callable[[], Any]) -> Future:
+        """Запустить инициализацию компонента в фоновом потоке"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup")
+
+        def task():
+            start = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                self._add(name, start, str(e))
+                raise
+            self._add(name, start, None)
+            return result
+
+        return self._executor.submit(task)
+
+    def mark(self, name: str):
+        """Отметить момент (например, 'готов к wake word')"""
+        now = time.perf_counter()
+        self._add(name, now, None)
+
+    def _add(self, name: str, start: float, error: Optional[str]):
+        with self._lock:
+            self.records.append((name, start - self.t0, time.perf_counter() - start, error))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def summary(self) -> Dict[str, float]:
+        """Длительность инициализации по компонентам (секунды)"""
+        with self._lock:
+            return {name: duration for name, _, duration, _ in self.records}
+
+    def report(self) -> str:
+        """Текстовый отчёт о запуске"""
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r[1])
+        lines = ["[Запуск] Компонент                      старт    длит."]
+        for name, started, duration, error in records:
+            status = f"  ОШИБКА: {error}" if error else ""
+            lines.append(f"[Запуск] {name:<30} {started:6.2f}s {duration:6.2f}s{status}")
+        lines.append(f"[Запуск] Всего: {self.elapsed():.2f}s")
+        return "\n".join(lines)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
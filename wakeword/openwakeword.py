@@ -1,13 +1,16 @@
 import wave
 import json
-from vosk import Model, KaldiRecognizer
 
 class WakeWord:
     def __init__(self, model_path: str, keyword: str):
+        from vosk import Model
+
         self.model = Model(model_path)
         self.keyword = keyword.lower()
 
     def check_wakeword(self, filename: str) -> bool:
+        from vosk import KaldiRecognizer
+
         wf = wave.open(filename, "rb")
         rec = KaldiRecognizer(self.model, wf.getframerate())
         while True: